@@ -0,0 +1,80 @@
+"""
+Бенчмарк поиска ссылки по короткому коду до и после индекса ix_links_code.
+
+Создает временную таблицу с той же структурой, что и links, заполняет её
+заданным числом строк и замеряет задержку запроса, который выполняет
+select_by_code, сначала без индекса, затем с частичным уникальным индексом.
+
+Запуск из корня репозитория (нужен PostgreSQL из .env):
+
+    python -m benchmarks.bench_code_lookup --rows 1000000 --queries 200
+"""
+import argparse
+import asyncio
+import random
+import time
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from benchmarks.common import report
+from src.config import get_db_url
+
+
+TABLE = "bench_links"
+
+
+async def fill_table(conn, rows: int) -> None:
+    """Создает и заполняет временную таблицу ссылок."""
+    await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    await conn.execute(text(f"CREATE TABLE {TABLE} (LIKE links INCLUDING DEFAULTS)"))
+    await conn.execute(text(
+        f"INSERT INTO {TABLE} (id, link, code, created_at, updated_at, usage_count) "
+        "SELECT i, 'http://example.com/' || i, substr(md5(i::text), 1, 6) || i, now(), now(), 0 "
+        "FROM generate_series(1, :rows) AS i"
+    ), {"rows": rows})
+    await conn.execute(text(f"ANALYZE {TABLE}"))
+
+
+async def measure(conn, codes: list[str]) -> list[float]:
+    """Возвращает задержки (мс) запросов по каждому коду из списка."""
+    query = text(f"SELECT * FROM {TABLE} WHERE code = :code")
+    timings = []
+    for code in codes:
+        start = time.perf_counter()
+        await conn.execute(query, {"code": code})
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+async def main(rows: int, queries: int) -> None:
+    engine = create_async_engine(get_db_url())
+    async with engine.connect() as conn:
+        await conn.execution_options(isolation_level="AUTOCOMMIT")
+        print(f"Filling {TABLE} with {rows} rows...")
+        await fill_table(conn, rows)
+        ids = random.sample(range(1, rows + 1), queries)
+        hit_codes = [row[0] for row in (await conn.execute(
+            text(f"SELECT code FROM {TABLE} WHERE id = ANY(:ids)"), {"ids": ids}
+        ))]
+        miss_codes = [f"missing{i}" for i in range(queries)]
+        try:
+            report("no index/hit", await measure(conn, hit_codes))
+            report("no index/miss", await measure(conn, miss_codes))
+            await conn.execute(text(
+                f"CREATE UNIQUE INDEX ix_{TABLE}_code ON {TABLE} (code) WHERE code IS NOT NULL"
+            ))
+            await conn.execute(text(f"ANALYZE {TABLE}"))
+            report("index/hit", await measure(conn, hit_codes))
+            report("index/miss", await measure(conn, miss_codes))
+        finally:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.queries))
@@ -0,0 +1,53 @@
+"""
+Бенчмарк стратегий генерации кодов: стоимость кодирования и длина кода.
+
+Для каждой стратегии из src.links.codes замеряет время кодирования
+--calls последовательных ID, начиная с --start (по умолчанию 10^9), и
+печатает длину кода для ID 1, 10^6, 10^9 и 10^12. Базы данных и Redis
+не требует.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_codes --calls 100000
+"""
+import argparse
+import timeit
+
+from src.config import settings
+from src.links.codes import make_code_generator
+
+
+STRATEGIES = ["sqids_range", "sqids", "feistel"]
+LENGTH_IDS = [1, 10 ** 6, 10 ** 9, 10 ** 12]
+
+
+def code_lengths(generator) -> str:
+    lengths = []
+    for link_id in LENGTH_IDS:
+        try:
+            lengths.append(str(len(generator.encode(link_id))))
+        except ValueError:
+            lengths.append("-")
+    return "/".join(lengths)
+
+
+def main(start: int, calls: int, repeat: int) -> None:
+    print(f"Code length for ids {'/'.join(f'{link_id:.0e}' for link_id in LENGTH_IDS)}, "
+          f"LINK_ENCODING_SIZE={settings.LINK_ENCODING_SIZE}")
+    ids = range(start, start + calls)
+    for strategy in STRATEGIES:
+        generator = make_code_generator(strategy)
+        rounds = timeit.repeat(lambda: [generator.encode(link_id) for link_id in ids],
+                               number=1, repeat=repeat)
+        per_call = min(rounds) / calls * 1_000_000
+        print(f"{strategy:<12} {per_call:8.3f} us per code  "
+              f"length={code_lengths(generator):<12} example={generator.encode(start)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--start", type=int, default=10 ** 9)
+    parser.add_argument("--calls", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    main(args.start, args.calls, args.repeat)
@@ -0,0 +1,98 @@
+"""
+Микробенчмарки горячих путей: get_code, select_by_code и update_stats.
+
+get_code замеряется без ввода-вывода. select_by_code выполняется на
+--links созданных ссылках (попадания и промахи). update_stats переносит
+в базу данных --stats-links накопленных счетчиков, --rounds раз. С
+--fake-redis вместо Redis используется fakeredis. Созданные ссылки
+после замера удаляются.
+
+Запуск из корня репозитория (нужен PostgreSQL из .env):
+
+    python -m benchmarks.bench_hot_paths --links 10000 --queries 2000 --fake-redis
+"""
+import argparse
+import asyncio
+import random
+import time
+import timeit
+import uuid
+
+from datetime import datetime, timedelta
+
+from benchmarks.common import delete_links, report, use_fake_redis
+from src.config import settings, timezone
+from src.database import async_session_maker
+from src.links.service import get_code, generate_short_links, select_by_code
+from src.tasks import tasks
+
+
+def bench_get_code(calls: int, repeat: int = 5) -> None:
+    ids = [random.randrange(1, 2 ** 40) for _ in range(calls)]
+    rounds = timeit.repeat(lambda: [get_code(link_id) for link_id in ids], number=1, repeat=repeat)
+    per_call = [elapsed / calls * 1_000_000 for elapsed in rounds]
+    print(f"{'get_code':<14} best={min(per_call):8.3f} us  "
+          f"worst={max(per_call):8.3f} us  per call, {calls} calls x {repeat}")
+
+
+async def seed_links(prefix: str, count: int) -> list[str]:
+    expires_at = datetime.now(timezone) + timedelta(days=1)
+    urls = [{"link": f"{prefix}{i}", "expires_at": expires_at, "custom_alias": None}
+            for i in range(count)]
+    codes = []
+    async with async_session_maker() as session:
+        for start in range(0, count, settings.BULK_SHORTEN_BATCH_SIZE):
+            results = await generate_short_links(
+                session, urls[start:start + settings.BULK_SHORTEN_BATCH_SIZE], None
+            )
+            codes.extend(code for _, code in results)
+    return codes
+
+
+async def bench_select_by_code(codes: list[str], queries: int) -> None:
+    hit_codes = random.choices(codes, k=queries)
+    miss_codes = [f"missing{i}" for i in range(queries)]
+    async with async_session_maker() as session:
+        for title, sample in (("select/hit", hit_codes), ("select/miss", miss_codes)):
+            timings = []
+            for code in sample:
+                start = time.perf_counter()
+                await select_by_code(code, session)
+                timings.append((time.perf_counter() - start) * 1000)
+                session.expunge_all()
+            report(title, timings)
+
+
+async def bench_update_stats(codes: list[str], rounds: int) -> None:
+    timings = []
+    for _ in range(rounds):
+        await tasks.redis_stats.zadd(tasks.STATS_KEY, {code: random.randint(1, 100) for code in codes})
+        start = time.perf_counter()
+        await tasks.update_stats()
+        timings.append((time.perf_counter() - start) * 1000)
+    print(f"update_stats: {len(codes)} links per flush")
+    report("update_stats", timings)
+
+
+async def main(args: argparse.Namespace) -> None:
+    if args.fake_redis:
+        use_fake_redis()
+    bench_get_code(args.get_code_calls)
+    prefix = f"http://bench.example.com/{uuid.uuid4().hex}/"
+    try:
+        codes = await seed_links(prefix, args.links)
+        await bench_select_by_code(codes, args.queries)
+        await bench_update_stats(codes[:args.stats_links], args.rounds)
+    finally:
+        await delete_links(prefix)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--fake-redis", action="store_true")
+    parser.add_argument("--get-code-calls", type=int, default=100_000)
+    parser.add_argument("--links", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--stats-links", type=int, default=5_000)
+    parser.add_argument("--rounds", type=int, default=10)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,178 @@
+"""
+Нагрузочный бенчмарк переходов по ссылкам и их сокращения.
+
+Сценарии:
+    redirect - создает --links ссылок и выполняет --requests переходов
+        GET /links/{short_code} в --concurrency потоков. Популярность кодов
+        распределена по закону Ципфа с показателем --zipf (0 - равномерно).
+    shorten - отправляет POST /links/shorten/ с постоянной частотой --rps
+        в течение --duration секунд. Задержка считается от запланированного
+        момента отправки, поэтому очередь на стороне клиента тоже
+        попадает в замер.
+
+По умолчанию запросы идут в приложение в том же процессе через ASGI
+(без сети и uvicorn), с --url - на запущенный сервер. С --fake-redis
+вместо Redis используется fakeredis (только без --url). Созданные
+ссылки после замера удаляются из базы данных из .env.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_http redirect --links 10000 --requests 20000 --concurrency 50
+    python -m benchmarks.bench_http shorten --rps 200 --duration 10 --fake-redis
+    python -m benchmarks.bench_http redirect --url http://localhost:8000
+"""
+import argparse
+import asyncio
+import contextlib
+import itertools
+import json
+import random
+import time
+import uuid
+
+from datetime import datetime, timedelta
+
+import httpx
+
+from benchmarks.common import delete_links, report, use_fake_redis
+
+
+SEED_BATCH_SIZE = 5000
+
+
+def make_client(url: str | None, concurrency: int) -> httpx.AsyncClient:
+    """Создает клиента к серверу по url или к приложению в том же процессе."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    if url:
+        return httpx.AsyncClient(base_url=url, limits=limits, timeout=30)
+    from src.main import app
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=app),
+                             base_url="http://bench", timeout=30)
+
+
+def app_lifespan(url: str | None):
+    """Запускает фоновые задачи приложения, если оно работает в том же процессе."""
+    if url:
+        return contextlib.nullcontext()
+    from src.main import app
+    return app.router.lifespan_context(app)
+
+
+def link_payload(prefix: str, i: int) -> dict:
+    expires_at = datetime.now() + timedelta(days=1)
+    return {"link": f"{prefix}{i}", "expires_at": expires_at.isoformat()}
+
+
+async def seed_links(client: httpx.AsyncClient, prefix: str, count: int) -> list[str]:
+    """Создает ссылки через пакетный эндпоинт и возвращает их коды."""
+    codes = []
+    for start in range(0, count, SEED_BATCH_SIZE):
+        payload = [link_payload(prefix, i) for i in range(start, min(count, start + SEED_BATCH_SIZE))]
+        response = await client.post("/links/shorten/batch/", json=payload)
+        response.raise_for_status()
+        for line in response.text.splitlines():
+            short_link = json.loads(line)["short_link"]
+            if short_link:
+                codes.append(short_link.rsplit("/", 1)[1])
+    return codes
+
+
+def zipf_sample(items: list[str], exponent: float, k: int) -> list[str]:
+    """Выбирает k элементов, где i-й по популярности выпадает с весом 1 / i^exponent."""
+    weights = itertools.accumulate(1 / rank ** exponent for rank in range(1, len(items) + 1))
+    return random.choices(items, cum_weights=list(weights), k=k)
+
+
+async def run_redirects(client: httpx.AsyncClient, codes: list[str],
+                        concurrency: int) -> tuple[list[float], int, float]:
+    """Выполняет переходы по кодам в concurrency потоков."""
+    timings = []
+    errors = 0
+    queue = iter(codes)
+
+    async def worker():
+        nonlocal errors
+        for code in queue:
+            start = time.perf_counter()
+            try:
+                response = await client.get(f"/links/{code}")
+                ok = response.status_code == 307
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                timings.append((time.perf_counter() - start) * 1000)
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return timings, errors, time.perf_counter() - start
+
+
+async def run_shorten(client: httpx.AsyncClient, prefix: str, rps: float,
+                      duration: float) -> tuple[list[float], int, float]:
+    """Отправляет запросы на сокращение с постоянной частотой rps."""
+    timings = []
+    errors = 0
+    loop = asyncio.get_running_loop()
+
+    async def shorten(i: int, scheduled: float):
+        nonlocal errors
+        try:
+            response = await client.post("/links/shorten/", json=link_payload(prefix, i))
+            ok = response.status_code == 201
+        except httpx.HTTPError:
+            ok = False
+        if ok:
+            timings.append((loop.time() - scheduled) * 1000)
+        else:
+            errors += 1
+
+    tasks = []
+    start = loop.time()
+    for i in range(int(rps * duration)):
+        scheduled = start + i / rps
+        delay = scheduled - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(shorten(i, scheduled)))
+    await asyncio.gather(*tasks)
+    return timings, errors, loop.time() - start
+
+
+async def main(args: argparse.Namespace) -> None:
+    prefix = f"http://bench.example.com/{uuid.uuid4().hex}/"
+    client = make_client(args.url, args.concurrency)
+    if args.fake_redis:
+        use_fake_redis()
+    try:
+        async with app_lifespan(args.url), client:
+            if args.scenario == "redirect":
+                codes = await seed_links(client, prefix, args.links)
+                print(f"Seeded {len(codes)} links, zipf exponent {args.zipf}")
+                sample = zipf_sample(codes, args.zipf, args.requests)
+                # Первый проход прогревает кэши, замеряется второй.
+                await run_redirects(client, sample[:args.warmup], args.concurrency)
+                timings, errors, elapsed = await run_redirects(client, sample, args.concurrency)
+                report("redirect", timings, elapsed, errors)
+            else:
+                timings, errors, elapsed = await run_shorten(client, prefix, args.rps, args.duration)
+                print(f"Target {args.rps} req/s")
+                report("shorten", timings, elapsed, errors)
+    finally:
+        await delete_links(prefix)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("scenario", choices=["redirect", "shorten"])
+    parser.add_argument("--url", help="адрес запущенного сервера (по умолчанию ASGI в процессе)")
+    parser.add_argument("--fake-redis", action="store_true")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--links", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--warmup", type=int, default=2_000)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    parser.add_argument("--rps", type=float, default=200)
+    parser.add_argument("--duration", type=float, default=10)
+    asyncio.run(main(parser.parse_args()))
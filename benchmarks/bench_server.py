@@ -0,0 +1,142 @@
+"""
+Сравнение пропускной способности переходов в разных режимах сервера.
+
+Профили:
+    asyncio - один процесс uvicorn со стандартным циклом asyncio и h11.
+    default - прежний запуск `uvicorn src.main:app`: один процесс, цикл
+        и HTTP-парсер uvicorn выбирает сам (uvloop и httptools, если они
+        установлены).
+    production - `python -m src.server`: --workers процессов с uvloop и
+        httptools.
+
+Для каждого профиля сервер запускается на свободном порту, создается
+--links ссылок, после прогрева выполняется --requests переходов с
+популярностью кодов по закону Ципфа. Нагрузку создают --clients
+процессов, чтобы клиент не стал узким местом. Нужны PostgreSQL и Redis
+из .env; созданные ссылки после замера удаляются.
+
+Запуск из корня репозитория:
+
+    python -m benchmarks.bench_server --workers 4 --clients 4 --requests 40000
+    python -m benchmarks.bench_server --profiles default production
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+from concurrent.futures import ProcessPoolExecutor
+
+import httpx
+
+from benchmarks.bench_http import make_client, run_redirects, seed_links, zipf_sample
+from benchmarks.common import delete_links, report
+
+
+PROFILES = ["asyncio", "default", "production"]
+STARTUP_TIMEOUT = 30
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(profile: str, port: int, workers: int, metrics_dir: str) -> subprocess.Popen:
+    """Запускает сервер в выбранном профиле."""
+    env = dict(os.environ, FASTAPI_PORT=str(port))
+    uvicorn = [sys.executable, "-m", "uvicorn", "src.main:app",
+               "--host", "127.0.0.1", "--port", str(port), "--no-access-log"]
+    if profile == "asyncio":
+        command = uvicorn + ["--loop", "asyncio", "--http", "h11"]
+    elif profile == "default":
+        command = uvicorn
+    else:
+        env.update(WEB_BIND_HOST="127.0.0.1", WEB_WORKERS=str(workers),
+                   PROMETHEUS_MULTIPROC_DIR=metrics_dir)
+        command = [sys.executable, "-m", "src.server"]
+    return subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL)
+
+
+async def wait_ready(url: str) -> None:
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    async with httpx.AsyncClient(base_url=url) as client:
+        while True:
+            try:
+                if (await client.get("/metrics")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                if time.monotonic() > deadline:
+                    raise
+            await asyncio.sleep(0.2)
+
+
+def run_client(url: str, codes: list[str], concurrency: int) -> tuple[list[float], int, float]:
+    """Выполняет переходы из отдельного процесса."""
+    async def run():
+        async with make_client(url, concurrency) as client:
+            return await run_redirects(client, codes, concurrency)
+
+    return asyncio.run(run())
+
+
+def run_clients(url: str, codes: list[str],
+                args: argparse.Namespace) -> tuple[list[float], int, float]:
+    """Делит переходы между --clients процессами и суммирует результаты."""
+    chunks = [codes[i::args.clients] for i in range(args.clients)]
+    with ProcessPoolExecutor(args.clients) as executor:
+        results = list(executor.map(run_client, [url] * args.clients, chunks,
+                                    [args.concurrency] * args.clients))
+    timings = [timing for result in results for timing in result[0]]
+    errors = sum(result[1] for result in results)
+    elapsed = max(result[2] for result in results)
+    return timings, errors, elapsed
+
+
+async def bench_profile(profile: str, args: argparse.Namespace) -> None:
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    prefix = f"http://bench.example.com/{uuid.uuid4().hex}/"
+    with tempfile.TemporaryDirectory() as metrics_dir:
+        server = start_server(profile, port, args.workers, metrics_dir)
+        try:
+            await wait_ready(url)
+            async with make_client(url, args.concurrency) as client:
+                codes = await seed_links(client, prefix, args.links)
+            sample = zipf_sample(codes, args.zipf, args.requests)
+            loop = asyncio.get_running_loop()
+            # Первый проход прогревает кэши всех процессов, замеряется второй.
+            await loop.run_in_executor(None, run_clients, url, sample[:args.warmup], args)
+            timings, errors, elapsed = await loop.run_in_executor(None, run_clients, url,
+                                                                  sample, args)
+            report(profile, timings, elapsed, errors)
+        finally:
+            server.terminate()
+            server.wait()
+            await delete_links(prefix)
+
+
+async def main(args: argparse.Namespace) -> None:
+    print(f"{args.requests} redirects, {args.clients} client processes x "
+          f"{args.concurrency} connections, {args.workers} server workers")
+    for profile in args.profiles:
+        await bench_profile(profile, args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=PROFILES)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--links", type=int, default=10_000)
+    parser.add_argument("--requests", type=int, default=40_000)
+    parser.add_argument("--warmup", type=int, default=4_000)
+    parser.add_argument("--zipf", type=float, default=1.1)
+    asyncio.run(main(parser.parse_args()))
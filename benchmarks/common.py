@@ -0,0 +1,68 @@
+"""
+Общие функции бенчмарков: отчет о задержках, подмена Redis и очистка данных.
+"""
+import statistics
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.config import get_db_url
+
+
+def report(title: str, timings: list[float], elapsed: float | None = None,
+           errors: int = 0) -> None:
+    """
+    Печатает среднее и перцентили задержек в миллисекундах.
+
+    Args:
+        title: Название замера.
+        timings: Задержки в миллисекундах.
+        elapsed: Общее время замера в секундах; если задано, печатается
+            пропускная способность.
+        errors: Число запросов, завершившихся ошибкой.
+    """
+    if len(timings) < 2:
+        print(f"{title:<14} not enough samples ({len(timings)}), errors={errors}")
+        return
+    quantiles = statistics.quantiles(timings, n=100)
+    line = (f"{title:<14} mean={statistics.mean(timings):8.3f} ms  "
+            f"p50={quantiles[49]:8.3f} ms  p95={quantiles[94]:8.3f} ms  "
+            f"p99={quantiles[98]:8.3f} ms")
+    if elapsed is not None:
+        line += f"  {len(timings) / elapsed:9.1f} req/s  errors={errors}"
+    print(line)
+
+
+def use_fake_redis():
+    """
+    Подменяет клиенты Redis во всех загруженных модулях src на fakeredis.
+
+    Вызывается после импорта приложения. Подходит только для запуска
+    в одном процессе с приложением.
+
+    Returns:
+        Пара клиентов (кэш, статистика).
+    """
+    import fakeredis
+
+    server = fakeredis.FakeServer()
+    cache = fakeredis.FakeAsyncRedis(server=server, db=0)
+    stats = fakeredis.FakeAsyncRedis(server=server, db=1)
+    for name, module in list(sys.modules.items()):
+        if not name.startswith("src."):
+            continue
+        if hasattr(module, "redis_cache"):
+            module.redis_cache = cache
+        if hasattr(module, "redis_stats"):
+            module.redis_stats = stats
+    return cache, stats
+
+
+async def delete_links(prefix: str) -> None:
+    """Удаляет созданные бенчмарком ссылки с URL, начинающимся с prefix."""
+    engine = create_async_engine(get_db_url())
+    async with engine.begin() as conn:
+        await conn.execute(text("DELETE FROM links WHERE link LIKE :prefix"),
+                           {"prefix": f"{prefix}%"})
+    await engine.dispose()
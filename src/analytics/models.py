@@ -0,0 +1,56 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.types import String, DateTime, Integer
+from datetime import datetime
+
+from src.database import Base
+
+
+class ClickEvent(Base):
+    """
+    Модель SQLAlchemy для хранения переходов по ссылкам.
+
+    Таблица только дополняется и секционирована по месяцам по времени
+    перехода; секции создаются при записи событий (create_click_partitions).
+
+    Attributes:
+        event_id: ID события в потоке Redis; вместе с clicked_at образует
+            первичный ключ, поэтому повторная запись события пропускается.
+        clicked_at: Дата и время перехода.
+        code: Код ссылки.
+        referrer: Заголовок Referer запроса. Может быть None.
+        user_agent_hash: Хеш заголовка User-Agent. Может быть None.
+    """
+    __table_args__ = {"postgresql_partition_by": "RANGE (clicked_at)"}
+
+    event_id: Mapped[str] = mapped_column(String, primary_key=True)
+    clicked_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    code: Mapped[str] = mapped_column(String)
+    referrer: Mapped[str] = mapped_column(String, nullable=True)
+    user_agent_hash: Mapped[str] = mapped_column(String, nullable=True)
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}(event_id={self.event_id!r}, "
+                f"clicked_at={self.clicked_at!r}, "
+                f"code={self.code!r})")
+
+
+class ClickRollup(Base):
+    """
+    Модель SQLAlchemy для числа переходов по ссылке за минуту или час.
+
+    Attributes:
+        code: Код ссылки.
+        granularity: Длина интервала: minute или hour.
+        bucket: Начало интервала.
+        clicks: Число переходов за интервал.
+    """
+    code: Mapped[str] = mapped_column(String, primary_key=True)
+    granularity: Mapped[str] = mapped_column(String, primary_key=True)
+    bucket: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    clicks: Mapped[int] = mapped_column(Integer)
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}(code={self.code!r}, "
+                f"granularity={self.granularity!r}, "
+                f"bucket={self.bucket!r}, "
+                f"clicks={self.clicks!r})")
@@ -0,0 +1,14 @@
+from pydantic import BaseModel
+from datetime import datetime
+
+
+class ClickBucket(BaseModel):
+    """
+    Число переходов по ссылке за интервал времени.
+
+    Attributes:
+        bucket: Начало интервала.
+        clicks: Число переходов.
+    """
+    bucket: datetime
+    clicks: int
@@ -0,0 +1,111 @@
+from collections import Counter
+from datetime import date, datetime, timezone
+
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.analytics.models import ClickEvent, ClickRollup
+from src.monitoring.metrics import DB_QUERY_DURATION, timed
+
+
+GRANULARITIES = {"minute": {"second": 0, "microsecond": 0},
+                 "hour": {"minute": 0, "second": 0, "microsecond": 0}}
+
+def get_bucket(clicked_at: datetime, granularity: str) -> datetime:
+    """Возвращает начало минуты или часа, на который пришелся переход."""
+    return clicked_at.astimezone(timezone.utc).replace(**GRANULARITIES[granularity])
+
+def get_month(clicked_at: datetime) -> date:
+    """Возвращает первое число месяца, на который пришелся переход."""
+    return clicked_at.astimezone(timezone.utc).date().replace(day=1)
+
+@timed(DB_QUERY_DURATION)
+async def create_click_partitions(session: AsyncSession, months: set[date]) -> None:
+    """
+    Создает месячные секции таблицы переходов, если их еще нет.
+
+    Args:
+        session: Асинхронная сессия базы данных.
+        months: Первые числа месяцев, для которых нужны секции.
+    """
+    table = ClickEvent.__tablename__
+    for month in sorted(months):
+        next_month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+        await session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {table}_{month:%Y%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month} 00:00:00+00') TO ('{next_month} 00:00:00+00')"
+        ))
+
+@timed(DB_QUERY_DURATION)
+async def insert_click_events(session: AsyncSession, events: list[dict]) -> int:
+    """
+    Записывает пачку переходов и обновляет поминутные и почасовые сводки.
+
+    События, уже записанные ранее (с тем же ID в потоке), пропускаются,
+    а сводки считаются только по вставленным строкам, поэтому повторная
+    обработка пачки не искажает счетчики. Все изменения выполняются
+    в одной транзакции.
+
+    Args:
+        session: Асинхронная сессия базы данных.
+        events: Значения полей ClickEvent.
+
+    Returns:
+        Число записанных переходов.
+    """
+    if not events:
+        return 0
+    await create_click_partitions(session, {get_month(event["clicked_at"]) for event in events})
+    result = await session.execute(pg_insert(ClickEvent)
+                                   .values(events)
+                                   .on_conflict_do_nothing()
+                                   .returning(ClickEvent.code, ClickEvent.clicked_at))
+    inserted = result.all()
+    rollups = Counter((code, granularity, get_bucket(clicked_at, granularity))
+                      for code, clicked_at in inserted
+                      for granularity in GRANULARITIES)
+    if rollups:
+        # Строки упорядочены, чтобы параллельные вставки не взаимоблокировались.
+        statement = pg_insert(ClickRollup).values([
+            {"code": code, "granularity": granularity, "bucket": bucket, "clicks": clicks}
+            for (code, granularity, bucket), clicks in sorted(rollups.items())
+        ])
+        statement = statement.on_conflict_do_update(
+            index_elements=[ClickRollup.code, ClickRollup.granularity, ClickRollup.bucket],
+            set_={"clicks": ClickRollup.clicks + statement.excluded.clicks}
+        )
+        await session.execute(statement)
+    await session.commit()
+    return len(inserted)
+
+@timed(DB_QUERY_DURATION)
+async def select_click_series(
+    session: AsyncSession,
+    code: str,
+    granularity: str,
+    since: datetime,
+    until: datetime
+) -> list[tuple[datetime, int]]:
+    """
+    Возвращает число переходов по ссылке по интервалам из сводок.
+
+    Args:
+        session: Асинхронная сессия базы данных.
+        code: Код ссылки.
+        granularity: Длина интервала: minute или hour.
+        since: Начало периода (включительно).
+        until: Конец периода (не включительно).
+
+    Returns:
+        Пары (начало интервала, число переходов) по возрастанию времени;
+        интервалы без переходов пропускаются.
+    """
+    query = (select(ClickRollup.bucket, ClickRollup.clicks)
+             .where(ClickRollup.code == code,
+                    ClickRollup.granularity == granularity,
+                    ClickRollup.bucket >= since,
+                    ClickRollup.bucket < until)
+             .order_by(ClickRollup.bucket))
+    result = await session.execute(query)
+    return result.all()
@@ -0,0 +1,97 @@
+import time
+
+from datetime import datetime, timezone
+from hashlib import blake2b
+
+from redis.exceptions import ResponseError
+
+from src.database import redis_stats
+
+
+CLICK_STREAM_KEY = "click_events"
+CLICK_GROUP = "click_events_consumers"
+REFERRER_MAX_LENGTH = 512
+
+def make_click_event(short_code: str, referrer: str | None, user_agent: str | None) -> dict:
+    """
+    Формирует компактное событие перехода для потока Redis.
+
+    Args:
+        short_code: Код ссылки.
+        referrer: Заголовок Referer (опционально).
+        user_agent: Заголовок User-Agent (опционально); в событие попадает
+            только его хеш.
+
+    Returns:
+        Поля события: код, время в миллисекундах, referrer и хеш User-Agent.
+    """
+    user_agent_hash = ""
+    if user_agent:
+        user_agent_hash = blake2b(user_agent.encode("utf-8"), digest_size=8).hexdigest()
+    return {"c": short_code,
+            "t": int(time.time() * 1000),
+            "r": (referrer or "")[:REFERRER_MAX_LENGTH],
+            "u": user_agent_hash}
+
+def parse_click_event(event_id: bytes, fields: dict[bytes, bytes]) -> dict:
+    """
+    Преобразует событие из потока в строку таблицы ClickEvent.
+
+    Args:
+        event_id: ID события в потоке.
+        fields: Поля события.
+
+    Returns:
+        Словарь значений полей ClickEvent.
+    """
+    referrer = fields.get(b"r", b"").decode("utf-8")
+    user_agent_hash = fields.get(b"u", b"").decode("utf-8")
+    return {"event_id": event_id.decode("utf-8"),
+            "clicked_at": datetime.fromtimestamp(int(fields[b"t"]) / 1000, timezone.utc),
+            "code": fields[b"c"].decode("utf-8"),
+            "referrer": referrer or None,
+            "user_agent_hash": user_agent_hash or None}
+
+async def create_click_group() -> None:
+    """Создает группу потребителей потока, если её еще нет."""
+    try:
+        await redis_stats.xgroup_create(CLICK_STREAM_KEY, CLICK_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+async def claim_click_events(consumer: str, min_idle_ms: int, count: int) -> list:
+    """
+    Забирает события, которые другие потребители прочитали, но не подтвердили.
+
+    Args:
+        consumer: Имя потребителя.
+        min_idle_ms: Минимальное время с момента чтения события.
+        count: Максимальное число событий.
+
+    Returns:
+        Пары (ID события, поля) для событий, еще не вытесненных из потока.
+    """
+    response = await redis_stats.xautoclaim(CLICK_STREAM_KEY, CLICK_GROUP, consumer,
+                                            min_idle_time=min_idle_ms, count=count)
+    return [(event_id, fields) for event_id, fields in response[1] if fields]
+
+async def read_click_events(consumer: str, count: int) -> list:
+    """
+    Читает новые события потока от имени потребителя группы.
+
+    Args:
+        consumer: Имя потребителя.
+        count: Максимальное число событий.
+
+    Returns:
+        Пары (ID события, поля).
+    """
+    response = await redis_stats.xreadgroup(CLICK_GROUP, consumer, {CLICK_STREAM_KEY: ">"},
+                                            count=count)
+    return response[0][1] if response else []
+
+async def ack_click_events(*event_ids: bytes) -> None:
+    """Подтверждает обработку событий группой потребителей."""
+    if event_ids:
+        await redis_stats.xack(CLICK_STREAM_KEY, CLICK_GROUP, *event_ids)
@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.types import String, DateTime, Integer
 from datetime import datetime
@@ -21,6 +22,10 @@ class ArchivedLink(Base):
         deleted_at: Дата и время удаления (архивации) ссылки. Может быть None.
         usage_count: Количество переходов по этой ссылке.
     """
+    __table_args__ = (
+        Index("ix_archivedlinks_code", "code"),
+        Index("ix_archivedlinks_owner", "owner"),
+    )
 
     id: Mapped[int_pk]
     owner: Mapped[str] = mapped_column(String, nullable=True)
@@ -0,0 +1,204 @@
+import asyncio
+import logging
+import time
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, TypeVar
+
+from redis.exceptions import RedisError
+
+from src.database import redis_cache
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class LocalCache:
+    """
+    Ограниченный по размеру LRU-кэш в памяти процесса с TTL для записей.
+
+    Используется как первый уровень кэша перед Redis. Не потокобезопасен:
+    рассчитан на работу внутри одного event loop.
+
+    Attributes:
+        maxsize: Максимальное число записей.
+        ttl: Время жизни записи по умолчанию в секундах.
+        hits: Число попаданий.
+        misses: Число промахов (включая устаревшие записи).
+        evictions: Число записей, вытесненных из-за переполнения.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data: OrderedDict[str, tuple[Any, float]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        """
+        Возвращает значение по ключу, если оно есть и не устарело.
+
+        Args:
+            key: Ключ записи.
+
+        Returns:
+            Сохраненное значение или None.
+        """
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+        value, expires_at = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        """
+        Сохраняет значение, вытесняя самую давно использованную запись.
+
+        Args:
+            key: Ключ записи.
+            value: Значение.
+            ttl: Время жизни в секундах (по умолчанию self.ttl).
+                Записи с неположительным TTL не сохраняются.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        self._data[key] = (value, time.monotonic() + ttl)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        """Удаляет запись, если она есть."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Удаляет все записи."""
+        self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        Возвращает счетчики кэша для подбора его размера.
+
+        Returns:
+            Словарь с размером, лимитом, попаданиями, промахами и вытеснениями.
+        """
+        return {"size": len(self._data),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions}
+
+
+class SingleFlight:
+    """
+    Объединение одновременных вызовов с одинаковым ключом в пределах процесса.
+
+    Первый вызов запускает загрузку отдельной задачей, остальные ждут ее
+    результата (или исключения) вместо повторной загрузки. Отмена одного
+    из ожидающих запросов не отменяет загрузку для остальных. Не
+    потокобезопасен: рассчитан на работу внутри одного event loop.
+
+    Attributes:
+        calls: Выполняющиеся загрузки по ключам.
+    """
+
+    def __init__(self):
+        self.calls: dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Выполняет func или присоединяется к уже выполняющемуся вызову с ключом key.
+
+        Args:
+            key: Ключ загрузки.
+            func: Функция, возвращающая корутину загрузки.
+
+        Returns:
+            Результат загрузки.
+        """
+        return await asyncio.shield(self.start(key, func))
+
+    def start(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> asyncio.Future:
+        """
+        Запускает func в фоне, если вызов с ключом key еще не выполняется.
+
+        Args:
+            key: Ключ загрузки.
+            func: Функция, возвращающая корутину загрузки.
+
+        Returns:
+            Задача загрузки (новая или уже выполняющаяся).
+        """
+        task = self.calls.get(key)
+        if task is None:
+            task = self.calls[key] = asyncio.ensure_future(func())
+            task.add_done_callback(lambda _: self.calls.pop(key, None))
+        return task
+
+
+invalidation_channels: dict[str, LocalCache] = {}
+
+def register_invalidation_channel(channel: str, cache: LocalCache) -> None:
+    """
+    Связывает канал Redis pub/sub с локальным кэшем.
+
+    Сообщение в канале содержит ключ, который нужно удалить из кэша.
+
+    Args:
+        channel: Имя канала.
+        cache: Локальный кэш, который канал инвалидирует.
+    """
+    invalidation_channels[channel] = cache
+
+async def publish_invalidation(channel: str, *keys: str) -> None:
+    """
+    Удаляет ключи из локального кэша и рассылает инвалидацию остальным процессам.
+
+    Args:
+        channel: Имя канала инвалидации.
+        keys: Ключи, которые нужно удалить из кэша.
+    """
+    cache = invalidation_channels[channel]
+    async with redis_cache.pipeline(transaction=False) as pipe:
+        for key in keys:
+            cache.delete(key)
+            pipe.publish(channel, key)
+        await pipe.execute()
+
+async def listen_invalidations(retry_delay: float = 1.0) -> None:
+    """
+    Слушает каналы инвалидации и удаляет ключи из локальных кэшей.
+
+    Запускается фоновой задачей на время жизни приложения. После разрыва
+    соединения с Redis локальные кэши очищаются целиком, так как часть
+    сообщений могла быть потеряна.
+
+    Args:
+        retry_delay: Пауза перед повторным подключением в секундах.
+    """
+    while True:
+        try:
+            async with redis_cache.pubsub(ignore_subscribe_messages=True) as pubsub:
+                await pubsub.subscribe(*invalidation_channels)
+                for cache in invalidation_channels.values():
+                    cache.clear()
+                async for message in pubsub.listen():
+                    cache = invalidation_channels.get(message["channel"].decode("utf-8"))
+                    if cache is not None:
+                        cache.delete(message["data"].decode("utf-8"))
+        except (RedisError, OSError) as e:
+            logger.warning(f"Cache invalidation listener disconnected: {e}")
+            await asyncio.sleep(retry_delay)
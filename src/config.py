@@ -1,6 +1,8 @@
 import os
 import pytz
 
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from passlib.context import CryptContext
 from sqids import Sqids
@@ -24,44 +26,163 @@ class Settings(BaseSettings):
         DB_HOST: Хост PostgreSQL
         DB_PORT: Порт PostgreSQL
         DB_NAME: Имя базы данных
+        DB_REPLICA_HOST: Хост реплики PostgreSQL для запросов на чтение
+            (если не задан, чтение идет с основного сервера)
+        DB_REPLICA_PORT: Порт реплики PostgreSQL (по умолчанию DB_PORT)
+        DB_POOL_SIZE: Число постоянных соединений в пуле
+        DB_MAX_OVERFLOW: Число дополнительных соединений сверх DB_POOL_SIZE
+        DB_POOL_TIMEOUT: Время ожидания свободного соединения в секундах
+        DB_POOL_RECYCLE: Время жизни соединения в секундах (-1 - без ограничения)
+        DB_POOL_PRE_PING: Проверять соединение перед выдачей из пула
+        DB_STATEMENT_CACHE_SIZE: Размер кэша подготовленных выражений asyncpg
+            на соединение (0 отключает кэш, например, за PgBouncer)
+        DB_POOL_WARM_SIZE: Число соединений, открываемых в пуле при запуске
+            приложения (не больше DB_POOL_SIZE)
         REDIS_HOST: Хост Redis
         REDIS_PORT: Порт Redis
         REDIS_CACHE_EXPIRATION: Время жизни кэша в секундах
+        REDIS_MAX_CONNECTIONS: Максимальный размер пула соединений с Redis
+        LOCAL_CACHE_SIZE: Максимальное число ссылок в кэше процесса
+        NEGATIVE_CACHE_EXPIRATION: Время жизни записи о несуществующем коде в секундах
+        CACHE_STALE_WINDOW: Время в секундах после REDIS_CACHE_EXPIRATION, в
+            течение которого устаревшая ссылка отдается из Redis, пока она
+            обновляется в фоне
+        LINK_LOCK_TIMEOUT_MS: Время жизни блокировки загрузки ссылки из базы
+            данных и максимальное ожидание ее загрузки другим процессом
+        STATS_CACHE_EXPIRATION: Время жизни данных ссылки для статистики
+            в Redis в секундах
+        HIT_BUFFER_INTERVAL_MS: Период переноса накопленных в процессе
+            переходов в Redis в миллисекундах
+        HIT_BUFFER_MAX_HITS: Число накопленных переходов, после которого они
+            переносятся в Redis досрочно
+        CLICK_EVENTS_ENABLED: Записывать события переходов в поток аналитики
+        CLICK_STREAM_MAXLEN: Примерная максимальная длина потока событий
+            переходов; необработанные события сверх нее вытесняются
+        CODE_FILTER_CAPACITY: Ожидаемое число кодов в фильтре Блума
+        CODE_FILTER_ERROR_RATE: Допустимая доля ложных срабатываний фильтра Блума
         RABBITMQ_HOST: Хост RabbitMQ
         RABBITMQ_PORT: Порт RabbitMQ
         RABBITMQ_USER: Логин RabbitMQ
         RABBITMQ_PASS: Пароль RabbitMQ
         FASTAPI_HOST: Хост FastAPI сервера
         FASTAPI_PORT: Порт FastAPI сервера
+        WEB_BIND_HOST: Адрес, на котором слушает сервер src.server
+        WEB_WORKERS: Число процессов сервера (по умолчанию - число ядер);
+            у каждого процесса свои пулы соединений с PostgreSQL и Redis
+        WEB_KEEP_ALIVE: Время ожидания следующего запроса в keep-alive
+            соединении в секундах
+        WEB_GRACEFUL_SHUTDOWN: Время на завершение текущих запросов при
+            остановке сервера в секундах
         SECRET_KEY: Секретный ключ для JWT
         ALGORITHM: Алгоритм шифрования JWT
         ACCESS_TOKEN_EXPIRES_MINUTES: Время жизни токена в минутах
-        LINK_ENCODING_SIZE: Размер кодирования ссылок
+        BCRYPT_ROUNDS: Стоимость (log2 числа раундов) хеширования паролей bcrypt
+        PASSWORD_HASH_WORKERS: Число потоков для хеширования и проверки паролей
+        PASSWORD_HASH_MAX_PENDING: Максимальное число ожидающих и выполняемых
+            операций с паролями, сверх которого запросы отклоняются с 503
+        USER_CACHE_SIZE: Максимальное число пользователей в кэше процесса
+        USER_CACHE_EXPIRATION: Время жизни пользователя в кэше процесса в секундах
+        LINK_ENCODING_SIZE: Размер кодирования ссылок (для стратегии sqids_range)
+        CODE_STRATEGY: Стратегия генерации кодов: sqids_range - sqids от
+            LINK_ENCODING_SIZE чисел, sqids - sqids от ID, feistel - ID,
+            переставленный сетью Фейстеля, в системе счисления алфавита.
+            Менять на базе с выданными кодами безопасно, только если длины
+            кодов разных стратегий не пересекаются
+        CODE_ALPHABET: Алфавит кодов для стратегий sqids и feistel
+        CODE_MIN_LENGTH: Минимальная длина кода для стратегии sqids
+        CODE_FEISTEL_BITS: Разрядность ID для стратегии feistel (четная)
+        CODE_FEISTEL_KEY: Ключ перестановки для стратегии feistel
+        CODE_POOL_ENABLED: Брать коды новых ссылок из заранее заполненного
+            пула в Redis вместо вычисления из ID
+        CODE_POOL_SIZE: Число кодов, до которого пополняется пул
+        CODE_POOL_CODE_LENGTH: Длина случайных кодов пула (лучше не совпадающая
+            с длиной кодов CODE_STRATEGY)
+        BULK_SHORTEN_BATCH_SIZE: Число ссылок, сохраняемых одним INSERT при пакетном сокращении
+        BULK_SHORTEN_MAX_ITEMS: Максимальное число ссылок в одном пакетном запросе
+        BULK_SHORTEN_MAX_BODY_SIZE: Максимальный размер тела пакетного запроса (байт)
+        USER_LINKS_PAGE_SIZE: Размер страницы списка ссылок пользователя по умолчанию
+        USER_LINKS_MAX_PAGE_SIZE: Максимальный размер страницы списка ссылок пользователя
+        USER_LINKS_STREAM_BATCH_SIZE: Число строк, получаемых из серверного
+            курсора за раз при выгрузке ссылок пользователя
         TIMEZONE: Часовой пояс сервера
         CLEAN_UP_EXPIRED_LINKS_TIME: Периодичность очистки ссылок (сек)
         UPDATE_STATS_TIME: Периодичность обновления статистики (сек)
+        REBUILD_CODE_FILTER_TIME: Периодичность перестроения фильтра Блума (мин)
+        REFILL_CODE_POOL_TIME: Периодичность пополнения пула кодов (мин)
+        CONSUME_CLICK_EVENTS_TIME: Периодичность переноса событий переходов
+            из потока Redis в базу данных (мин)
+        CELERY_METRICS_PORT: Порт HTTP-сервера метрик Prometheus воркера Celery
+            (если не задан, сервер не запускается)
     """
     DB_USER: str
     DB_PASS: str
     DB_HOST: str
     DB_PORT: int
     DB_NAME: str
+    DB_REPLICA_HOST: str | None = None
+    DB_REPLICA_PORT: int | None = None
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_POOL_WARM_SIZE: int = 5
     REDIS_HOST: str
     REDIS_PORT: int
     REDIS_CACHE_EXPIRATION: int
+    REDIS_MAX_CONNECTIONS: int = 100
+    LOCAL_CACHE_SIZE: int = 10000
+    NEGATIVE_CACHE_EXPIRATION: int = 10
+    CACHE_STALE_WINDOW: int = 5
+    LINK_LOCK_TIMEOUT_MS: int = 1000
+    STATS_CACHE_EXPIRATION: int = 5
+    HIT_BUFFER_INTERVAL_MS: int = 500
+    HIT_BUFFER_MAX_HITS: int = 1000
+    CLICK_EVENTS_ENABLED: bool = True
+    CLICK_STREAM_MAXLEN: int = 1000000
+    CODE_FILTER_CAPACITY: int = 1000000
+    CODE_FILTER_ERROR_RATE: float = 0.01
     RABBITMQ_HOST: str
     RABBITMQ_PORT: int
     RABBITMQ_USER: str
     RABBITMQ_PASS: str
     FASTAPI_HOST: str
     FASTAPI_PORT: int
+    WEB_BIND_HOST: str = "0.0.0.0"
+    WEB_WORKERS: int | None = None
+    WEB_KEEP_ALIVE: int = 5
+    WEB_GRACEFUL_SHUTDOWN: int = 30
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_EXPIRATION: int = 30
     LINK_ENCODING_SIZE: int
+    CODE_STRATEGY: Literal["sqids_range", "sqids", "feistel"] = "sqids_range"
+    CODE_ALPHABET: str = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+    CODE_MIN_LENGTH: int = 6
+    CODE_FEISTEL_BITS: int = 40
+    CODE_FEISTEL_KEY: str = ""
+    CODE_POOL_ENABLED: bool = False
+    CODE_POOL_SIZE: int = 100000
+    CODE_POOL_CODE_LENGTH: int = 8
+    BULK_SHORTEN_BATCH_SIZE: int = 1000
+    BULK_SHORTEN_MAX_ITEMS: int = 10000
+    BULK_SHORTEN_MAX_BODY_SIZE: int = 10 * 1024 * 1024
+    USER_LINKS_PAGE_SIZE: int = 100
+    USER_LINKS_MAX_PAGE_SIZE: int = 1000
+    USER_LINKS_STREAM_BATCH_SIZE: int = 1000
     TIMEZONE: str
     CLEAN_UP_EXPIRED_LINKS_TIME: int
     UPDATE_STATS_TIME: int
+    REBUILD_CODE_FILTER_TIME: int = 60
+    REFILL_CODE_POOL_TIME: int = 1
+    CONSUME_CLICK_EVENTS_TIME: int = 1
+    CELERY_METRICS_PORT: int | None = None
     
     model_config = SettingsConfigDict(
         env_file=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".env")
@@ -69,21 +190,25 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 sqids = Sqids()
 
 timezone = pytz.timezone(settings.TIMEZONE)
 
-def get_db_url() -> str:
+def get_db_url(host: str | None = None, port: int | None = None) -> str:
     """
     Формирует URL для подключения к PostgreSQL базе данных.
     
     Использует настройки из конфига для формирования строки подключения
     в формате postgresql+asyncpg.
 
+    Аргументы:
+        host: Хост сервера (по умолчанию DB_HOST)
+        port: Порт сервера (по умолчанию DB_PORT)
+
     Возвращает:
         str: Строка подключения к базе данных
     """
     return (f"postgresql+asyncpg://{settings.DB_USER}:{settings.DB_PASS}@"
-            f"{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}")
+            f"{host or settings.DB_HOST}:{port or settings.DB_PORT}/{settings.DB_NAME}")
@@ -1,17 +1,120 @@
-import redis
+import time
+import asyncio
+import logging
+import redis.asyncio as redis
 
 from typing import Annotated, AsyncGenerator
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncAttrs, AsyncSession
+from redis.exceptions import RedisError
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError, TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (create_async_engine, async_sessionmaker, AsyncAttrs,
+                                    AsyncEngine, AsyncSession)
 from sqlalchemy.orm import DeclarativeBase, declared_attr, mapped_column
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from sqlalchemy.types import String, Integer
 
 from src.config import get_db_url, settings
 
 
+logger = logging.getLogger(__name__)
+
+class MeteredQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, считающий время ожидания свободного соединения.
+
+    Attributes:
+        waits: Число выдач соединения из пула.
+        wait_time_total: Суммарное время ожидания в секундах.
+        wait_time_max: Максимальное время ожидания в секундах.
+        timeouts: Число отказов по истечении DB_POOL_TIMEOUT.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.waits = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+        self.timeouts = 0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            wait_time = time.perf_counter() - start
+            self.waits += 1
+            self.wait_time_total += wait_time
+            self.wait_time_max = max(self.wait_time_max, wait_time)
+
+    def recreate(self):
+        # Счетчики принадлежат процессу, а не экземпляру пула.
+        pool = super().recreate()
+        pool.waits = self.waits
+        pool.wait_time_total = self.wait_time_total
+        pool.wait_time_max = self.wait_time_max
+        pool.timeouts = self.timeouts
+        return pool
+
+    def stats(self) -> dict:
+        """
+        Возвращает загрузку пула и статистику ожидания соединений.
+
+        Returns:
+            Словарь с размером пула, числом свободных, выданных и
+            дополнительных соединений и счетчиками ожидания.
+        """
+        return {"size": self.size(),
+                "max_overflow": self._max_overflow,
+                "checked_in": self.checkedin(),
+                "checked_out": self.checkedout(),
+                "overflow": max(0, self.overflow()),
+                "waits": self.waits,
+                "wait_time_total": self.wait_time_total,
+                "wait_time_max": self.wait_time_max,
+                "timeouts": self.timeouts}
+
+
+def create_engine(url: str) -> AsyncEngine:
+    """
+    Создает движок с пулом соединений и кэшем выражений из настроек.
+
+    Размер кэша передается и в кэш подготовленных выражений диалекта
+    SQLAlchemy, и в собственный кэш asyncpg, чтобы значение 0 полностью
+    отключало подготовленные выражения.
+
+    Args:
+        url: URL подключения к базе данных.
+
+    Returns:
+        Асинхронный движок SQLAlchemy.
+    """
+    return create_async_engine(
+        f"{url}?prepared_statement_cache_size={settings.DB_STATEMENT_CACHE_SIZE}",
+        poolclass=MeteredQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    )
+
+
 DATABASE_URL = get_db_url()
-engine = create_async_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL)
 async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
 
+# Без реплики запросы на чтение идут через основной движок.
+if settings.DB_REPLICA_HOST:
+    read_engine = create_engine(get_db_url(settings.DB_REPLICA_HOST, settings.DB_REPLICA_PORT))
+    read_session_maker = async_sessionmaker(read_engine, expire_on_commit=False)
+else:
+    read_engine = engine
+    read_session_maker = async_session_maker
+
 class Base(AsyncAttrs, DeclarativeBase):
     """
     Базовый класс для всех SQLAlchemy моделей.
@@ -54,5 +157,136 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with async_session_maker() as session:
         yield session
 
-redis_cache = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=0)
-redis_stats = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=1)
+class LazySession:
+    """
+    Сессия SQLAlchemy, создаваемая при первом обращении к ней.
+
+    Проксирует атрибуты AsyncSession и создает сессию только при первом
+    использовании, поэтому запросы, на которые ответил кэш, не создают
+    сессию. AsyncSession и сама берет соединение из пула только при
+    первом запросе к базе данных, так что соединения по-прежнему
+    выдаются только при промахах кэша.
+
+    Attributes:
+        session_maker: Фабрика сессий.
+    """
+
+    def __init__(self, session_maker: async_sessionmaker):
+        self.session_maker = session_maker
+        self._session: AsyncSession | None = None
+
+    @property
+    def created(self) -> bool:
+        """Была ли сессия создана."""
+        return self._session is not None
+
+    def __getattr__(self, name: str):
+        if self._session is None:
+            self._session = self.session_maker()
+        return getattr(self._session, name)
+
+    async def close(self) -> None:
+        """Закрывает сессию, если она была создана."""
+        if self._session is not None:
+            await self._session.close()
+
+async def get_lazy_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Асинхронный генератор ленивых сессий основного сервера.
+
+    Используется как зависимость в роутерах вместо get_async_session:
+    сессия создается только при первом обращении к ней.
+
+    Yields:
+        LazySession: Ленивая сессия с интерфейсом AsyncSession
+    """
+    session = LazySession(async_session_maker)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+async def get_lazy_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Асинхронный генератор ленивых сессий для запросов только на чтение.
+
+    Сессия подключается к реплике, если она задана в настройках, и
+    создается только при первом обращении к ней. Данные реплики могут
+    отставать от основного сервера.
+
+    Yields:
+        LazySession: Ленивая сессия с интерфейсом AsyncSession
+    """
+    session = LazySession(read_session_maker)
+    try:
+        yield session
+    finally:
+        await session.close()
+
+redis_cache_pool = redis.ConnectionPool(host=settings.REDIS_HOST,
+                                       port=settings.REDIS_PORT,
+                                       db=0,
+                                       max_connections=settings.REDIS_MAX_CONNECTIONS)
+redis_stats_pool = redis.ConnectionPool(host=settings.REDIS_HOST,
+                                       port=settings.REDIS_PORT,
+                                       db=1,
+                                       max_connections=settings.REDIS_MAX_CONNECTIONS)
+redis_cache = redis.Redis(connection_pool=redis_cache_pool)
+redis_stats = redis.Redis(connection_pool=redis_stats_pool)
+
+async def close_redis() -> None:
+    """
+    Закрывает пулы соединений с Redis.
+
+    Вызывается при остановке приложения, чтобы корректно освободить
+    открытые соединения кэша и статистики.
+    """
+    await redis_cache.aclose()
+    await redis_stats.aclose()
+    await redis_cache_pool.disconnect()
+    await redis_stats_pool.disconnect()
+
+async def warm_up_engine(engine: AsyncEngine, size: int) -> None:
+    """
+    Заранее открывает соединения в пуле движка.
+
+    Соединения открываются одновременно и возвращаются в пул, поэтому
+    первые запросы после запуска не ждут установки соединения и
+    заполнения кэша типов asyncpg. Ошибка подключения только
+    логируется: недоступная база данных не должна мешать запуску.
+
+    Args:
+        engine: Асинхронный движок SQLAlchemy.
+        size: Число соединений.
+    """
+    async def connect():
+        async with engine.connect() as connection:
+            await connection.execute(text("SELECT 1"))
+
+    try:
+        await asyncio.gather(*(connect() for _ in range(size)))
+    except (SQLAlchemyError, OSError) as e:
+        logger.warning(f"Failed to warm up {engine.url.host}: {e}")
+
+async def warm_up() -> None:
+    """
+    Прогревает пулы соединений с PostgreSQL и Redis при запуске приложения.
+    """
+    size = min(settings.DB_POOL_WARM_SIZE, settings.DB_POOL_SIZE)
+    engines = [engine] if read_engine is engine else [engine, read_engine]
+    await asyncio.gather(*(warm_up_engine(db_engine, size) for db_engine in engines))
+    for client in (redis_cache, redis_stats):
+        try:
+            await client.ping()
+        except (RedisError, OSError) as e:
+            logger.warning(f"Failed to warm up Redis: {e}")
+
+async def dispose_engines() -> None:
+    """
+    Закрывает соединения пулов основного движка и движка реплики.
+
+    Вызывается при остановке приложения после завершения запросов.
+    """
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
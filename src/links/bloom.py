@@ -0,0 +1,126 @@
+import math
+
+from hashlib import blake2b
+from typing import AsyncIterable
+
+from redis.asyncio import Redis
+
+
+class RedisBloomFilter:
+    """
+    Фильтр Блума, хранящийся в битовой строке Redis.
+
+    Используется без модуля RedisBloom: биты выставляются и читаются
+    командами SETBIT/GETBIT в одном конвейере. Удаление элементов не
+    поддерживается, поэтому фильтр периодически перестраивается.
+
+    Фильтр отвечает "элемента точно нет" только после первого
+    перестроения: его отмечает ключ built_key. SETBIT из add создает
+    битовую строку и без перестроения, но в ней нет уже существующих
+    элементов.
+
+    Attributes:
+        key: Ключ битовой строки в Redis.
+        built_key: Ключ-отметка о том, что фильтр построен.
+        size: Размер фильтра в битах.
+        hashes: Число хеш-функций.
+    """
+
+    def __init__(self, key: str, capacity: int, error_rate: float):
+        self.key = key
+        self.built_key = f"{key}:built"
+        self.size = max(1, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+
+    def positions(self, item: str) -> list[int]:
+        """
+        Вычисляет номера битов элемента двойным хешированием.
+
+        Args:
+            item: Элемент фильтра.
+
+        Returns:
+            Список из self.hashes номеров битов.
+        """
+        digest = blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    async def add(self, redis: Redis, *items: str, key: str | None = None) -> None:
+        """
+        Добавляет элементы в фильтр.
+
+        Args:
+            redis: Клиент Redis.
+            items: Добавляемые элементы.
+            key: Ключ битовой строки (по умолчанию self.key).
+        """
+        if not items:
+            return
+        async with redis.pipeline(transaction=False) as pipe:
+            for item in items:
+                for position in self.positions(item):
+                    pipe.setbit(key or self.key, position, 1)
+            await pipe.execute()
+
+    async def might_contain(self, redis: Redis, item: str) -> bool:
+        """
+        Проверяет, может ли элемент быть в фильтре.
+
+        Если фильтр еще не построен или его битовая строка потеряна,
+        считается, что элемент может в нем быть.
+
+        Args:
+            redis: Клиент Redis.
+            item: Проверяемый элемент.
+
+        Returns:
+            False, если элемента точно нет, иначе True.
+        """
+        async with redis.pipeline(transaction=False) as pipe:
+            pipe.exists(self.built_key, self.key)
+            for position in self.positions(item):
+                pipe.getbit(self.key, position)
+            exists, *bits = await pipe.execute()
+        return exists < 2 or all(bits)
+
+    async def rebuild(self, redis: Redis, batches: AsyncIterable[list[str]]) -> int:
+        """
+        Строит фильтр заново во временном ключе и атомарно подменяет им текущий.
+
+        Вместе с подменой выставляется отметка built_key, после которой
+        фильтр начинает отвечать "элемента точно нет".
+
+        Args:
+            redis: Клиент Redis.
+            batches: Пачки всех элементов фильтра.
+
+        Returns:
+            Число добавленных элементов.
+        """
+        building_key = f"{self.key}:building"
+        await redis.delete(building_key)
+        await redis.setbit(building_key, self.size - 1, 0)
+        count = 0
+        async for batch in batches:
+            await self.add(redis, *batch, key=building_key)
+            count += len(batch)
+        async with redis.pipeline(transaction=True) as pipe:
+            await pipe.rename(building_key, self.key).set(self.built_key, 1).execute()
+        return count
+
+    async def info(self, redis: Redis) -> dict:
+        """
+        Возвращает заполненность фильтра и оценку доли ложных срабатываний.
+
+        Returns:
+            Словарь с размером в битах, числом хеш-функций, памятью в байтах,
+            числом выставленных битов и оценкой доли ложных срабатываний.
+        """
+        bits_set = await redis.bitcount(self.key)
+        return {"size_bits": self.size,
+                "hashes": self.hashes,
+                "memory_bytes": math.ceil(self.size / 8),
+                "bits_set": bits_set,
+                "false_positive_rate": (bits_set / self.size) ** self.hashes}
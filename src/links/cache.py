@@ -0,0 +1,310 @@
+import asyncio
+import time
+
+from datetime import datetime
+
+from src.cache import LocalCache, register_invalidation_channel, publish_invalidation
+from src.config import settings
+from src.database import redis_cache, redis_stats
+from src.links.bloom import RedisBloomFilter
+from src.monitoring.metrics import REDIS_DURATION, timed
+
+
+LINK_INVALIDATION_CHANNEL = "link_invalidation"
+LINK_NOT_FOUND = ""
+LINK_STATS_KEY = "link_stats"
+LINK_STATS_FLUSHING_KEY = "link_stats:flushing"
+LINK_STATS_LOCK_KEY = "link_stats:lock"
+LINK_STATS_LOCK_TIMEOUT_MS = 60 * 1000
+# Служебные ключи (и фильтр Блума) хранятся в базе статистики: ключи
+# базы кэша - это коды ссылок, и с ними мог бы совпасть алиас.
+LINK_DATA_KEY = "link_data:{}"
+LINK_LOCK_KEY = "link_lock:{}"
+LINK_LOCK_POLL_INTERVAL = 0.02
+
+local_link_cache = LocalCache(maxsize=settings.LOCAL_CACHE_SIZE,
+                              ttl=settings.REDIS_CACHE_EXPIRATION)
+register_invalidation_channel(LINK_INVALIDATION_CHANNEL, local_link_cache)
+
+code_filter = RedisBloomFilter(key="link_codes_filter",
+                               capacity=settings.CODE_FILTER_CAPACITY,
+                               error_rate=settings.CODE_FILTER_ERROR_RATE)
+
+def get_link_ttl(expires_at: datetime | None, stale_window: float = 0) -> float:
+    """
+    Вычисляет время жизни ссылки в кэше.
+
+    Args:
+        expires_at: Дата истечения срока действия ссылки.
+        stale_window: Время сверх REDIS_CACHE_EXPIRATION, в течение
+            которого устаревшая запись еще хранится в Redis.
+
+    Returns:
+        TTL в секундах, не превышающий REDIS_CACHE_EXPIRATION + stale_window
+        и время до истечения срока действия ссылки.
+    """
+    ttl = settings.REDIS_CACHE_EXPIRATION + stale_window
+    if expires_at is not None:
+        ttl = min(ttl, expires_at.timestamp() - time.time())
+    return ttl
+
+@timed(REDIS_DURATION)
+async def get_cached_link_entry(short_code: str) -> tuple[str | None, bool]:
+    """
+    Ищет оригинальный URL в локальном кэше, затем в Redis.
+
+    Ссылка хранится в Redis на CACHE_STALE_WINDOW секунд дольше, чем
+    считается свежей: последние CACHE_STALE_WINDOW секунд жизни ключа
+    она устарела, но еще отдается, пока обновляется в фоне. В локальный
+    кэш найденное в Redis значение попадает только на оставшееся время
+    свежести, поэтому устаревшую запись видит запрос к Redis.
+
+    Args:
+        short_code: Код сокращенной ссылки.
+
+    Returns:
+        Пара (оригинальный URL, LINK_NOT_FOUND если код недавно не был
+        найден в базе данных, или None, если ссылки нет в кэше; признак
+        устаревшей записи).
+    """
+    link = local_link_cache.get(short_code)
+    if link is not None:
+        return link, False
+    async with redis_cache.pipeline(transaction=False) as pipe:
+        link, ttl_ms = await pipe.get(short_code).pttl(short_code).execute()
+    if link is None:
+        return None, False
+    link = link.decode('utf-8')
+    if link == LINK_NOT_FOUND or ttl_ms < 0:
+        return link, False
+    fresh_ttl = ttl_ms / 1000 - settings.CACHE_STALE_WINDOW
+    if fresh_ttl <= 0:
+        return link, True
+    local_link_cache.set(short_code, link, fresh_ttl)
+    return link, False
+
+async def get_cached_link(short_code: str) -> str | None:
+    """
+    Ищет оригинальный URL в локальном кэше, затем в Redis.
+
+    Args:
+        short_code: Код сокращенной ссылки.
+
+    Returns:
+        Оригинальный URL, LINK_NOT_FOUND если код недавно не был найден
+        в базе данных, или None, если ссылки нет в кэше.
+    """
+    link, _ = await get_cached_link_entry(short_code)
+    return link
+
+@timed(REDIS_DURATION)
+async def wait_cached_link(short_code: str, timeout: float) -> str | None:
+    """
+    Ждет, пока другой процесс загрузит ссылку в Redis.
+
+    Args:
+        short_code: Код сокращенной ссылки.
+        timeout: Максимальное время ожидания в секундах.
+
+    Returns:
+        Оригинальный URL, LINK_NOT_FOUND или None, если за timeout
+        ссылка так и не появилась в кэше.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LINK_LOCK_POLL_INTERVAL)
+        link = await redis_cache.get(short_code)
+        if link is not None:
+            return link.decode('utf-8')
+    return None
+
+@timed(REDIS_DURATION)
+async def acquire_link_lock(short_code: str) -> bool:
+    """
+    Захватывает блокировку загрузки ссылки из базы данных для всех процессов.
+
+    Блокировка снимается сама через LINK_LOCK_TIMEOUT_MS миллисекунд,
+    если захвативший ее процесс не освободил ее раньше.
+
+    Args:
+        short_code: Код сокращенной ссылки.
+
+    Returns:
+        True, если блокировка захвачена.
+    """
+    return bool(await redis_stats.set(LINK_LOCK_KEY.format(short_code), 1, nx=True,
+                                      px=settings.LINK_LOCK_TIMEOUT_MS))
+
+@timed(REDIS_DURATION)
+async def release_link_lock(short_code: str) -> None:
+    """Освобождает блокировку загрузки ссылки."""
+    await redis_stats.delete(LINK_LOCK_KEY.format(short_code))
+
+@timed(REDIS_DURATION)
+async def acquire_stats_lock(token: str) -> bool:
+    """
+    Захватывает блокировку переноса статистики для всех воркеров.
+
+    Блокировка снимается сама через LINK_STATS_LOCK_TIMEOUT_MS
+    миллисекунд, если ее не продлить (см. extend_stats_lock).
+
+    Args:
+        token: Случайный идентификатор захватывающего запуска.
+
+    Returns:
+        True, если блокировка захвачена.
+    """
+    return bool(await redis_stats.set(LINK_STATS_LOCK_KEY, token, nx=True,
+                                      px=LINK_STATS_LOCK_TIMEOUT_MS))
+
+@timed(REDIS_DURATION)
+async def extend_stats_lock(token: str) -> bool:
+    """
+    Продлевает блокировку переноса статистики, если она еще принадлежит запуску.
+
+    Args:
+        token: Идентификатор запуска, захватившего блокировку.
+
+    Returns:
+        False, если блокировка истекла или ее захватил другой запуск.
+    """
+    if await redis_stats.get(LINK_STATS_LOCK_KEY) != token.encode("utf-8"):
+        return False
+    await redis_stats.pexpire(LINK_STATS_LOCK_KEY, LINK_STATS_LOCK_TIMEOUT_MS)
+    return True
+
+@timed(REDIS_DURATION)
+async def release_stats_lock(token: str) -> None:
+    """Освобождает блокировку переноса статистики, если она принадлежит запуску."""
+    if await redis_stats.get(LINK_STATS_LOCK_KEY) == token.encode("utf-8"):
+        await redis_stats.delete(LINK_STATS_LOCK_KEY)
+
+@timed(REDIS_DURATION)
+async def set_cached_link(short_code: str, link: str, expires_at: datetime | None) -> None:
+    """
+    Сохраняет ссылку в Redis и в локальный кэш.
+
+    Время жизни записи ограничено сроком действия ссылки, поэтому кэш
+    не отдает ссылку после её истечения. Истекшие ссылки не кэшируются.
+    В Redis запись хранится еще CACHE_STALE_WINDOW секунд после
+    окончания свежести (см. get_cached_link_entry).
+
+    Args:
+        short_code: Код сокращенной ссылки.
+        link: Оригинальный URL.
+        expires_at: Дата истечения срока действия ссылки.
+    """
+    ttl = get_link_ttl(expires_at, settings.CACHE_STALE_WINDOW)
+    if ttl <= 0:
+        return
+    await redis_cache.set(short_code, link, px=int(ttl * 1000))
+    local_link_cache.set(short_code, link, ttl - settings.CACHE_STALE_WINDOW)
+
+@timed(REDIS_DURATION)
+async def invalidate_links(*short_codes: str) -> None:
+    """
+    Удаляет ссылки из всех уровней кэша.
+
+    Заменяет ключи в Redis отметками об отсутствии ссылки, удаляет
+    накопленные переходы из "link_stats" и данные для статистики и
+    рассылает инвалидацию локальных кэшей всех процессов приложения.
+    Вызывается при удалении, пересоздании и архивации ссылок.
+
+    Args:
+        short_codes: Коды сокращенных ссылок.
+    """
+    if not short_codes:
+        return
+    await cache_missing_links(*short_codes)
+    async with redis_stats.pipeline(transaction=False) as pipe:
+        pipe.zrem(LINK_STATS_KEY, *short_codes)
+        pipe.delete(*(LINK_DATA_KEY.format(short_code) for short_code in short_codes))
+        await pipe.execute()
+    await publish_invalidation(LINK_INVALIDATION_CHANNEL, *short_codes)
+
+@timed(REDIS_DURATION)
+async def cache_missing_links(*short_codes: str) -> None:
+    """
+    Сохраняет в Redis отметки о том, что коды не найдены в базе данных.
+
+    Отметка живет NEGATIVE_CACHE_EXPIRATION секунд, пока запросы к таким
+    кодам получают 404 без обращения к базе данных.
+
+    Args:
+        short_codes: Коды сокращенных ссылок.
+    """
+    async with redis_cache.pipeline(transaction=False) as pipe:
+        for short_code in short_codes:
+            pipe.set(short_code, LINK_NOT_FOUND, ex=settings.NEGATIVE_CACHE_EXPIRATION)
+        await pipe.execute()
+
+@timed(REDIS_DURATION)
+async def might_exist(short_code: str) -> bool:
+    """
+    Проверяет код по фильтру Блума всех существующих кодов.
+
+    Args:
+        short_code: Код сокращенной ссылки.
+
+    Returns:
+        False, если ссылки с таким кодом точно нет, иначе True.
+    """
+    return await code_filter.might_contain(redis_stats, short_code)
+
+@timed(REDIS_DURATION)
+async def register_links(*short_codes: str) -> None:
+    """
+    Регистрирует коды новых ссылок в кэше.
+
+    Добавляет коды в фильтр Блума и удаляет оставшиеся от них отметки
+    об отсутствии ссылки.
+
+    Args:
+        short_codes: Коды созданных ссылок.
+    """
+    if not short_codes:
+        return
+    await asyncio.gather(redis_cache.delete(*short_codes),
+                         code_filter.add(redis_stats, *short_codes))
+
+@timed(REDIS_DURATION)
+async def get_cached_link_data(short_code: str) -> tuple[str | None, int]:
+    """
+    Читает из Redis данные ссылки для статистики и еще не перенесенные переходы.
+
+    Одним конвейером читаются сериализованные данные ссылки и счетчики
+    кода в "link_stats" и во временном ключе переноса, переходы из
+    которых еще могут отсутствовать в usage_count базы данных.
+
+    Args:
+        short_code: Код сокращенной ссылки.
+
+    Returns:
+        Пара (сериализованный LinkData или None, число переходов в Redis).
+    """
+    async with redis_stats.pipeline(transaction=False) as pipe:
+        pipe.get(LINK_DATA_KEY.format(short_code))
+        pipe.zscore(LINK_STATS_KEY, short_code)
+        pipe.zscore(LINK_STATS_FLUSHING_KEY, short_code)
+        data, pending, flushing = await pipe.execute()
+    if data is not None:
+        data = data.decode("utf-8")
+    return data, int(pending or 0) + int(flushing or 0)
+
+@timed(REDIS_DURATION)
+async def set_cached_link_data(short_code: str, data: str) -> None:
+    """
+    Сохраняет данные ссылки для статистики на STATS_CACHE_EXPIRATION секунд.
+
+    Args:
+        short_code: Код сокращенной ссылки.
+        data: Сериализованный LinkData.
+    """
+    await redis_stats.set(LINK_DATA_KEY.format(short_code), data,
+                          ex=settings.STATS_CACHE_EXPIRATION)
+
+@timed(REDIS_DURATION)
+async def delete_cached_link_data(*short_codes: str) -> None:
+    """Удаляет данные ссылок для статистики из Redis."""
+    if short_codes:
+        await redis_stats.delete(*(LINK_DATA_KEY.format(short_code) for short_code in short_codes))
@@ -0,0 +1,123 @@
+import math
+
+from hashlib import blake2b
+from typing import Protocol
+
+from sqids import Sqids
+
+from src.config import settings, sqids
+
+
+class CodeGenerator(Protocol):
+    """Стратегия получения кода ссылки из её идентификатора."""
+
+    def encode(self, link_id: int) -> str:
+        ...
+
+
+class SqidsRangeCodeGenerator:
+    """
+    Исходная стратегия: sqids от size последовательных чисел начиная с ID.
+
+    Длина кода растет вместе с size, а кодирование нескольких чисел
+    заметно медленнее остальных стратегий. Оставлена для совместимости
+    с уже выданными кодами.
+    """
+
+    def __init__(self, sqids: Sqids, size: int):
+        self.sqids = sqids
+        self.size = size
+
+    def encode(self, link_id: int) -> str:
+        return self.sqids.encode(list(range(link_id, link_id + self.size)))
+
+
+class SqidsCodeGenerator:
+    """
+    sqids от одного числа с заданным алфавитом и минимальной длиной.
+
+    Длина кода растет с ID медленно, а свой порядок символов алфавита дает
+    свою, не совпадающую с другими установками последовательность кодов.
+    """
+
+    def __init__(self, alphabet: str, min_length: int):
+        self.sqids = Sqids(alphabet=alphabet, min_length=min_length)
+
+    def encode(self, link_id: int) -> str:
+        return self.sqids.encode([link_id])
+
+
+class FeistelCodeGenerator:
+    """
+    Код фиксированной длины из ID, переставленного сетью Фейстеля.
+
+    Сеть Фейстеля - биекция на множестве чисел из bits бит, поэтому разные
+    ID дают разные коды, а последовательные ID не выдают порядок создания
+    ссылок. Переставленное число записывается в системе счисления по
+    основанию длины алфавита (base62 для алфавита по умолчанию).
+
+    Attributes:
+        bits: Разрядность ID; поддерживаются ID меньше 2 ** bits.
+        length: Длина кода.
+    """
+    ROUNDS = 4
+    MULTIPLIER = 0x9E3779B97F4A7C15
+    WORD_MASK = (1 << 64) - 1
+
+    def __init__(self, alphabet: str, bits: int, key: str):
+        if bits % 2:
+            raise ValueError("Feistel network needs an even number of bits.")
+        self.alphabet = alphabet
+        self.bits = bits
+        self.half_bits = bits // 2
+        self.half_mask = (1 << self.half_bits) - 1
+        self.length = math.ceil(bits / math.log2(len(alphabet)))
+        digest = blake2b(key.encode("utf-8"), digest_size=8 * self.ROUNDS).digest()
+        self.round_keys = [int.from_bytes(digest[i:i + 8], "little")
+                           for i in range(0, len(digest), 8)]
+
+    def round(self, value: int, key: int) -> int:
+        mixed = ((value ^ key) * self.MULTIPLIER) & self.WORD_MASK
+        return (mixed ^ (mixed >> 31)) & self.half_mask
+
+    def permute(self, value: int) -> int:
+        if value < 0 or value >> self.bits:
+            raise ValueError(f"Link id {value} does not fit into {self.bits} bits.")
+        left, right = value >> self.half_bits, value & self.half_mask
+        for key in self.round_keys:
+            left, right = right, left ^ self.round(right, key)
+        return (left << self.half_bits) | right
+
+    def encode(self, link_id: int) -> str:
+        value = self.permute(link_id)
+        base = len(self.alphabet)
+        chars = []
+        for _ in range(self.length):
+            value, digit = divmod(value, base)
+            chars.append(self.alphabet[digit])
+        return "".join(chars)
+
+
+def make_code_generator(strategy: str) -> CodeGenerator:
+    """
+    Создает генератор кодов по имени стратегии из настроек.
+
+    Args:
+        strategy: sqids_range, sqids или feistel.
+
+    Returns:
+        Генератор кодов.
+
+    Raises:
+        ValueError: Если стратегия неизвестна.
+    """
+    if strategy == "sqids_range":
+        return SqidsRangeCodeGenerator(sqids, settings.LINK_ENCODING_SIZE)
+    if strategy == "sqids":
+        return SqidsCodeGenerator(settings.CODE_ALPHABET, settings.CODE_MIN_LENGTH)
+    if strategy == "feistel":
+        return FeistelCodeGenerator(settings.CODE_ALPHABET, settings.CODE_FEISTEL_BITS,
+                                    settings.CODE_FEISTEL_KEY)
+    raise ValueError(f"Unknown code strategy: {strategy}")
+
+code_generator = make_code_generator(settings.CODE_STRATEGY)
@@ -0,0 +1,137 @@
+import asyncio
+import logging
+import time
+
+from redis.exceptions import RedisError
+
+from src.analytics.stream import CLICK_STREAM_KEY, make_click_event
+from src.config import settings
+from src.database import redis_stats
+from src.links.cache import LINK_STATS_KEY
+from src.monitoring.metrics import REDIS_DURATION
+
+
+logger = logging.getLogger(__name__)
+
+flush_duration = REDIS_DURATION.labels("flush_hits")
+
+
+class HitBuffer:
+    """
+    Буфер переходов по ссылкам в памяти процесса.
+
+    Переходы суммируются по кодам и переносятся в "link_stats" одним
+    конвейером ZINCRBY раз в interval секунд или по накоплении max_hits
+    переходов, вместо отдельного запроса к Redis на каждый переход.
+    В том же конвейере события переходов добавляются в поток аналитики.
+    Не потокобезопасен: рассчитан на работу внутри одного event loop.
+
+    Attributes:
+        max_hits: Число переходов, после которого буфер сбрасывается досрочно.
+        interval: Период сброса буфера в секундах.
+        track_events: Записывать ли события переходов в поток аналитики.
+        counts: Накопленные переходы по кодам.
+        events: Накопленные события переходов.
+        pending: Число переходов в буфере.
+    """
+
+    def __init__(self, max_hits: int, interval: float, track_events: bool = False):
+        self.max_hits = max_hits
+        self.interval = interval
+        self.track_events = track_events
+        self.counts: dict[str, int] = {}
+        self.events: list[dict] = []
+        self.pending = 0
+        self._full: asyncio.Event | None = None
+
+    def add(self, short_code: str, referrer: str | None = None,
+            user_agent: str | None = None) -> None:
+        """
+        Учитывает переход по ссылке.
+
+        Args:
+            short_code: Код сокращенной ссылки.
+            referrer: Заголовок Referer запроса (опционально).
+            user_agent: Заголовок User-Agent запроса (опционально).
+        """
+        self.counts[short_code] = self.counts.get(short_code, 0) + 1
+        if self.track_events:
+            self.events.append(make_click_event(short_code, referrer, user_agent))
+        self.pending += 1
+        if self.pending >= self.max_hits and self._full is not None:
+            self._full.set()
+
+    async def flush(self) -> int:
+        """
+        Переносит накопленные переходы в "link_stats" и поток аналитики.
+
+        Если Redis недоступен, счетчики возвращаются в буфер и переносятся
+        при следующем сбросе, а события переходов отбрасываются, чтобы
+        буфер не рос без ограничений. При отмене задачи (остановка
+        приложения во время сброса) в буфер возвращаются и счетчики, и
+        события, чтобы их перенес последний вызов flush.
+
+        Returns:
+            Число перенесенных переходов.
+        """
+        counts, events, pending = self.counts, self.events, self.pending
+        if not counts:
+            return 0
+        self.counts, self.events, self.pending = {}, [], 0
+        start = time.perf_counter()
+        try:
+            async with redis_stats.pipeline(transaction=False) as pipe:
+                for short_code, count in counts.items():
+                    pipe.zincrby(LINK_STATS_KEY, count, short_code)
+                for event in events:
+                    pipe.xadd(CLICK_STREAM_KEY, event,
+                              maxlen=settings.CLICK_STREAM_MAXLEN, approximate=True)
+                await pipe.execute()
+        except (RedisError, OSError) as e:
+            logger.warning(f"Failed to flush {pending} hits: {e}")
+            self.restore(counts, [], pending)
+            return 0
+        except asyncio.CancelledError:
+            self.restore(counts, events, pending)
+            raise
+        finally:
+            flush_duration.observe(time.perf_counter() - start)
+        return pending
+
+    def restore(self, counts: dict[str, int], events: list[dict], pending: int) -> None:
+        """
+        Возвращает в буфер переходы, которые не удалось перенести.
+
+        Args:
+            counts: Переходы по кодам.
+            events: События переходов.
+            pending: Число переходов.
+        """
+        for short_code, count in counts.items():
+            self.counts[short_code] = self.counts.get(short_code, 0) + count
+        self.events = events + self.events
+        self.pending += pending
+
+    async def run(self) -> None:
+        """
+        Периодически сбрасывает буфер.
+
+        Запускается фоновой задачей на время жизни приложения; при
+        остановке нужно вызвать flush, чтобы не потерять остаток.
+        """
+        self._full = asyncio.Event()
+        try:
+            while True:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._full.clear()
+                await self.flush()
+        finally:
+            self._full = None
+
+
+hit_buffer = HitBuffer(max_hits=settings.HIT_BUFFER_MAX_HITS,
+                       interval=settings.HIT_BUFFER_INTERVAL_MS / 1000,
+                       track_events=settings.CLICK_EVENTS_ENABLED)
@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey, text
+from sqlalchemy import ForeignKey, Index, text
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from sqlalchemy.types import String, DateTime, Integer
 from datetime import datetime
@@ -25,6 +25,10 @@ class Link(Base):
         expires_at: Дата и время истечения срока действия ссылки. Может быть None.
         user: Связь с моделью пользователя (relationship).
     """
+    __table_args__ = (
+        Index("ix_links_code", "code", unique=True, postgresql_where=text("code IS NOT NULL")),
+        Index("ix_links_owner_created_at", "owner", "created_at", "id"),
+    )
 
     id: Mapped[int_pk]
     owner: Mapped[str] = mapped_column(String, ForeignKey("users.username"), nullable=True)
@@ -0,0 +1,60 @@
+import logging
+import secrets
+
+from redis.exceptions import RedisError
+
+from src.config import settings
+from src.database import redis_stats
+
+
+logger = logging.getLogger(__name__)
+
+CODE_POOL_KEY = "code_pool"
+
+def generate_random_codes(count: int) -> set[str]:
+    """
+    Генерирует случайные коды длины CODE_POOL_CODE_LENGTH из CODE_ALPHABET.
+
+    Используется криптографический генератор, чтобы по выданным кодам
+    нельзя было предсказать следующие.
+
+    Args:
+        count: Число кодов.
+
+    Returns:
+        Множество кодов (может быть меньше count при совпадениях).
+    """
+    alphabet = settings.CODE_ALPHABET
+    length = settings.CODE_POOL_CODE_LENGTH
+    return {"".join(secrets.choice(alphabet) for _ in range(length)) for _ in range(count)}
+
+async def pop_pooled_code() -> str | None:
+    """
+    Забирает код из пула, если пул включен.
+
+    Returns:
+        Код или None, если пул выключен, пуст или Redis недоступен.
+        В этом случае код вычисляется из ID ссылки.
+    """
+    if not settings.CODE_POOL_ENABLED:
+        return None
+    try:
+        code = await redis_stats.lpop(CODE_POOL_KEY)
+    except RedisError as e:
+        logger.warning(f"Code pool is unavailable: {e}")
+        return None
+    return code.decode("utf-8") if code is not None else None
+
+async def get_code_pool_size() -> int:
+    """Возвращает число кодов в пуле."""
+    return await redis_stats.llen(CODE_POOL_KEY)
+
+async def push_pooled_codes(*codes: str) -> None:
+    """
+    Добавляет коды в конец пула.
+
+    Args:
+        codes: Свободные коды, отсутствующие в базе данных.
+    """
+    if codes:
+        await redis_stats.rpush(CODE_POOL_KEY, *codes)
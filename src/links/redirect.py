@@ -0,0 +1,212 @@
+import logging
+
+from urllib.parse import quote
+
+from fastapi import status
+from fastapi.responses import JSONResponse
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.routing import BaseRoute, Match
+
+from src.cache import SingleFlight
+from src.config import settings
+from src.database import async_session_maker, read_session_maker
+from src.links.cache import (LINK_NOT_FOUND,
+                             get_cached_link,
+                             get_cached_link_entry,
+                             set_cached_link,
+                             get_link_ttl,
+                             cache_missing_links,
+                             might_exist,
+                             wait_cached_link,
+                             acquire_link_lock,
+                             release_link_lock)
+from src.links.hits import hit_buffer
+from src.links.models import Link
+from src.links.service import select_by_code, link_not_found_exception
+from src.monitoring.metrics import redirect_hits, redirect_misses, redirect_not_found
+
+
+logger = logging.getLogger(__name__)
+
+# Символы, которые RedirectResponse не экранирует в заголовке Location.
+LOCATION_SAFE = ":/%#?=@[]!$&'()*+,;"
+
+REDIRECT_START = {"type": "http.response.start",
+                  "status": status.HTTP_307_TEMPORARY_REDIRECT}
+REDIRECT_HEADERS = [(b"content-length", b"0")]
+REDIRECT_BODY = {"type": "http.response.body", "body": b""}
+
+link_not_found_response = JSONResponse({"detail": link_not_found_exception.detail},
+                                       status_code=link_not_found_exception.status_code)
+
+link_flight = SingleFlight()
+
+async def select_link(short_code: str) -> Link | None:
+    """
+    Ищет ссылку по коду на реплике, а затем на основном сервере.
+
+    Код, не найденный на реплике, ищется на основном сервере, так как
+    реплика может еще не получить только что созданную ссылку.
+
+    Args:
+        short_code: Код сокращенной ссылки.
+
+    Returns:
+        Объект Link или None, если ссылка не найдена.
+    """
+    async with read_session_maker() as session:
+        link = await select_by_code(short_code, session)
+    if link is None and read_session_maker is not async_session_maker:
+        async with async_session_maker() as session:
+            link = await select_by_code(short_code, session)
+    return link
+
+async def load_link_into_cache(short_code: str) -> str | None:
+    """
+    Загружает ссылку из базы данных в кэш.
+
+    Args:
+        short_code: Код сокращенной ссылки.
+
+    Истекшая, но еще не перенесенная в архив ссылка считается
+    отсутствующей: set_cached_link ее не кэширует, и без отметки
+    процессы, ждущие загрузки в load_link, не дождались бы ее.
+
+    Returns:
+        Оригинальный URL или None, если ссылки нет или она истекла; в
+        этом случае в кэш записывается отметка об отсутствии ссылки.
+    """
+    link = await select_link(short_code)
+    if link is None or get_link_ttl(link.expires_at) <= 0:
+        await cache_missing_links(short_code)
+        return None
+    await set_cached_link(short_code, link.link, link.expires_at)
+    return link.link
+
+async def load_link(short_code: str) -> str | None:
+    """
+    Загружает ссылку при промахе кэша, не допуская лавины запросов к базе данных.
+
+    Загружает ссылку только процесс, захвативший блокировку в Redis;
+    остальные ждут, пока ссылка появится в кэше, и обращаются к базе
+    данных сами, только если не дождались ее за LINK_LOCK_TIMEOUT_MS.
+    Захватив блокировку, процесс еще раз проверяет кэш: ссылку мог
+    загрузить запрос, освободивший блокировку после промаха этого.
+
+    Args:
+        short_code: Код сокращенной ссылки.
+
+    Returns:
+        Оригинальный URL или None, если ссылки нет.
+    """
+    if not await acquire_link_lock(short_code):
+        link = await wait_cached_link(short_code, settings.LINK_LOCK_TIMEOUT_MS / 1000)
+        if link is not None:
+            return link if link != LINK_NOT_FOUND else None
+        return await load_link_into_cache(short_code)
+    try:
+        link = await get_cached_link(short_code)
+        if link is None:
+            return await load_link_into_cache(short_code)
+        return link if link != LINK_NOT_FOUND else None
+    finally:
+        await release_link_lock(short_code)
+
+async def refresh_link(short_code: str) -> None:
+    """
+    Обновляет в кэше устаревшую ссылку в фоне.
+
+    Блокировка не освобождается после обновления, поэтому все процессы
+    вместе обновляют ссылку не чаще раза в LINK_LOCK_TIMEOUT_MS. Ошибки
+    только логируются: до истечения ключа продолжает отдаваться
+    устаревшая ссылка.
+
+    Args:
+        short_code: Код сокращенной ссылки.
+    """
+    try:
+        if await acquire_link_lock(short_code):
+            await load_link_into_cache(short_code)
+    except (RedisError, SQLAlchemyError, OSError) as e:
+        logger.warning(f"Failed to refresh cached link {short_code}: {e}")
+
+async def resolve_link(short_code: str) -> str | None:
+    """
+    Находит оригинальный URL по коду для перехода.
+
+    Сначала проверяются кэш процесса, Redis и фильтр Блума; сессия базы
+    данных открывается только при промахе кэша. Одновременные промахи
+    по одному коду объединяются в одну загрузку в процессе (link_flight)
+    и между процессами (блокировка в Redis, см. load_link). Устаревшая
+    ссылка отдается сразу, а ее обновление запускается в фоне.
+
+    Args:
+        short_code: Код сокращенной ссылки.
+
+    Returns:
+        Оригинальный URL или None, если ссылки нет.
+    """
+    cached_link, stale = await get_cached_link_entry(short_code)
+    if cached_link == LINK_NOT_FOUND or (cached_link is None and not await might_exist(short_code)):
+        redirect_not_found.inc()
+        return None
+    if cached_link is not None:
+        redirect_hits.inc()
+        if stale:
+            # Отдельный ключ: результат обновления не должен достаться промаху.
+            link_flight.start(("refresh", short_code), lambda: refresh_link(short_code))
+        return cached_link
+    link = await link_flight.run(short_code, lambda: load_link(short_code))
+    if link is None:
+        redirect_not_found.inc()
+        return None
+    redirect_misses.inc()
+    return link
+
+
+class RedirectMiddleware:
+    """
+    ASGI-middleware, обслуживающее переходы по ссылкам в обход FastAPI.
+
+    Запросы, которые совпадают с маршрутом перехода, обрабатываются без
+    разрешения зависимостей, валидации и сериализации ответа: ответ 307
+    собирается из заготовленных сообщений ASGI, ответ 404 - заготовленный
+    JSONResponse с тем же телом, что и у link_not_found_exception. Маршрут
+    записывается в scope, чтобы MetricsMiddleware подписывал задержку
+    шаблоном пути. Остальные запросы передаются приложению.
+
+    Attributes:
+        route: Маршрут перехода (GET /links/{short_code}).
+        prefix: Постоянная часть пути маршрута для быстрой проверки.
+    """
+
+    def __init__(self, app, route: BaseRoute):
+        self.app = app
+        self.route = route
+        self.prefix = route.path.split("{", 1)[0]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+        match, child_scope = self.route.matches(scope)
+        if match is not Match.FULL:
+            await self.app(scope, receive, send)
+            return
+        scope["route"] = self.route
+        short_code = child_scope["path_params"]["short_code"]
+        link = await resolve_link(short_code)
+        if link is None:
+            await link_not_found_response(scope, receive, send)
+            return
+        referrer = user_agent = None
+        for name, value in scope["headers"]:
+            if name == b"referer":
+                referrer = value.decode("latin-1")
+            elif name == b"user-agent":
+                user_agent = value.decode("latin-1")
+        hit_buffer.add(short_code, referrer, user_agent)
+        location = quote(link, safe=LOCATION_SAFE).encode("latin-1")
+        await send({**REDIRECT_START, "headers": [*REDIRECT_HEADERS, (b"location", location)]})
+        await send(REDIRECT_BODY)
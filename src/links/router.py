@@ -1,31 +1,49 @@
-from typing import Optional, Annotated
-from fastapi import APIRouter, Depends, status, HTTPException
-from fastapi.responses import RedirectResponse
+import json
+
+from datetime import datetime, timedelta
+from typing import Literal, Optional, Annotated, AsyncIterator
+from fastapi import APIRouter, Depends, Request, status, HTTPException
+from fastapi.responses import RedirectResponse, StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
-from datetime import datetime
 
 from src.users.schemas import UserData
 from src.users.service import get_current_active_user_soft, get_current_active_user
-from src.database import get_async_session, redis_cache, redis_stats
+from src.database import (get_lazy_session, get_lazy_read_session, async_session_maker,
+                          read_session_maker)
 from src.schemas import Message
-from src.config import settings
-from src.links.schemas import Url, LinkData, CustomUrl
+from src.config import settings, timezone
+from src.analytics.schemas import ClickBucket
+from src.analytics.service import select_click_series
+from src.links.schemas import Url, LinkStats, CustomUrl, ShortenResult
+from src.links.cache import invalidate_links, register_links
+from src.links.hits import hit_buffer
+from src.links.redirect import resolve_link
+from src.links.stats import get_link_data
 from src.links.service import (code_to_url,
-                               update_link,
-                               select_by_link,
                                delete_link,
-                               get_link_exists_by_code,
                                get_link_exists_by_link,
+                               select_by_link,
                                generate_short_link,
-                               get_user_link)
+                               generate_short_links,
+                               get_user_link,
+                               link_not_found_exception)
 
 
 router = APIRouter(prefix='/links', tags=['Link'])
 
+SERIES_WINDOWS = {"minute": timedelta(hours=1), "hour": timedelta(days=1)}
+
+batch_too_large_exception = HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=(f"A batch may contain at most {settings.BULK_SHORTEN_MAX_ITEMS} links "
+                f"and {settings.BULK_SHORTEN_MAX_BODY_SIZE} bytes.")
+    )
+
 @router.post("/shorten/", status_code=status.HTTP_201_CREATED)
 async def create_short_link(
     url: CustomUrl,
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_lazy_session),
     current_user: Optional[UserData] = Depends(get_current_active_user_soft)
 ) -> Url:
     """
@@ -40,59 +58,201 @@ async def create_short_link(
         Объект с сокращенной версией URL.
 
     Raises:
-        HTTPException: 208 если ссылка уже имеет сокращенную версию.
+        HTTPException: 208 если ссылка уже имеет сокращенную версию,
+            409 если пользовательский алиас уже занят.
     """
     link_dict = url.model_dump()
-    link_old = await select_by_link(link_dict['link'], session)
-    if link_old:
-        raise HTTPException(
-            status_code=status.HTTP_208_ALREADY_REPORTED,
-            detail=f'This link already has a short version: {code_to_url(link_old.code)}'
-        )
     if current_user:
         link_dict['owner'] = current_user.model_dump()['username']
     code = await generate_short_link(session=session, **link_dict)
+    await register_links(code)
     return Url(link=code_to_url(code))
 
+async def read_body_chunks(request: Request) -> AsyncIterator[bytes]:
+    """
+    Читает тело пакетного запроса, ограничивая его размер.
+
+    Args:
+        request: Входящий HTTP-запрос.
+
+    Yields:
+        Части тела запроса по мере их поступления.
+
+    Raises:
+        HTTPException: 413 если тело больше BULK_SHORTEN_MAX_BODY_SIZE байт.
+    """
+    if int(request.headers.get("content-length") or 0) > settings.BULK_SHORTEN_MAX_BODY_SIZE:
+        raise batch_too_large_exception
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > settings.BULK_SHORTEN_MAX_BODY_SIZE:
+            raise batch_too_large_exception
+        yield chunk
+
+async def read_ndjson_lines(request: Request) -> AsyncIterator[bytes]:
+    """
+    Построчно читает тело NDJSON-запроса по мере его поступления.
+
+    Args:
+        request: Входящий HTTP-запрос.
+
+    Yields:
+        Непустые строки тела запроса.
+
+    Raises:
+        HTTPException: 413 если тело больше BULK_SHORTEN_MAX_BODY_SIZE байт.
+    """
+    buffer = b""
+    async for chunk in read_body_chunks(request):
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+async def shorten_batch(
+    batch: list[tuple[int, CustomUrl | ValidationError]],
+    owner: str | None
+) -> AsyncIterator[str]:
+    """
+    Сохраняет пачку ссылок и формирует по строке NDJSON на каждую из них.
+
+    Args:
+        batch: Пары (порядковый номер, ссылка или ошибка ее валидации).
+        owner: Владелец ссылок (опционально).
+
+    Yields:
+        Сериализованные результаты ShortenResult в порядке входных данных.
+    """
+    urls = [url.model_dump() for _, url in batch if isinstance(url, CustomUrl)]
+    results = []
+    if urls:
+        try:
+            async with async_session_maker() as session:
+                results = await generate_short_links(session, urls, owner)
+        except HTTPException:
+            results = [("error", None)] * len(urls)
+        await register_links(*(code for result_status, code in results if result_status == "created"))
+    results = iter(results)
+    for index, url in batch:
+        if isinstance(url, ValidationError):
+            result = ShortenResult(index=index, status="invalid", detail=str(url))
+        else:
+            result_status, code = next(results)
+            result = ShortenResult(
+                index=index,
+                link=url.model_dump()['link'],
+                short_link=code_to_url(code) if code else None,
+                status=result_status,
+                detail="This alias is already taken." if result_status == "conflict" else None
+            )
+        yield result.model_dump_json() + "\n"
+
+@router.post("/shorten/batch/", status_code=status.HTTP_200_OK)
+async def create_short_links_batch(
+    request: Request,
+    current_user: Optional[UserData] = Depends(get_current_active_user_soft)
+) -> StreamingResponse:
+    """
+    Пакетно создает сокращенные ссылки.
+
+    Принимает JSON-массив или NDJSON-поток (Content-Type:
+    application/x-ndjson) объектов CustomUrl. Тело читается целиком до
+    начала ответа, поэтому его размер ограничен BULK_SHORTEN_MAX_BODY_SIZE
+    байт, а число ссылок - BULK_SHORTEN_MAX_ITEMS. Ссылки валидируются и
+    сохраняются пачками по BULK_SHORTEN_BATCH_SIZE, а результаты
+    возвращаются потоком NDJSON после сохранения каждой пачки.
+
+    Args:
+        request: HTTP-запрос с телом в формате JSON или NDJSON.
+        current_user: Данные текущего пользователя (опционально).
+
+    Returns:
+        Поток NDJSON с объектами ShortenResult в порядке входных данных.
+
+    Raises:
+        HTTPException: 413 если в запросе больше BULK_SHORTEN_MAX_ITEMS
+            ссылок или тело больше BULK_SHORTEN_MAX_BODY_SIZE байт,
+            422 если тело не является JSON-массивом.
+    """
+    owner = current_user.model_dump()['username'] if current_user else None
+    # Тело читается до начала ответа: во время отправки StreamingResponse
+    # канал receive занят ожиданием разрыва соединения.
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        items = []
+        async for line in read_ndjson_lines(request):
+            items.append(line)
+            if len(items) > settings.BULK_SHORTEN_MAX_ITEMS:
+                raise batch_too_large_exception
+        validate = CustomUrl.model_validate_json
+    else:
+        try:
+            items = json.loads(b"".join([chunk async for chunk in read_body_chunks(request)]))
+        except ValueError:
+            items = None
+        if not isinstance(items, list):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Expected a JSON array or an NDJSON stream of links."
+            )
+        if len(items) > settings.BULK_SHORTEN_MAX_ITEMS:
+            raise batch_too_large_exception
+        validate = CustomUrl.model_validate
+
+    async def results() -> AsyncIterator[str]:
+        for start in range(0, len(items), settings.BULK_SHORTEN_BATCH_SIZE):
+            batch = []
+            for index, item in enumerate(items[start:start + settings.BULK_SHORTEN_BATCH_SIZE], start):
+                try:
+                    batch.append((index, validate(item)))
+                except ValidationError as e:
+                    batch.append((index, e))
+            async for line in shorten_batch(batch, owner):
+                yield line
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
 @router.get("/{short_code}", status_code=status.HTTP_307_TEMPORARY_REDIRECT)
 async def redirect_to_original_link(
     short_code: str,
-    session: AsyncSession = Depends(get_async_session)
+    request: Request
 ) -> RedirectResponse:
     """
     Перенаправляет по сокращенной ссылке на оригинальный URL.
 
     Args:
         short_code: Уникальный код сокращенной ссылки.
-        session: Асинхронная сессия SQLAlchemy.
+        request: HTTP-запрос (заголовки Referer и User-Agent для аналитики).
 
     Returns:
         RedirectResponse: Перенаправление на оригинальный URL.
 
     Notes:
-        - Использует Redis для кэширования
-        - Обновляет счетчик переходов и дату последнего использования,
-          если ссылка не найдена в кэше
-    """
-    cached_link = redis_cache.get(short_code)
-    if cached_link is not None:
-        cached_link = cached_link.decode('utf-8')
-        redis_stats.zincrby("link_stats", 1, short_code)
-        return RedirectResponse(url=cached_link)
-    link = await get_link_exists_by_code(session, short_code)
-    redis_cache.set(short_code, link.link, ex=settings.REDIS_CACHE_EXPIRATION)
-    values = {
-        "updated_at": datetime.now(),
-        "usage_count": link.usage_count + 1
-    }
-    await update_link(session, link.id, values)
-    return RedirectResponse(url=link.link)
+        - В приложении запросы к этому маршруту обслуживает
+          RedirectMiddleware с той же логикой (resolve_link); обработчик
+          задает схему OpenAPI и работает, если middleware не подключено
+        - Использует кэш процесса и Redis для кэширования
+        - Отвечает 404 без запроса к базе данных, если код отсутствует
+          в фильтре Блума или недавно не был найден
+        - Переход учитывается в буфере процесса, периодически переносится
+          в "link_stats" и затем в базу данных задачей update_stats,
+          в том числе при промахе кэша
+        - Событие перехода уходит через тот же буфер в поток аналитики
+    """
+    link = await resolve_link(short_code)
+    if link is None:
+        raise link_not_found_exception
+    hit_buffer.add(short_code, request.headers.get("referer"), request.headers.get("user-agent"))
+    return RedirectResponse(url=link)
 
 @router.delete("/{short_code}", status_code=status.HTTP_200_OK)
 async def delete_short_link(
     short_code: str,
     current_user: Annotated[UserData, Depends(get_current_active_user)],
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_lazy_session)
 ) -> Message:
     """
     Удаляет сокращенную ссылку.
@@ -108,16 +268,18 @@ async def delete_short_link(
     Notes:
         - Доступно только владельцу ссылки
         - Удаляет как саму ссылку, так и связанные статистические данные
+        - Удаляет ссылку из кэша
     """
     link = await get_user_link(session, current_user, short_code)
     await delete_link(session, link.id)
+    await invalidate_links(link.code)
     return Message(message=f"{code_to_url(link.code)} has been removed.")
 
 @router.put("/{short_code}", status_code=status.HTTP_200_OK)
 async def update_short_link(
     short_code: str,
     current_user: Annotated[UserData, Depends(get_current_active_user)],
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_lazy_session)
 ) -> Url:
     """
     Обновляет (пересоздает) сокращенную ссылку.
@@ -136,53 +298,86 @@ async def update_short_link(
     """
     link = await get_user_link(session, current_user, short_code)
     await delete_link(session, link.id)
+    await invalidate_links(link.code)
     code = await generate_short_link(session=session,
                                      link=link.link,
                                      expires_at=link.expires_at,
                                      owner=link.owner)
+    await register_links(code)
     return Url(link=code_to_url(code))
 
 @router.get("/{short_code}/stats", status_code=status.HTTP_200_OK)
 async def get_short_link_stats(
     short_code: str,
-    session: AsyncSession = Depends(get_async_session)
-) -> LinkData:
+    granularity: Optional[Literal["minute", "hour"]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    session: AsyncSession = Depends(get_lazy_read_session)
+) -> LinkStats:
     """
     Возвращает статистику по сокращенной ссылке.
 
     Args:
         short_code: Уникальный код сокращенной ссылки.
-        session: Асинхронная сессия SQLAlchemy.
+        granularity: Интервал временного ряда переходов: minute или hour
+            (опционально, без него ряд не возвращается).
+        since: Начало периода ряда (по умолчанию until минус
+            SERIES_WINDOWS[granularity]).
+        until: Конец периода ряда (по умолчанию текущее время).
+        session: Асинхронная сессия SQLAlchemy (нужна только для ряда).
 
     Returns:
-        Данные ссылки.
-    """
-    link = await get_link_exists_by_code(session, short_code)
-    return LinkData(
-        link=link.link,
-        code=link.code,
-        created_at=link.created_at,
-        usage_count=link.usage_count,
-        updated_at=link.updated_at
-    )
+        Данные ссылки и, если запрошен, временной ряд переходов.
+
+    Raises:
+        HTTPException: 404 если ссылка не найдена.
+
+    Notes:
+        - Данные ссылки кэшируются в Redis на STATS_CACHE_EXPIRATION секунд
+          (get_link_data); usage_count включает переходы, еще не
+          перенесенные в базу данных
+        - Ряд строится по сводкам, которые пополняются задачей
+          consume_click_events, и отстает от переходов на период ее запуска
+        - Интервалы без переходов в ряд не попадают
+    """
+    data = await get_link_data(short_code)
+    series = None
+    if granularity is not None:
+        until = until or datetime.now(timezone)
+        since = since or until - SERIES_WINDOWS[granularity]
+        rows = await select_click_series(session, short_code, granularity, since, until)
+        series = [ClickBucket(bucket=bucket, clicks=clicks) for bucket, clicks in rows]
+    return LinkStats(**data.model_dump(), series=series)
 
 @router.get("/search/", status_code=status.HTTP_200_OK)
 async def search_link(
     original_url: str,
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_lazy_read_session),
+    primary_session: AsyncSession = Depends(get_lazy_session)
 ) -> Url:
     """
     Ищет сокращенную версию по оригинальному URL.
 
     Args:
         original_url: Полный оригинальный URL для поиска.
-        session: Асинхронная сессия SQLAlchemy.
+        session: Асинхронная сессия SQLAlchemy (реплики, если она задана).
+        primary_session: Асинхронная сессия основного сервера.
 
     Returns:
         Сокращенная версия URL, если найдена.
 
+    Raises:
+        HTTPException: 404 если ссылка не найдена.
+
     Notes:
         - Поиск происходит по точному совпадению URL
+        - URL, не найденный на реплике, ищется на основном сервере, так
+          как реплика может еще не получить только что созданную ссылку;
+          без реплики запрос сразу идет на основной сервер
     """
-    link = await get_link_exists_by_link(session, original_url)
+    link = None
+    if read_session_maker is not async_session_maker:
+        link = await select_by_link(original_url, session)
+    if link is None:
+        link = await get_link_exists_by_link(primary_session, original_url)
     return Url(link=code_to_url(link.code))
@@ -1,7 +1,9 @@
-from typing import Optional
+from typing import Literal, Optional
 from pydantic import BaseModel, HttpUrl, field_serializer
 from datetime import datetime
 
+from src.analytics.schemas import ClickBucket
+
 
 class Url(BaseModel):
     """
@@ -60,3 +62,45 @@ class LinkData(BaseModel):
     created_at: datetime
     usage_count: int
     updated_at: datetime
+
+
+class LinkStats(LinkData):
+    """
+    Данные о ссылке с временным рядом переходов.
+
+    Attributes:
+        series: Число переходов по минутам или часам, если ряд запрошен.
+    """
+    series: Optional[list[ClickBucket]] = None
+
+
+class LinkPage(BaseModel):
+    """
+    Страница списка ссылок пользователя.
+
+    Attributes:
+        links: Ссылки в порядке создания.
+        next_cursor: Курсор следующей страницы или None, если страница последняя.
+    """
+    links: list[LinkData]
+    next_cursor: Optional[str] = None
+
+
+class ShortenResult(BaseModel):
+    """
+    Результат сокращения одной ссылки в пакетном запросе.
+
+    Attributes:
+        index: Порядковый номер ссылки во входных данных.
+        link: Оригинальный URL (None, если элемент не прошел валидацию).
+        short_link: Сокращенный URL, если он создан или уже существовал.
+        status: created - ссылка создана, exists - ссылка уже была сокращена,
+            conflict - алиас занят, invalid - ошибка валидации,
+            error - ошибка сохранения.
+        detail: Описание ошибки (опционально).
+    """
+    index: int
+    link: Optional[str] = None
+    short_link: Optional[str] = None
+    status: Literal["created", "exists", "conflict", "invalid", "error"]
+    detail: Optional[str] = None
@@ -1,13 +1,30 @@
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, insert, update, delete
+import base64
+import binascii
+
+from sqlalchemy.ext.asyncio import AsyncSession, AsyncScalarResult
+from sqlalchemy import (select, update, delete, func, any_, bindparam,
+                        column, tuple_, values as values_clause)
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.types import String, Integer
 from fastapi import status, HTTPException
 from datetime import datetime
 
 from src.links.models import Link
 from src.users.schemas import UserData
-from src.config import settings, sqids, timezone
+from src.config import settings, timezone
+from src.links.codes import code_generator
+from src.links.pool import pop_pooled_code
+from src.monitoring.metrics import DB_QUERY_DURATION, timed
 
 
+LINK_ID_SEQUENCE = f"{Link.__tablename__}_id_seq"
+CODE_COLLISION_RETRIES = 5
+
+link_not_found_exception = HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="This link doesn't exist."
+    )
+
 def get_code(link_id: int) -> str:
     """
     Генерирует уникальный код ссылки на основе ID.
@@ -19,9 +36,9 @@ def get_code(link_id: int) -> str:
         Уникальный закодированный код ссылки.
 
     Note:
-        Использует настройки LINK_ENCODING_SIZE для определения длины кода.
+        Стратегия генерации задается настройкой CODE_STRATEGY.
     """
-    return sqids.encode(list(range(link_id, link_id + settings.LINK_ENCODING_SIZE)))
+    return code_generator.encode(link_id)
 
 def code_to_url(code: str) -> str:
     """
@@ -35,11 +52,13 @@ def code_to_url(code: str) -> str:
     """
     return f"http://{settings.FASTAPI_HOST}:{settings.FASTAPI_PORT}/links/{code}"
 
+@timed(DB_QUERY_DURATION)
 async def select_by_link(link: str, session: AsyncSession) -> (Link | None):
     query = select(Link).where(Link.link == link)
     result = await session.execute(query)
     return result.scalar_one_or_none()
 
+@timed(DB_QUERY_DURATION)
 async def select_by_code(code: str, session: AsyncSession) -> (Link | None):
     """
     Ищет ссылку в базе данных по коду сокращения.
@@ -55,47 +74,38 @@ async def select_by_code(code: str, session: AsyncSession) -> (Link | None):
     result = await session.execute(query)
     return result.scalar_one_or_none()
 
-async def insert_link(
-    session: AsyncSession, 
-    values_dict: dict
-) -> None:
+@timed(DB_QUERY_DURATION)
+async def increment_usage_counts(session: AsyncSession, counts: dict[str, int]) -> int:
     """
-    Добавляет новую ссылку в базу данных.
+    Увеличивает счетчики переходов пачки ссылок одним запросом.
 
-    Args:
-        session: Асинхронная сессия базы данных.
-        values_dict: Словарь с данными для вставки.
-
-    Raises:
-        HTTPException: 500 при ошибке вставки.
-    """
-    statement = insert(Link).values(values_dict)
-    try:
-        await session.execute(statement)
-        await session.commit()
-    except Exception as e:
-        print(e)
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-async def update_link(session: AsyncSession, id: int, values: dict) -> None:
-    """
-    Обновляет данные ссылки в базе данных.
+    Выполняет UPDATE links SET usage_count = usage_count + v.hits
+    FROM (VALUES ...) AS v(code, hits) WHERE links.code = v.code.
 
     Args:
         session: Асинхронная сессия базы данных.
-        id: Идентификатор обновляемой ссылки.
-        values: Словарь с новыми значениями полей.
+        counts: Словарь {код ссылки: число новых переходов}.
+
+    Returns:
+        Число обновленных ссылок.
 
     Raises:
         HTTPException: 500 при ошибке обновления.
     """
-    statement = update(Link).where(Link.id == id).values(values)
+    hits = (values_clause(column("code", String), column("hits", Integer), name="hits")
+            .data(list(counts.items())))
+    statement = (update(Link)
+                 .where(Link.code == hits.c.code)
+                 .values(usage_count=Link.usage_count + hits.c.hits,
+                         updated_at=datetime.now(timezone)))
     try:
-        await session.execute(statement)
+        result = await session.execute(statement)
         await session.commit()
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return result.rowcount
 
+@timed(DB_QUERY_DURATION)
 async def delete_link(session: AsyncSession, id: int) -> None:
     """
     Удаляет ссылку из базы данных.
@@ -114,6 +124,33 @@ async def delete_link(session: AsyncSession, id: int) -> None:
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
+async def raise_link_conflict(session: AsyncSession, link: str) -> None:
+    """
+    Определяет причину конфликта при создании ссылки.
+
+    Вызывается только если вставка была пропущена из-за ограничения
+    уникальности: если URL уже сокращен, конфликт по ссылке, иначе по алиасу.
+
+    Args:
+        session: Асинхронная сессия базы данных.
+        link: Оригинальный URL, который не удалось сохранить.
+
+    Raises:
+        HTTPException: 208 если ссылка уже имеет сокращенную версию,
+            409 если алиас уже занят.
+    """
+    link_old = await select_by_link(link, session)
+    if link_old:
+        raise HTTPException(
+            status_code=status.HTTP_208_ALREADY_REPORTED,
+            detail=f'This link already has a short version: {code_to_url(link_old.code)}'
+        )
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="This alias is already taken."
+    )
+
+@timed(DB_QUERY_DURATION)
 async def generate_short_link(
     session: AsyncSession, 
     link: str,
@@ -124,6 +161,16 @@ async def generate_short_link(
     """
     Генерирует короткую ссылку и сохраняет её в базу данных.
 
+    Если включен пул кодов (CODE_POOL_ENABLED), код берется из пула в
+    Redis и строка записывается одним INSERT без обращения к
+    последовательности. Иначе идентификатор новой ссылки заранее берется
+    из последовательности, код вычисляется из него до вставки. Конфликты
+    по URL и алиасу определяются ограничениями уникальности
+    (ON CONFLICT DO NOTHING), а не предварительными запросами. Если
+    сгенерированный код (из пула или из ID) уже занят алиасом или кодом
+    из пула, а URL еще не сокращен, берется следующий ID из
+    последовательности, не более CODE_COLLISION_RETRIES раз.
+
     Args:
         session: Асинхронная сессия базы данных.
         link: Оригинальный URL для сокращения.
@@ -135,27 +182,255 @@ async def generate_short_link(
         Сгенерированный код сокращенной ссылки.
 
     Raises:
-        HTTPException: 409 если пользовательский алиас уже занят.
-    """
-    await insert_link(session, {"link": link,
-                                "created_at": datetime.now(timezone),
-                                "updated_at": datetime.now(timezone),
-                                "expires_at": expires_at,
-                                "owner": owner})
-    link_new = await select_by_link(link, session)
+        HTTPException: 208 если ссылка уже имеет сокращенную версию,
+            409 если пользовательский алиас уже занят.
+    """
+    now = datetime.now(timezone)
+    values = {"link": link,
+              "created_at": now,
+              "updated_at": now,
+              "expires_at": expires_at,
+              "owner": owner}
+    pooled_code = None
     if custom_alias is None:
-        code = get_code(link_new.id)
+        pooled_code = await pop_pooled_code()
+    if pooled_code is not None:
+        values["code"] = pooled_code
+    elif custom_alias is None:
+        await assign_sequence_code(session, values)
     else:
-        link_alias = await select_by_code(custom_alias, session)
-        if link_alias:
-            raise HTTPException(
-                status_code=status.HTTP_409_CONFLICT,
-                detail="This alias is already taken."
-            )
-        code = custom_alias
-    await update_link(session, link_new.id, {"code": code,
-                                             "updated_at": datetime.now(timezone)})
-    return code
+        values["code"] = custom_alias
+    link_id = await insert_new_link(session, values)
+    for _ in range(CODE_COLLISION_RETRIES):
+        if link_id is not None or custom_alias is not None or await select_by_link(link, session):
+            break
+        await assign_sequence_code(session, values)
+        link_id = await insert_new_link(session, values)
+    if link_id is None:
+        await raise_link_conflict(session, link)
+    return values["code"]
+
+async def assign_sequence_code(session: AsyncSession, values: dict) -> None:
+    """
+    Выделяет ID новой ссылки из последовательности и вычисляет по нему код.
+
+    Args:
+        session: Асинхронная сессия базы данных.
+        values: Значения полей новой ссылки, дополняются id и code.
+    """
+    link_id = await session.scalar(select(func.nextval(LINK_ID_SEQUENCE)))
+    values.update(id=link_id, code=get_code(link_id))
+
+async def insert_new_link(session: AsyncSession, values: dict) -> int | None:
+    """
+    Вставляет ссылку, пропуская её при нарушении ограничений уникальности.
+
+    Args:
+        session: Асинхронная сессия базы данных.
+        values: Значения полей новой ссылки.
+
+    Returns:
+        ID вставленной ссылки или None, если URL или код уже заняты.
+
+    Raises:
+        HTTPException: 500 при ошибке вставки.
+    """
+    statement = (pg_insert(Link)
+                 .values(values)
+                 .on_conflict_do_nothing()
+                 .returning(Link.id))
+    try:
+        link_id = await session.scalar(statement)
+        await session.commit()
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    return link_id
+
+@timed(DB_QUERY_DURATION)
+async def select_existing_codes(codes: list[str], session: AsyncSession) -> set[str]:
+    """
+    Отбирает из списка коды, уже занятые ссылками.
+
+    Args:
+        codes: Проверяемые коды.
+        session: Асинхронная сессия базы данных.
+
+    Returns:
+        Множество занятых кодов.
+    """
+    query = select(Link.code).where(Link.code == any_(bindparam("codes", codes, type_=ARRAY(String))))
+    result = await session.scalars(query)
+    return set(result.all())
+
+@timed(DB_QUERY_DURATION)
+async def select_codes_by_links(links: list[str], session: AsyncSession) -> dict[str, str]:
+    """
+    Ищет уже сокращенные ссылки одним запросом `link = ANY(...)`.
+
+    Args:
+        links: Список оригинальных URL.
+        session: Асинхронная сессия базы данных.
+
+    Returns:
+        Словарь {оригинальный URL: код} для найденных ссылок.
+    """
+    query = (select(Link.link, Link.code)
+             .where(Link.link == any_(bindparam("links", links, type_=ARRAY(String)))))
+    result = await session.execute(query)
+    return dict(result.all())
+
+@timed(DB_QUERY_DURATION)
+async def generate_short_links(
+    session: AsyncSession,
+    urls: list[dict],
+    owner: str | None = None
+) -> list[tuple[str, str | None]]:
+    """
+    Сокращает пачку ссылок за один INSERT.
+
+    Уже существующие ссылки находятся одним запросом, идентификаторы для
+    новых ссылок выделяются из последовательности одним запросом, после
+    чего все новые строки вставляются многострочным
+    INSERT ... ON CONFLICT DO NOTHING RETURNING в одной транзакции.
+    Пропущенные строки без алиаса, URL которых так и не сокращен (код из
+    ID занят алиасом или кодом из пула), вставляются повторно с новыми
+    ID, не более CODE_COLLISION_RETRIES раз.
+
+    Args:
+        session: Асинхронная сессия базы данных.
+        urls: Словари с полями link, expires_at и custom_alias.
+        owner: Владелец ссылок (опционально).
+
+    Returns:
+        Для каждого элемента urls пару (статус, код): created, exists или
+        conflict, если алиас занят либо ссылку с алиасом одновременно
+        создал другой запрос.
+
+    Raises:
+        HTTPException: 500 при ошибке вставки.
+    """
+    existing = await select_codes_by_links(list({url["link"] for url in urls}), session)
+    new_urls = {}
+    for url in urls:
+        if url["link"] not in existing:
+            new_urls.setdefault(url["link"], url)
+    created = {}
+    pending = list(new_urls.values())
+    for _ in range(CODE_COLLISION_RETRIES + 1):
+        if not pending:
+            break
+        ids = await session.scalars(
+            select(func.nextval(LINK_ID_SEQUENCE))
+            .select_from(func.generate_series(1, len(pending)))
+        )
+        now = datetime.now(timezone)
+        rows = [{"id": link_id,
+                 "link": url["link"],
+                 "code": url.get("custom_alias") or get_code(link_id),
+                 "created_at": now,
+                 "updated_at": now,
+                 "expires_at": url["expires_at"],
+                 "owner": owner}
+                for link_id, url in zip(ids.all(), pending)]
+        statement = (pg_insert(Link)
+                     .values(rows)
+                     .on_conflict_do_nothing()
+                     .returning(Link.link, Link.code))
+        try:
+            result = await session.execute(statement)
+            inserted = dict(result.all())
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        created.update(inserted)
+        skipped = [url for url in pending
+                   if url["link"] not in inserted and not url.get("custom_alias")]
+        if skipped:
+            existing.update(await select_codes_by_links([url["link"] for url in skipped], session))
+        pending = [url for url in skipped if url["link"] not in existing]
+    results = []
+    for url in urls:
+        link = url["link"]
+        if link in existing:
+            results.append(("exists", existing[link]))
+        elif link in created:
+            results.append(("created", created[link]))
+            existing[link] = created.pop(link)
+        else:
+            results.append(("conflict", None))
+    return results
+
+def encode_link_cursor(link: Link) -> str:
+    """
+    Формирует курсор постраничного списка, указывающий на ссылку.
+
+    Args:
+        link: Последняя ссылка страницы.
+
+    Returns:
+        Непрозрачная для клиента строка с датой создания и ID ссылки.
+    """
+    key = f"{link.created_at.isoformat()},{link.id}"
+    return base64.urlsafe_b64encode(key.encode("utf-8")).decode("ascii")
+
+def decode_link_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Разбирает курсор постраничного списка.
+
+    Args:
+        cursor: Курсор, полученный от encode_link_cursor.
+
+    Returns:
+        Пара (дата создания, ID) последней ссылки предыдущей страницы.
+
+    Raises:
+        HTTPException: 422 если курсор поврежден.
+    """
+    try:
+        key = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8")
+        created_at, link_id = key.rsplit(",", 1)
+        return datetime.fromisoformat(created_at), int(link_id)
+    except (ValueError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Invalid cursor."
+        )
+
+@timed(DB_QUERY_DURATION)
+async def stream_links_by_owner(
+    session: AsyncSession,
+    owner: str,
+    after: tuple[datetime, int] | None = None,
+    limit: int | None = None
+) -> AsyncScalarResult[Link]:
+    """
+    Открывает серверный курсор по ссылкам пользователя.
+
+    Ссылки упорядочены по (created_at, id) и выбираются по ключу
+    (keyset) после переданной позиции, поэтому глубина страницы не влияет
+    на стоимость запроса. Строки получаются из курсора пачками по
+    USER_LINKS_STREAM_BATCH_SIZE и не накапливаются в памяти.
+
+    Args:
+        session: Асинхронная сессия базы данных.
+        owner: Имя пользователя-владельца.
+        after: Пара (created_at, id), после которой начинается выборка (опционально).
+        limit: Максимальное число ссылок (опционально).
+
+    Returns:
+        Асинхронный итератор по объектам Link; курсор закрывается
+        после полного прохода или вместе с сессией.
+    """
+    query = (select(Link)
+             .where(Link.owner == owner)
+             .order_by(Link.created_at, Link.id)
+             .execution_options(yield_per=settings.USER_LINKS_STREAM_BATCH_SIZE))
+    if after is not None:
+        query = query.where(tuple_(Link.created_at, Link.id) > tuple_(*after))
+    if limit is not None:
+        query = query.limit(limit)
+    return await session.stream_scalars(query)
 
 async def get_link_exists_by_code(session: AsyncSession, short_code: str) -> Link:
     """
@@ -173,10 +448,7 @@ async def get_link_exists_by_code(session: AsyncSession, short_code: str) -> Lin
     """
     link = await select_by_code(short_code, session)
     if link is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="This link doesn't exist."
-        )
+        raise link_not_found_exception
     return link
 
 async def get_link_exists_by_link(session: AsyncSession, link: str) -> Link:
@@ -195,10 +467,7 @@ async def get_link_exists_by_link(session: AsyncSession, link: str) -> Link:
     """
     link = await select_by_link(link, session)
     if link is None:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="This link doesn't exist."
-        )
+        raise link_not_found_exception
     return link
 
 async def get_user_link(
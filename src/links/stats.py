@@ -0,0 +1,67 @@
+from src.cache import SingleFlight
+from src.links.cache import get_cached_link_data, set_cached_link_data
+from src.links.hits import hit_buffer
+from src.links.redirect import select_link
+from src.links.schemas import LinkData
+from src.links.service import link_not_found_exception
+
+
+link_data_flight = SingleFlight()
+
+async def load_link_data(short_code: str) -> LinkData:
+    """
+    Загружает данные ссылки из базы данных и кэширует их в Redis.
+
+    Ссылка ищется так же, как при переходе (select_link): на реплике, а
+    если ее там еще нет, на основном сервере. Сессии собственные, так как
+    загрузка может пережить запрос, который ее начал, и ее результат
+    получают все одновременные запросы того же кода.
+
+    Args:
+        short_code: Код сокращенной ссылки.
+
+    Returns:
+        Данные ссылки с usage_count из базы данных.
+
+    Raises:
+        HTTPException: 404 если ссылка не найдена.
+    """
+    link = await select_link(short_code)
+    if link is None:
+        raise link_not_found_exception
+    data = LinkData(
+        link=link.link,
+        code=link.code,
+        created_at=link.created_at,
+        usage_count=link.usage_count,
+        updated_at=link.updated_at
+    )
+    await set_cached_link_data(short_code, data.model_dump_json())
+    return data
+
+async def get_link_data(short_code: str) -> LinkData:
+    """
+    Возвращает данные ссылки для статистики с учетом еще не перенесенных переходов.
+
+    Данные ссылки берутся из Redis, а при промахе загружаются из базы
+    данных; одновременные промахи по одному коду в процессе объединяются
+    в одну загрузку. К usage_count прибавляются переходы, которые еще
+    находятся в "link_stats", во временном ключе переноса и в буфере
+    переходов процесса.
+
+    Args:
+        short_code: Код сокращенной ссылки.
+
+    Returns:
+        Данные ссылки.
+
+    Raises:
+        HTTPException: 404 если ссылка не найдена.
+    """
+    cached, pending = await get_cached_link_data(short_code)
+    if cached is not None:
+        data = LinkData.model_validate_json(cached)
+    else:
+        data = await link_data_flight.run(short_code, lambda: load_link_data(short_code))
+    pending += hit_buffer.counts.get(short_code, 0)
+    return data.model_copy(update={"usage_count": data.usage_count + pending})
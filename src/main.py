@@ -1,14 +1,57 @@
-import redis
+import asyncio
 
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 
+from src.cache import listen_invalidations
+from src.database import close_redis, dispose_engines, warm_up
+from src.links.hits import hit_buffer
 from src.users.auth import router as auth_router
+from src.users.service import password_executor
 from src.users.router import router as user_router
-from src.links.router import router as link_router
+from src.links.router import router as link_router, redirect_to_original_link
+from src.links.redirect import RedirectMiddleware
+from src.monitoring.router import router as monitoring_router
+from src.monitoring.metrics import MetricsMiddleware, metrics_endpoint
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Управляет жизненным циклом ресурсов приложения.
+
+    При запуске прогревает пулы соединений с PostgreSQL и Redis. На время
+    работы запускает прослушивание каналов инвалидации локальных кэшей и
+    сброс буфера переходов. При остановке переносит остаток буфера в Redis,
+    закрывает пулы соединений с Redis и PostgreSQL и пул потоков
+    хеширования паролей.
+    """
+    await warm_up()
+    tasks = [asyncio.create_task(listen_invalidations()),
+             asyncio.create_task(hit_buffer.run())]
+    yield
+    for task in tasks:
+        task.cancel()
+    for task in tasks:
+        with suppress(asyncio.CancelledError):
+            await task
+    await hit_buffer.flush()
+    await close_redis()
+    await dispose_engines()
+    password_executor.shutdown(wait=False)
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_api_route("/metrics", metrics_endpoint, include_in_schema=False)
 
 app.include_router(auth_router)
 app.include_router(user_router)
 app.include_router(link_router)
+app.include_router(monitoring_router)
+
+# Переходы обслуживаются до маршрутизации FastAPI; MetricsMiddleware
+# добавляется последним, чтобы учитывать и их.
+redirect_route = next(route for route in app.routes
+                      if getattr(route, "endpoint", None) is redirect_to_original_link)
+app.add_middleware(RedirectMiddleware, route=redirect_route)
+app.add_middleware(MetricsMiddleware)
@@ -10,6 +10,7 @@ sys.path.insert(0, dirname(dirname(abspath(__file__))))
 
 from src.database import Base
 from src.config import settings
+from src.analytics.models import *
 from src.archive.models import *
 from src.links.models import *
 from src.users.models import *
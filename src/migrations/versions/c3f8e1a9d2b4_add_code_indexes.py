@@ -0,0 +1,68 @@
+"""add code indexes
+
+Revision ID: c3f8e1a9d2b4
+Revises: a2ae9ab530b4
+Create Date: 2026-10-18 09:20:41.118302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f8e1a9d2b4'
+down_revision: Union[str, None] = 'a2ae9ab530b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+INDEXES = ['ix_links_code', 'ix_archivedlinks_code', 'ix_archivedlinks_owner']
+
+
+def check_duplicate_codes() -> None:
+    duplicates = op.get_bind().scalars(sa.text(
+        "SELECT code FROM links WHERE code IS NOT NULL "
+        "GROUP BY code HAVING count(*) > 1 LIMIT 10"
+    )).all()
+    if duplicates:
+        raise RuntimeError(f"links.code has duplicate values ({', '.join(duplicates)}), "
+                           "resolve them before creating the unique index ix_links_code")
+
+
+def drop_invalid_indexes() -> None:
+    # Прерванный CREATE INDEX CONCURRENTLY оставляет невалидный индекс,
+    # из-за которого повторная миграция падала бы с ошибкой.
+    invalid = op.get_bind().scalars(sa.text(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE NOT i.indisvalid AND c.relname = ANY(:names)"
+    ), {"names": INDEXES}).all()
+    for name in invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    # Индексы строятся с CONCURRENTLY, чтобы не блокировать запись в links
+    # на время построения; такой индекс нельзя создать внутри транзакции.
+    check_duplicate_codes()
+    with op.get_context().autocommit_block():
+        drop_invalid_indexes()
+        op.create_index('ix_links_code', 'links', ['code'], unique=True,
+                        postgresql_where=sa.text('code IS NOT NULL'),
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_archivedlinks_code', 'archivedlinks', ['code'],
+                        postgresql_concurrently=True, if_not_exists=True)
+        op.create_index('ix_archivedlinks_owner', 'archivedlinks', ['owner'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_archivedlinks_owner', table_name='archivedlinks',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_archivedlinks_code', table_name='archivedlinks',
+                      postgresql_concurrently=True)
+        op.drop_index('ix_links_code', table_name='links',
+                      postgresql_where=sa.text('code IS NOT NULL'),
+                      postgresql_concurrently=True)
@@ -0,0 +1,44 @@
+"""add click analytics
+
+Revision ID: d5a7c2e4f1b3
+Revises: c3f8e1a9d2b4
+Create Date: 2026-10-18 10:05:12.406217
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a7c2e4f1b3'
+down_revision: Union[str, None] = 'c3f8e1a9d2b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Секции clickevents по месяцам создает consume_click_events
+    # (src.analytics.service.create_click_partitions) перед записью событий.
+    op.create_table('clickevents',
+    sa.Column('event_id', sa.String(), nullable=False),
+    sa.Column('clicked_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('code', sa.String(), nullable=False),
+    sa.Column('referrer', sa.String(), nullable=True),
+    sa.Column('user_agent_hash', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('event_id', 'clicked_at'),
+    postgresql_partition_by='RANGE (clicked_at)'
+    )
+    op.create_table('clickrollups',
+    sa.Column('code', sa.String(), nullable=False),
+    sa.Column('granularity', sa.String(), nullable=False),
+    sa.Column('bucket', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('clicks', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('code', 'granularity', 'bucket')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('clickrollups')
+    op.drop_table('clickevents')
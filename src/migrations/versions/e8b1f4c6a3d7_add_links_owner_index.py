@@ -0,0 +1,44 @@
+"""add links owner index
+
+Revision ID: e8b1f4c6a3d7
+Revises: d5a7c2e4f1b3
+Create Date: 2026-10-18 11:42:08.913540
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b1f4c6a3d7'
+down_revision: Union[str, None] = 'd5a7c2e4f1b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def drop_invalid_index(name: str) -> None:
+    # Как и в c3f8e1a9d2b4: невалидный остаток прерванного построения
+    # не дал бы повторить миграцию.
+    invalid = op.get_bind().scalar(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE NOT i.indisvalid AND c.relname = :name"
+    ), {"name": name})
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+def upgrade() -> None:
+    # Индекс покрывает фильтр по владельцу и порядок постраничного списка
+    # (created_at, id); строится с CONCURRENTLY, как и индексы кодов.
+    with op.get_context().autocommit_block():
+        drop_invalid_index('ix_links_owner_created_at')
+        op.create_index('ix_links_owner_created_at', 'links', ['owner', 'created_at', 'id'],
+                        postgresql_concurrently=True, if_not_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_links_owner_created_at', table_name='links',
+                      postgresql_concurrently=True)
@@ -0,0 +1,112 @@
+import os
+import time
+
+from functools import wraps
+
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter,
+                               Histogram, generate_latest, multiprocess)
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+# Задержки обращений к базе данных и Redis - единицы миллисекунд,
+# стандартные интервалы гистограммы для них слишком грубые.
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+REQUEST_DURATION = Histogram("http_request_duration_seconds",
+                             "HTTP request latency by route.",
+                             ["method", "route"])
+REDIRECTS = Counter("link_redirects_total",
+                    "Redirects by cache result.",
+                    ["result"])
+DB_QUERY_DURATION = Histogram("db_query_duration_seconds",
+                              "Database query time by service function.",
+                              ["function"],
+                              buckets=FAST_BUCKETS)
+REDIS_DURATION = Histogram("redis_duration_seconds",
+                           "Redis round-trip time by cache operation.",
+                           ["operation"],
+                           buckets=FAST_BUCKETS)
+TASK_DURATION = Histogram("celery_task_duration_seconds",
+                          "Celery task run time.",
+                          ["task"],
+                          buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 300, 600))
+TASK_ROWS = Counter("celery_task_rows_total",
+                    "Rows processed by Celery tasks.",
+                    ["task"])
+
+redirect_hits = REDIRECTS.labels("hit")
+redirect_misses = REDIRECTS.labels("miss")
+redirect_not_found = REDIRECTS.labels("not_found")
+
+def timed(histogram: Histogram):
+    """
+    Декоратор, записывающий время выполнения корутины в гистограмму.
+
+    Метка гистограммы - имя функции. Дочерняя метрика создается один раз
+    при декорировании, поэтому вызов обходится без поиска по меткам.
+
+    Args:
+        histogram: Гистограмма с одной меткой.
+    """
+    def decorator(func):
+        child = histogram.labels(func.__name__)
+
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware, записывающее задержку запросов по шаблонам маршрутов.
+
+    Маршрут берется из scope после обработки запроса, поэтому метка -
+    шаблон пути ("/links/{short_code}"), а не сам путь. Дочерние метрики
+    кэшируются по шаблону и методу.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.children = {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route = scope.get("route")
+            key = (route.path if route is not None else "unmatched", scope["method"])
+            child = self.children.get(key)
+            if child is None:
+                child = self.children[key] = REQUEST_DURATION.labels(key[1], key[0])
+            child.observe(time.perf_counter() - start)
+
+
+def get_registry() -> CollectorRegistry:
+    """
+    Возвращает реестр метрик для выдачи.
+
+    Если задан PROMETHEUS_MULTIPROC_DIR, метрики собираются из файлов всех
+    процессов (воркеров uvicorn или Celery), иначе - из текущего процесса.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+async def metrics_endpoint(request: Request) -> Response:
+    """Отдает метрики в текстовом формате Prometheus."""
+    return Response(generate_latest(get_registry()), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, status
+
+from src.database import engine, read_engine, redis_stats
+from src.links.cache import local_link_cache, code_filter
+from src.monitoring.schemas import CacheStats, CodeFilterStats, DbPoolStats, DbPoolsStats
+
+
+router = APIRouter(prefix='/monitoring', tags=['Monitoring'])
+
+@router.get("/cache/", status_code=status.HTTP_200_OK)
+async def get_cache_stats() -> CacheStats:
+    """
+    Возвращает счетчики локального кэша ссылок текущего процесса.
+
+    Returns:
+        Размер кэша, число попаданий, промахов и вытеснений.
+
+    Notes:
+        - Счетчики свои у каждого воркера
+    """
+    return CacheStats(**local_link_cache.stats())
+
+@router.get("/code-filter/", status_code=status.HTTP_200_OK)
+async def get_code_filter_stats() -> CodeFilterStats:
+    """
+    Возвращает заполненность фильтра Блума кодов и оценку ложных срабатываний.
+
+    Returns:
+        Размер и память фильтра, число выставленных битов и оценка доли
+        ложных срабатываний.
+    """
+    return CodeFilterStats(**await code_filter.info(redis_stats))
+
+@router.get("/db-pool/", status_code=status.HTTP_200_OK)
+async def get_db_pool_stats() -> DbPoolsStats:
+    """
+    Возвращает загрузку пулов соединений с базой данных текущего процесса.
+
+    Returns:
+        Число выданных, свободных и дополнительных соединений и статистика
+        ожидания соединений для основного сервера и реплики.
+
+    Notes:
+        - Счетчики свои у каждого воркера
+    """
+    replica = None
+    if read_engine is not engine:
+        replica = DbPoolStats(**read_engine.pool.stats())
+    return DbPoolsStats(primary=DbPoolStats(**engine.pool.stats()), replica=replica)
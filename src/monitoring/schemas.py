@@ -0,0 +1,76 @@
+from pydantic import BaseModel
+
+
+class CacheStats(BaseModel):
+    """
+    Счетчики локального кэша процесса.
+
+    Attributes:
+        size: Текущее число записей.
+        maxsize: Максимальное число записей.
+        hits: Число попаданий.
+        misses: Число промахов.
+        evictions: Число записей, вытесненных из-за переполнения.
+    """
+    size: int
+    maxsize: int
+    hits: int
+    misses: int
+    evictions: int
+
+
+class CodeFilterStats(BaseModel):
+    """
+    Состояние фильтра Блума существующих кодов.
+
+    Attributes:
+        size_bits: Размер фильтра в битах.
+        hashes: Число хеш-функций.
+        memory_bytes: Память, занимаемая фильтром в Redis.
+        bits_set: Число выставленных битов.
+        false_positive_rate: Оценка доли ложных срабатываний при текущей
+            заполненности фильтра.
+    """
+    size_bits: int
+    hashes: int
+    memory_bytes: int
+    bits_set: int
+    false_positive_rate: float
+
+
+class DbPoolStats(BaseModel):
+    """
+    Загрузка пула соединений с базой данных.
+
+    Attributes:
+        size: Число постоянных соединений.
+        max_overflow: Допустимое число дополнительных соединений.
+        checked_in: Число свободных соединений в пуле.
+        checked_out: Число выданных соединений.
+        overflow: Число открытых дополнительных соединений.
+        waits: Число выдач соединения из пула.
+        wait_time_total: Суммарное время ожидания соединения в секундах.
+        wait_time_max: Максимальное время ожидания соединения в секундах.
+        timeouts: Число отказов по истечении времени ожидания.
+    """
+    size: int
+    max_overflow: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    waits: int
+    wait_time_total: float
+    wait_time_max: float
+    timeouts: int
+
+
+class DbPoolsStats(BaseModel):
+    """
+    Загрузка пулов соединений основного сервера и реплики.
+
+    Attributes:
+        primary: Пул основного сервера.
+        replica: Пул реплики или None, если реплика не задана.
+    """
+    primary: DbPoolStats
+    replica: DbPoolStats | None
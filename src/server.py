@@ -0,0 +1,43 @@
+"""
+Запуск приложения в рабочем режиме.
+
+Несколько процессов uvicorn (WEB_WORKERS, по умолчанию по числу ядер)
+с циклом событий uvloop и HTTP-парсером httptools:
+
+    python -m src.server
+
+Для сбора метрик со всех процессов нужно задать PROMETHEUS_MULTIPROC_DIR
+(пустой каталог, очищаемый перед запуском). Журнал доступа отключен:
+запросы учитываются метриками.
+"""
+import os
+import uvicorn
+
+from src.config import settings
+
+
+def get_workers() -> int:
+    """Возвращает число процессов сервера: WEB_WORKERS или число доступных ядер."""
+    if settings.WEB_WORKERS:
+        return settings.WEB_WORKERS
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+def main() -> None:
+    uvicorn.run(
+        "src.main:app",
+        host=settings.WEB_BIND_HOST,
+        port=settings.FASTAPI_PORT,
+        workers=get_workers(),
+        loop="uvloop",
+        http="httptools",
+        timeout_keep_alive=settings.WEB_KEEP_ALIVE,
+        timeout_graceful_shutdown=settings.WEB_GRACEFUL_SHUTDOWN,
+        proxy_headers=True,
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
+import os
+
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import worker_init, worker_process_shutdown
+from prometheus_client import start_http_server, multiprocess
 from src.config import settings
+from src.monitoring.metrics import get_registry
 
 app = Celery(
     "worker",
@@ -24,8 +29,36 @@ app.conf.beat_schedule = {
     "update-stats-every-five-minute": {
         "task": "src.tasks.tasks.update_stats_task",
         "schedule": crontab(minute=f"*/{settings.UPDATE_STATS_TIME}"),
+    },
+    "rebuild-code-filter-every-hour": {
+        "task": "src.tasks.tasks.rebuild_code_filter_task",
+        "schedule": crontab(minute=f"*/{settings.REBUILD_CODE_FILTER_TIME}"),
+    },
+    "refill-code-pool-every-minute": {
+        "task": "src.tasks.tasks.refill_code_pool_task",
+        "schedule": crontab(minute=f"*/{settings.REFILL_CODE_POOL_TIME}"),
+    },
+    "consume-click-events-every-minute": {
+        "task": "src.tasks.tasks.consume_click_events_task",
+        "schedule": crontab(minute=f"*/{settings.CONSUME_CLICK_EVENTS_TIME}"),
     }
 }
 
+@worker_init.connect
+def start_metrics_server(**kwargs):
+    """
+    Запускает HTTP-сервер метрик в главном процессе воркера.
+
+    Дочерние процессы prefork-пула пишут метрики в PROMETHEUS_MULTIPROC_DIR,
+    сервер отдает их суммарно.
+    """
+    if settings.CELERY_METRICS_PORT:
+        start_http_server(settings.CELERY_METRICS_PORT, registry=get_registry())
+
+@worker_process_shutdown.connect
+def mark_metrics_process_dead(pid=None, **kwargs):
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(pid or os.getpid())
+
 if __name__ == '__main__':
     app.start()
\ No newline at end of file
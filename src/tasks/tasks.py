@@ -1,54 +1,117 @@
+import os
+import socket
+import uuid
 import logging
 import asyncio
 
-from datetime import datetime
+from datetime import datetime, timedelta
 from celery import shared_task
-from sqlalchemy import select, delete, insert
+from redis.exceptions import ResponseError
+from sqlalchemy import select, delete, insert, literal
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.database import get_async_session, redis_stats
 from src.links.models import Link
-from src.links.service import get_link_exists_by_code, update_link
+from src.links.service import increment_usage_counts, select_existing_codes
+from src.links.pool import generate_random_codes, get_code_pool_size, push_pooled_codes
+from src.links.cache import (LINK_STATS_KEY, LINK_STATS_FLUSHING_KEY, invalidate_links,
+                             delete_cached_link_data, code_filter, acquire_stats_lock,
+                             extend_stats_lock, release_stats_lock)
+from src.monitoring.metrics import TASK_DURATION, TASK_ROWS, timed
 from src.archive.models import ArchivedLink
-from src.config import timezone
+from src.analytics.service import insert_click_events
+from src.analytics.stream import (create_click_group, claim_click_events, read_click_events,
+                                  ack_click_events, parse_click_event)
+from src.config import settings, timezone
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_SIZE = 5000
+STATS_BATCH_SIZE = 5000
+CODE_FILTER_REBUILD_MARGIN = timedelta(minutes=1)
+CODE_FILTER_BATCH_SIZE = 10000
+CODE_POOL_BATCH_SIZE = 10000
+CLICK_EVENTS_BATCH_SIZE = 5000
+CLICK_EVENTS_CLAIM_IDLE_MS = 5 * 60 * 1000
+
+archived_rows = TASK_ROWS.labels("clean_up_expired_links")
+updated_rows = TASK_ROWS.labels("update_stats")
+click_event_rows = TASK_ROWS.labels("consume_click_events")
     
+async def archive_expired_links(session: AsyncSession, now: datetime) -> list[str]:
+    """
+    Переносит в архив одну пачку просроченных ссылок.
+
+    Выполняет одним запросом:
+    WITH expired AS (SELECT id ... LIMIT n FOR UPDATE SKIP LOCKED),
+    moved AS (DELETE FROM links ... RETURNING ...)
+    INSERT INTO archivedlinks SELECT ... FROM moved RETURNING code.
+    Благодаря SKIP LOCKED несколько воркеров могут выполнять очистку
+    одновременно, не блокируя друг друга.
+
+    Args:
+        session: Асинхронная сессия базы данных.
+        now: Момент, относительно которого ссылки считаются просроченными.
+
+    Returns:
+        Коды перенесенных в архив ссылок.
+    """
+    expired = (select(Link.id)
+               .where(Link.expires_at < now)
+               .limit(ARCHIVE_BATCH_SIZE)
+               .with_for_update(skip_locked=True)
+               .cte("expired"))
+    moved = (delete(Link)
+             .where(Link.id.in_(select(expired.c.id)))
+             .returning(Link.owner, Link.link, Link.code, Link.created_at, Link.usage_count)
+             .cte("moved"))
+    statement = (insert(ArchivedLink)
+                 .from_select(["owner", "link", "code", "created_at", "deleted_at", "usage_count"],
+                              select(moved.c.owner,
+                                     moved.c.link,
+                                     moved.c.code,
+                                     moved.c.created_at,
+                                     literal(now),
+                                     moved.c.usage_count))
+                 .returning(ArchivedLink.code))
+    result = await session.scalars(statement)
+    codes = result.all()
+    await session.commit()
+    return codes
+
+@timed(TASK_DURATION)
 async def clean_up_expired_links():
     """
     Очищает просроченные ссылки, перенося их в архив и удаляя из активных.
 
-    Находит ссылки с истекшим сроком действия (expires_at), переносит их
-    в таблицу архивных ссылок и удаляет из основной таблицы. Возвращает
-    словарь с очищенными ссылками или сообщение, если просроченных нет.
+    Переносит ссылки с истекшим сроком действия (expires_at) в таблицу
+    архивных ссылок пачками по ARCHIVE_BATCH_SIZE, пока они не закончатся,
+    и удаляет коды каждой пачки из кэша.
 
     Возвращает:
-        dict: Словарь с архивными ссылками или сообщение об отсутствии.
+        dict: Число архивных ссылок или сообщение об отсутствии просроченных.
     """
+    archived = 0
+    now = datetime.now(timezone)
     async for session in get_async_session():
-        query = select(Link).where(Link.expires_at < datetime.now(timezone))
-        result = await session.execute(query)
-        
-        for item in result.scalars():
-            values_dict = {
-                "owner": item.owner, 
-                "link": item.link,
-                "code": item.code,
-                "created_at": item.created_at,
-                "deleted_at": datetime.now(timezone),
-                "usage_count": item.usage_count
-            }
-            
+        while True:
             try:
-                await session.execute(insert(ArchivedLink).values(values_dict))
-                await session.execute(delete(Link).where(Link.id == item.id))
-                await session.commit()
-                logger.info(f"Link {item.code} archived and deleted successfully.")
+                codes = await archive_expired_links(session, now)
             except Exception as e:
-                logger.error(f"Error processing link {item.code}: {e}")
+                logger.error(f"Error archiving expired links: {e}")
                 await session.rollback()
-        return {'expired links': [item.link for item in result.scalars().fetchall()]} or {'message': 'No expired links to clean up.'}
+                break
+            await invalidate_links(*codes)
+            archived += len(codes)
+            archived_rows.inc(len(codes))
+            if len(codes) < ARCHIVE_BATCH_SIZE:
+                break
+    if not archived:
+        return {'message': 'No expired links to clean up.'}
+    logger.info(f"{archived} expired links archived and deleted successfully.")
+    return {'archived links': archived}
 
 @shared_task(name='src.tasks.tasks.cleanup_expired_links_task')
 def cleanup_expired_links_task():
@@ -60,35 +123,57 @@ def cleanup_expired_links_task():
     loop = asyncio.get_event_loop()
     loop.run_until_complete(clean_up_expired_links())
     
+@timed(TASK_DURATION)
 async def update_stats():
     """
     Обновляет статистику использования ссылок из Redis в БД.
 
-    Переносит накопленные данные об использовании ссылок из Redis
-    в основную базу данных, увеличивая счетчики usage_count,
-    после чего очищает кэш в Redis.
+    Атомарно переименовывает "link_stats" во временный ключ, чтобы новые
+    переходы копились в новом множестве и не терялись при очистке. Затем
+    переносит счетчики пачками по STATS_BATCH_SIZE: каждая пачка
+    применяется одним UPDATE ... FROM (VALUES ...) и удаляется из
+    временного ключа после коммита, а закэшированные данные этих ссылок
+    для статистики сбрасываются. Если прошлый перенос прервался,
+    сначала дообрабатывается оставшийся временный ключ.
+
+    Запуски, которые не уложились в UPDATE_STATS_TIME, не должны
+    перекрываться: оба прочитали бы одну и ту же пачку и применили ее
+    дважды. Поэтому перенос выполняется под блокировкой в Redis, которая
+    продлевается перед каждой пачкой; если блокировка потеряна, перенос
+    останавливается, а остаток дообработает следующий запуск.
 
     Возвращает:
-        dict: Статистику из кэша или сообщение об отсутствии данных.
+        dict: Число обновленных ссылок или сообщение об отсутствии данных.
     """
-    async for session in get_async_session():
-        stats = redis_stats.zrange("link_stats", 0, -1, withscores=True)
-        print(stats)
-        if stats:
-            for short_code, count in stats:
-                link = await get_link_exists_by_code(session, short_code.decode('utf-8'))
-                if link:
-                    values = {
-                        "updated_at": datetime.now(),
-                        "usage_count": link.usage_count + int(count)
-                    }
-                    await update_link(session, link.id, values)
-            
-            redis_stats.delete("link_stats")
-    return {'cached links stats:': stats} or {'message': 'No stats to update.'}
+    token = uuid.uuid4().hex
+    if not await acquire_stats_lock(token):
+        return {'message': 'Stats update is already running.'}
+    try:
+        if not await redis_stats.exists(LINK_STATS_FLUSHING_KEY):
+            try:
+                await redis_stats.rename(LINK_STATS_KEY, LINK_STATS_FLUSHING_KEY)
+            except ResponseError:
+                return {'message': 'No stats to update.'}
+        updated = 0
+        async for session in get_async_session():
+            while stats := await redis_stats.zrange(LINK_STATS_FLUSHING_KEY, 0,
+                                                    STATS_BATCH_SIZE - 1, withscores=True):
+                if not await extend_stats_lock(token):
+                    logger.warning("Stats update lock lost, stopping.")
+                    break
+                counts = {short_code.decode('utf-8'): int(count) for short_code, count in stats}
+                rows = await increment_usage_counts(session, counts)
+                updated += rows
+                updated_rows.inc(rows)
+                await redis_stats.zrem(LINK_STATS_FLUSHING_KEY, *counts)
+                await delete_cached_link_data(*counts)
+    finally:
+        await release_stats_lock(token)
+    logger.info(f"Usage stats of {updated} links updated.")
+    return {'updated links': updated}
 
 @shared_task(name='src.tasks.tasks.update_stats_task')
-def cleanup_expired_links_task():
+def update_stats_task():
     """
     Celery-задача для синхронного вызова update_stats.
     
@@ -96,3 +181,125 @@ def cleanup_expired_links_task():
     """
     loop = asyncio.get_event_loop()
     loop.run_until_complete(update_stats())
+
+@timed(TASK_DURATION)
+async def rebuild_code_filter():
+    """
+    Перестраивает фильтр Блума кодов по таблице ссылок.
+
+    Фильтр не поддерживает удаление, поэтому коды удаленных ссылок
+    копятся в нем до следующего перестроения. Коды ссылок, созданных во
+    время перестроения, после подмены фильтра добавляются в него повторно,
+    чтобы не получить ложноотрицательных ответов.
+
+    Возвращает:
+        dict: Число кодов в новом фильтре.
+    """
+    async for session in get_async_session():
+        started_at = datetime.now(timezone) - CODE_FILTER_REBUILD_MARGIN
+
+        async def batches():
+            result = await session.stream_scalars(
+                select(Link.code)
+                .where(Link.code.isnot(None))
+                .execution_options(yield_per=CODE_FILTER_BATCH_SIZE)
+            )
+            async for partition in result.partitions():
+                yield list(partition)
+
+        count = await code_filter.rebuild(redis_stats, batches())
+        recent = await session.scalars(
+            select(Link.code).where(Link.code.isnot(None), Link.created_at >= started_at)
+        )
+        await code_filter.add(redis_stats, *recent.all())
+    logger.info(f"Code filter rebuilt with {count} codes.")
+    return {'codes': count}
+
+@shared_task(name='src.tasks.tasks.rebuild_code_filter_task')
+def rebuild_code_filter_task():
+    """
+    Celery-задача для синхронного вызова rebuild_code_filter.
+    
+    Создает event loop и запускает асинхронное перестроение фильтра.
+    """
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(rebuild_code_filter())
+
+@timed(TASK_DURATION)
+async def refill_code_pool():
+    """
+    Пополняет пул кодов в Redis до CODE_POOL_SIZE.
+
+    Случайные коды генерируются пачками по CODE_POOL_BATCH_SIZE, коды,
+    уже занятые ссылками, отсеиваются одним запросом на пачку.
+
+    Возвращает:
+        dict: Число добавленных кодов или сообщение о выключенном пуле.
+    """
+    if not settings.CODE_POOL_ENABLED:
+        return {'message': 'Code pool is disabled.'}
+    added = 0
+    missing = settings.CODE_POOL_SIZE - await get_code_pool_size()
+    async for session in get_async_session():
+        while missing > 0:
+            codes = generate_random_codes(min(missing, CODE_POOL_BATCH_SIZE))
+            codes -= await select_existing_codes(list(codes), session)
+            await push_pooled_codes(*codes)
+            added += len(codes)
+            missing -= len(codes)
+    logger.info(f"{added} codes added to the code pool.")
+    return {'added codes': added}
+
+@shared_task(name='src.tasks.tasks.refill_code_pool_task')
+def refill_code_pool_task():
+    """
+    Celery-задача для синхронного вызова refill_code_pool.
+    
+    Создает event loop и запускает асинхронное пополнение пула кодов.
+    """
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(refill_code_pool())
+
+@timed(TASK_DURATION)
+async def consume_click_events():
+    """
+    Переносит события переходов из потока Redis в базу данных.
+
+    События читаются группой потребителей пачками по CLICK_EVENTS_BATCH_SIZE,
+    пока поток не опустеет. Каждая пачка записывается одной транзакцией
+    вместе со сводками и только после этого подтверждается (XACK). Сначала
+    забираются события, которые дольше CLICK_EVENTS_CLAIM_IDLE_MS назад
+    прочитал и не подтвердил другой, например упавший, воркер.
+
+    Возвращает:
+        dict: Число записанных событий.
+    """
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    await create_click_group()
+    stored = 0
+    async for session in get_async_session():
+        entries = await claim_click_events(consumer, CLICK_EVENTS_CLAIM_IDLE_MS,
+                                           CLICK_EVENTS_BATCH_SIZE)
+        while True:
+            if not entries:
+                entries = await read_click_events(consumer, CLICK_EVENTS_BATCH_SIZE)
+                if not entries:
+                    break
+            events = [parse_click_event(event_id, fields) for event_id, fields in entries]
+            rows = await insert_click_events(session, events)
+            await ack_click_events(*(event_id for event_id, _ in entries))
+            stored += rows
+            click_event_rows.inc(rows)
+            entries = []
+    logger.info(f"{stored} click events stored.")
+    return {'click events': stored}
+
+@shared_task(name='src.tasks.tasks.consume_click_events_task')
+def consume_click_events_task():
+    """
+    Celery-задача для синхронного вызова consume_click_events.
+    
+    Создает event loop и запускает асинхронный перенос событий переходов.
+    """
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(consume_click_events())
@@ -5,8 +5,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
 from src.users.schemas import RegUser, Token
-from src.database import get_async_session
-from src.users.service import (get_password_hash,
+from src.database import get_lazy_session
+from src.users.service import (get_password_hash_async,
                                get_user,
                                authenticate_user,
                                create_access_token,
@@ -20,7 +20,7 @@ router = APIRouter(prefix='/auth', tags=['Auth'])
 @router.post("/register/", status_code=status.HTTP_201_CREATED)
 async def register_user(
     user_data: RegUser, 
-    session: AsyncSession = Depends(get_async_session)
+    session: AsyncSession = Depends(get_lazy_session)
 ) -> Message:
     user_dict = user_data.model_dump()
     user = await get_user(user_dict['username'], session)
@@ -30,14 +30,14 @@ async def register_user(
             detail='This user already exists.'
         )
     await insert_user(user_dict['username'], 
-                      get_password_hash(user_dict['password']),
+                      await get_password_hash_async(user_dict['password']),
                       session)
     return Message(message="Registration completed!")
 
 @router.post("/token")
 async def login_for_access_token(
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-    session: AsyncSession = Depends(get_async_session),
+    session: AsyncSession = Depends(get_lazy_session),
 ) -> Token:
     user = await authenticate_user(form_data.username, 
                                    form_data.password,
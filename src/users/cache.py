@@ -0,0 +1,7 @@
+from src.cache import LocalCache
+from src.config import settings
+
+
+# Изменение disabled вступает в силу не позже чем через USER_CACHE_EXPIRATION секунд.
+local_user_cache = LocalCache(maxsize=settings.USER_CACHE_SIZE,
+                              ttl=settings.USER_CACHE_EXPIRATION)
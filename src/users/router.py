@@ -1,6 +1,12 @@
-from typing import Annotated
-from fastapi import APIRouter, Depends
+from typing import Annotated, AsyncIterator, Optional
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.config import settings
+from src.database import get_lazy_read_session, read_session_maker
+from src.links.schemas import LinkData, LinkPage
+from src.links.service import decode_link_cursor, encode_link_cursor, stream_links_by_owner
 from src.users.schemas import UserData
 from src.users.service import get_current_active_user
 
@@ -10,4 +16,54 @@ router = APIRouter(prefix='/user', tags=['User'])
 async def read_users_me(
     current_user: Annotated[UserData, Depends(get_current_active_user)],
 ):
-    return current_user
\ No newline at end of file
+    return current_user
+
+@router.get("/me/links", response_model=LinkPage)
+async def read_users_me_links(
+    request: Request,
+    current_user: Annotated[UserData, Depends(get_current_active_user)],
+    cursor: Optional[str] = None,
+    limit: int = Query(settings.USER_LINKS_PAGE_SIZE, ge=1, le=settings.USER_LINKS_MAX_PAGE_SIZE),
+    session: AsyncSession = Depends(get_lazy_read_session)
+):
+    """
+    Возвращает ссылки текущего пользователя в порядке создания.
+
+    Args:
+        request: HTTP-запрос (заголовок Accept выбирает формат ответа).
+        current_user: Данные текущего пользователя.
+        cursor: Курсор из next_cursor предыдущей страницы (опционально).
+        limit: Размер страницы.
+        session: Асинхронная сессия SQLAlchemy (реплики, если она задана).
+
+    Returns:
+        Страница LinkPage или, если клиент принимает application/x-ndjson,
+        поток NDJSON со всеми ссылками после курсора (limit не применяется).
+
+    Raises:
+        HTTPException: 422 если курсор поврежден.
+
+    Notes:
+        - Страницы выбираются по ключу (created_at, id), а не через OFFSET
+        - Поток читается из серверного курсора в отдельной сессии, так как
+          сессия зависимости закрывается до отправки тела ответа
+    """
+    owner = current_user.model_dump()['username']
+    after = decode_link_cursor(cursor) if cursor else None
+
+    if "application/x-ndjson" in request.headers.get("accept", ""):
+        async def export() -> AsyncIterator[str]:
+            async with read_session_maker() as export_session:
+                links = await stream_links_by_owner(export_session, owner, after)
+                async for link in links:
+                    yield LinkData.model_validate(link, from_attributes=True).model_dump_json() + "\n"
+
+        return StreamingResponse(export(), media_type="application/x-ndjson")
+
+    links = await stream_links_by_owner(session, owner, after, limit + 1)
+    page = [link async for link in links]
+    next_cursor = encode_link_cursor(page[limit - 1]) if len(page) > limit else None
+    return LinkPage(
+        links=[LinkData.model_validate(link, from_attributes=True) for link in page[:limit]],
+        next_cursor=next_cursor
+    )
@@ -1,5 +1,7 @@
 import jwt
+import asyncio
 
+from concurrent.futures import ThreadPoolExecutor
 from jwt.exceptions import InvalidTokenError
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, insert
@@ -11,7 +13,8 @@ from datetime import datetime, timedelta, timezone
 from src.config import pwd_context, settings
 from src.users.models import User
 from src.users.schemas import TokenData, UserData
-from src.database import get_async_session
+from src.database import get_lazy_session
+from src.users.cache import local_user_cache
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
@@ -22,12 +25,36 @@ credentials_exception = HTTPException(
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+password_overload_exception = HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many password checks in progress, try again later.",
+        headers={"Retry-After": "1"},
+    )
+
+# bcrypt отпускает GIL, поэтому хеширование в потоках не блокирует event loop.
+password_executor = ThreadPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS,
+                                       thread_name_prefix="password")
+password_jobs = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+async def run_password_job(func, *args):
+    if password_jobs.locked():
+        raise password_overload_exception
+    async with password_jobs:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(password_executor, func, *args)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await run_password_job(get_password_hash, password)
+
 async def get_user(username: str, session: AsyncSession) -> (User | None):
     query = select(User).where(User.username == username)
     result = await session.execute(query)
@@ -37,7 +64,7 @@ async def authenticate_user(username: str, password: str, session: AsyncSession)
     user = await get_user(username, session)
     if user is None:
         return False
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return False
     return user
 
@@ -51,7 +78,10 @@ def create_access_token(data: dict, expires_delta: timedelta | None = None) -> s
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> (UserData | None):
+async def get_current_user(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    session: AsyncSession = Depends(get_lazy_session)
+) -> (UserData | None):
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         username = payload.get("sub")
@@ -60,11 +90,15 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_scheme)]) -> (Us
         token_data = TokenData(username=username)
     except InvalidTokenError:
         return None
-    async for session in get_async_session():
-        user = await get_user(username=token_data.username, session=session)
+    user_data = local_user_cache.get(token_data.username)
+    if user_data is not None:
+        return user_data
+    user = await get_user(username=token_data.username, session=session)
     if user is None:
         raise credentials_exception
-    return UserData(username=user.username, disabled=user.disabled)
+    user_data = UserData(username=user.username, disabled=user.disabled)
+    local_user_cache.set(user.username, user_data)
+    return user_data
 
 async def get_current_active_user(
     current_user: Annotated[UserData, Depends(get_current_user)],
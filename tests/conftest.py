@@ -1,4 +1,6 @@
 import os
+import importlib
+import fakeredis
 import pytest_asyncio
 
 from dotenv import load_dotenv
@@ -35,3 +37,25 @@ async def db_session(db_engine):
         await session.close()
         await transaction.rollback()
         await connection.close()
+
+REDIS_MODULES = ["src.database", "src.cache", "src.analytics.stream", "src.links.cache",
+                 "src.links.hits", "src.links.pool", "src.links.router", "src.monitoring.router",
+                 "src.tasks.tasks"]
+
+@pytest_asyncio.fixture
+async def fake_redis(monkeypatch):
+    server = fakeredis.FakeServer()
+    cache = fakeredis.FakeAsyncRedis(server=server, db=0)
+    stats = fakeredis.FakeAsyncRedis(server=server, db=1)
+    for name in REDIS_MODULES:
+        module = importlib.import_module(name)
+        if hasattr(module, "redis_cache"):
+            monkeypatch.setattr(module, "redis_cache", cache)
+        if hasattr(module, "redis_stats"):
+            monkeypatch.setattr(module, "redis_stats", stats)
+    local_link_cache = importlib.import_module("src.links.cache").local_link_cache
+    local_link_cache.clear()
+    yield cache, stats
+    local_link_cache.clear()
+    await cache.aclose()
+    await stats.aclose()
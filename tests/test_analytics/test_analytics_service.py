@@ -0,0 +1,38 @@
+import pytest
+
+from datetime import datetime, timezone
+
+from src.analytics.service import get_bucket, insert_click_events, select_click_series
+
+
+def make_event(number: int, clicked_at: datetime) -> dict:
+    return {"event_id": f"{number}-0",
+            "clicked_at": clicked_at,
+            "code": "example_code",
+            "referrer": None,
+            "user_agent_hash": None}
+
+def test_get_bucket():
+    clicked_at = datetime(2025, 3, 1, 12, 34, 56, 789, tzinfo=timezone.utc)
+    assert get_bucket(clicked_at, "minute") == datetime(2025, 3, 1, 12, 34, tzinfo=timezone.utc)
+    assert get_bucket(clicked_at, "hour") == datetime(2025, 3, 1, 12, tzinfo=timezone.utc)
+
+@pytest.mark.asyncio
+async def test_insert_click_events(db_session):
+    events = [make_event(1, datetime(2025, 3, 1, 12, 0, 10, tzinfo=timezone.utc)),
+              make_event(2, datetime(2025, 3, 1, 12, 0, 50, tzinfo=timezone.utc)),
+              make_event(3, datetime(2025, 3, 1, 12, 5, tzinfo=timezone.utc)),
+              make_event(4, datetime(2025, 4, 1, 0, 0, tzinfo=timezone.utc))]
+    assert await insert_click_events(db_session, events) == 4
+    assert await insert_click_events(db_session, events[:2]) == 0
+    since = datetime(2025, 3, 1, tzinfo=timezone.utc)
+    until = datetime(2025, 5, 1, tzinfo=timezone.utc)
+    minutes = await select_click_series(db_session, "example_code", "minute", since, until)
+    assert [tuple(row) for row in minutes] == [
+        (datetime(2025, 3, 1, 12, 0, tzinfo=timezone.utc), 2),
+        (datetime(2025, 3, 1, 12, 5, tzinfo=timezone.utc), 1),
+        (datetime(2025, 4, 1, 0, 0, tzinfo=timezone.utc), 1)
+    ]
+    hours = await select_click_series(db_session, "example_code", "hour", since, until)
+    assert [row.clicks for row in hours] == [3, 1]
+    assert await insert_click_events(db_session, []) == 0
@@ -0,0 +1,41 @@
+import pytest
+
+from datetime import datetime, timezone
+
+from tests.conftest import fake_redis
+
+from src.analytics.stream import (CLICK_STREAM_KEY, make_click_event, parse_click_event,
+                                  create_click_group, read_click_events, claim_click_events,
+                                  ack_click_events)
+
+
+def test_make_click_event():
+    event = make_click_event("code1", "http://example.com/" + "a" * 1000, "Mozilla/5.0")
+    assert event["c"] == "code1"
+    assert len(event["r"]) == 512
+    assert len(event["u"]) == 16
+    assert make_click_event("code1", None, None)["r"] == ""
+
+def test_parse_click_event():
+    fields = {b"c": b"code1", b"t": b"1700000000123", b"r": b"", b"u": b"abc"}
+    assert parse_click_event(b"1700000000123-0", fields) == {
+        "event_id": "1700000000123-0",
+        "clicked_at": datetime(2023, 11, 14, 22, 13, 20, 123000, tzinfo=timezone.utc),
+        "code": "code1",
+        "referrer": None,
+        "user_agent_hash": "abc"
+    }
+
+@pytest.mark.asyncio
+async def test_read_and_claim_click_events(fake_redis):
+    _, stats = fake_redis
+    await create_click_group()
+    await create_click_group()
+    await stats.xadd(CLICK_STREAM_KEY, make_click_event("code1", None, None))
+    await stats.xadd(CLICK_STREAM_KEY, make_click_event("code2", None, None))
+    entries = await read_click_events("worker1", 10)
+    assert [fields[b"c"] for _, fields in entries] == [b"code1", b"code2"]
+    assert await read_click_events("worker1", 10) == []
+    await ack_click_events(entries[0][0])
+    claimed = await claim_click_events("worker2", 0, 10)
+    assert [event_id for event_id, _ in claimed] == [entries[1][0]]
@@ -0,0 +1,72 @@
+import time
+import asyncio
+import pytest
+
+from src.cache import LocalCache, SingleFlight
+
+
+def test_local_cache_get_set():
+    cache = LocalCache(maxsize=2, ttl=60)
+    cache.set("code", "http://example.com/")
+    assert cache.get("code") == "http://example.com/"
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+def test_local_cache_ttl(monkeypatch):
+    cache = LocalCache(maxsize=2, ttl=60)
+    cache.set("a", 1, ttl=1)
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + 2)
+    assert cache.get("a") is None
+
+def test_local_cache_skips_expired_ttl():
+    cache = LocalCache(maxsize=2, ttl=60)
+    cache.set("a", 1, ttl=0)
+    assert cache.get("a") is None
+
+def test_local_cache_delete():
+    cache = LocalCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.delete("a")
+    assert cache.get("a") is None
+
+@pytest.mark.asyncio
+async def test_single_flight():
+    flight = SingleFlight()
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    assert await asyncio.gather(*(flight.run("key", load) for _ in range(5))) == [1] * 5
+    assert flight.calls == {}
+    assert await flight.run("key", load) == 2
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_cancelled_caller():
+    flight = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        return "value"
+
+    first = asyncio.create_task(flight.run("key", load))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(flight.run("key", load))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "value"
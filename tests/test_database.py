@@ -0,0 +1,76 @@
+import pytest
+
+from sqlalchemy import text
+
+from src.config import settings
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from src.database import MeteredQueuePool, LazySession, create_engine, warm_up_engine
+from tests.conftest import DATABASE_TEST_URL
+
+
+@pytest.mark.asyncio
+async def test_create_engine_pool_settings():
+    engine = create_engine(DATABASE_TEST_URL)
+    try:
+        assert isinstance(engine.pool, MeteredQueuePool)
+        assert engine.pool.size() == settings.DB_POOL_SIZE
+        assert engine.pool._pre_ping == settings.DB_POOL_PRE_PING
+        _, connect_args = engine.dialect.create_connect_args(engine.url)
+        assert connect_args["prepared_statement_cache_size"] == settings.DB_STATEMENT_CACHE_SIZE
+    finally:
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_metered_pool_stats():
+    engine = create_engine(DATABASE_TEST_URL)
+    try:
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+            stats = engine.pool.stats()
+            assert stats["checked_out"] == 1
+            assert stats["waits"] == 1
+        stats = engine.pool.stats()
+        assert stats["checked_out"] == 0
+        assert stats["checked_in"] == 1
+        assert stats["overflow"] == 0
+        assert stats["timeouts"] == 0
+        assert stats["wait_time_max"] >= 0
+    finally:
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_warm_up_engine():
+    engine = create_engine(DATABASE_TEST_URL)
+    try:
+        await warm_up_engine(engine, 3)
+        stats = engine.pool.stats()
+        assert stats["checked_in"] == 3
+        assert stats["checked_out"] == 0
+    finally:
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_warm_up_engine_unavailable(caplog):
+    engine = create_engine(DATABASE_TEST_URL.replace(f":{settings.DB_PORT}/", ":1/"))
+    try:
+        await warm_up_engine(engine, 2)
+        assert "Failed to warm up" in caplog.text
+    finally:
+        await engine.dispose()
+
+@pytest.mark.asyncio
+async def test_lazy_session():
+    engine = create_engine(DATABASE_TEST_URL)
+    try:
+        session = LazySession(async_sessionmaker(engine))
+        await session.close()
+        assert not session.created
+        assert engine.pool.stats()["waits"] == 0
+        assert await session.scalar(text("SELECT 1")) == 1
+        assert session.created
+        assert engine.pool.stats()["checked_out"] == 1
+        await session.close()
+        assert engine.pool.stats()["checked_out"] == 0
+    finally:
+        await engine.dispose()
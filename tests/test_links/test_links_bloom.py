@@ -0,0 +1,73 @@
+import pytest
+
+from tests.conftest import fake_redis
+
+from src.links.bloom import RedisBloomFilter
+
+
+async def aiter_batches(batches):
+    for batch in batches:
+        yield batch
+
+@pytest.fixture()
+def bloom_filter():
+    return RedisBloomFilter(key="test_filter", capacity=1000, error_rate=0.01)
+
+def test_bloom_filter_size(bloom_filter):
+    assert bloom_filter.size == 9586
+    assert bloom_filter.hashes == 7
+
+def test_bloom_filter_positions(bloom_filter):
+    positions = bloom_filter.positions("code")
+    assert positions == bloom_filter.positions("code")
+    assert len(positions) == bloom_filter.hashes
+    assert all(0 <= position < bloom_filter.size for position in positions)
+
+@pytest.mark.asyncio
+async def test_bloom_filter_add(fake_redis, bloom_filter):
+    _, redis = fake_redis
+    await bloom_filter.rebuild(redis, aiter_batches([]))
+    await bloom_filter.add(redis, "code")
+    assert await bloom_filter.might_contain(redis, "code")
+    assert not await bloom_filter.might_contain(redis, "other")
+
+@pytest.mark.asyncio
+async def test_bloom_filter_missing_key(fake_redis, bloom_filter):
+    _, redis = fake_redis
+    assert await bloom_filter.might_contain(redis, "code")
+
+@pytest.mark.asyncio
+async def test_bloom_filter_add_before_rebuild(fake_redis, bloom_filter):
+    _, redis = fake_redis
+    await bloom_filter.add(redis, "code")
+    assert await bloom_filter.might_contain(redis, "code")
+    assert await bloom_filter.might_contain(redis, "other")
+
+@pytest.mark.asyncio
+async def test_bloom_filter_lost_bitmap(fake_redis, bloom_filter):
+    _, redis = fake_redis
+    await bloom_filter.rebuild(redis, aiter_batches([["code"]]))
+    await redis.delete(bloom_filter.key)
+    assert await bloom_filter.might_contain(redis, "other")
+
+@pytest.mark.asyncio
+async def test_bloom_filter_rebuild(fake_redis, bloom_filter):
+    _, redis = fake_redis
+    await bloom_filter.add(redis, "old")
+    count = await bloom_filter.rebuild(redis, aiter_batches([["a", "b"], ["c"]]))
+    assert count == 3
+    assert await bloom_filter.might_contain(redis, "a")
+    assert await bloom_filter.might_contain(redis, "c")
+    assert not await bloom_filter.might_contain(redis, "old")
+
+@pytest.mark.asyncio
+async def test_bloom_filter_info(fake_redis, bloom_filter):
+    _, redis = fake_redis
+    await bloom_filter.rebuild(redis, aiter_batches([[str(i) for i in range(1000)]]))
+    info = await bloom_filter.info(redis)
+    assert info["memory_bytes"] == 1199
+    assert info["false_positive_rate"] < 0.02
+    false_positives = 0
+    for i in range(1000, 3000):
+        false_positives += await bloom_filter.might_contain(redis, str(i))
+    assert false_positives / 2000 < 0.03
@@ -0,0 +1,122 @@
+import pytest
+
+from datetime import datetime, timedelta
+
+from tests.conftest import fake_redis
+
+from src.config import settings, timezone
+from src.links.cache import (LINK_INVALIDATION_CHANNEL,
+                             LINK_NOT_FOUND,
+                             local_link_cache,
+                             code_filter,
+                             cache_missing_links,
+                             might_exist,
+                             register_links,
+                             get_link_ttl,
+                             get_cached_link,
+                             get_cached_link_entry,
+                             set_cached_link,
+                             invalidate_links)
+
+
+async def aiter_batches(batches):
+    for batch in batches:
+        yield batch
+
+def test_get_link_ttl_without_expiration():
+    assert get_link_ttl(None) == settings.REDIS_CACHE_EXPIRATION
+
+def test_get_link_ttl_limited_by_expiration():
+    expires_at = datetime.now(timezone) + timedelta(seconds=settings.REDIS_CACHE_EXPIRATION / 2)
+    assert 0 < get_link_ttl(expires_at) <= settings.REDIS_CACHE_EXPIRATION / 2
+
+def test_get_link_ttl_expired():
+    assert get_link_ttl(datetime.now(timezone) - timedelta(seconds=1)) < 0
+
+@pytest.mark.asyncio
+async def test_set_cached_link(fake_redis):
+    cache, _ = fake_redis
+    expires_at = datetime.now(timezone) + timedelta(days=1)
+    await set_cached_link("code", "http://example.com/", expires_at)
+    assert await cache.get("code") == b"http://example.com/"
+    max_ttl_ms = (settings.REDIS_CACHE_EXPIRATION + settings.CACHE_STALE_WINDOW) * 1000
+    assert settings.REDIS_CACHE_EXPIRATION * 1000 < await cache.pttl("code") <= max_ttl_ms
+    assert local_link_cache.get("code") == "http://example.com/"
+
+@pytest.mark.asyncio
+async def test_set_cached_link_ttl_from_expires_at(fake_redis):
+    cache, _ = fake_redis
+    expires_at = datetime.now(timezone) + timedelta(seconds=2)
+    await set_cached_link("code", "http://example.com/", expires_at)
+    assert 0 < await cache.pttl("code") <= 2000
+
+@pytest.mark.asyncio
+async def test_set_cached_link_expired(fake_redis):
+    cache, _ = fake_redis
+    expires_at = datetime.now(timezone) - timedelta(seconds=1)
+    await set_cached_link("code", "http://example.com/", expires_at)
+    assert await cache.get("code") is None
+    assert local_link_cache.get("code") is None
+
+@pytest.mark.asyncio
+async def test_get_cached_link_from_redis(fake_redis):
+    cache, _ = fake_redis
+    await cache.set("code", "http://example.com/", ex=10)
+    assert await get_cached_link("code") == "http://example.com/"
+    await cache.delete("code")
+    assert await get_cached_link("code") == "http://example.com/"
+
+@pytest.mark.asyncio
+async def test_get_cached_link_entry_stale(fake_redis):
+    cache, _ = fake_redis
+    await cache.set("code", "http://example.com/", px=settings.CACHE_STALE_WINDOW * 1000)
+    assert await get_cached_link_entry("code") == ("http://example.com/", True)
+    assert local_link_cache.get("code") is None
+    await cache.set("code", LINK_NOT_FOUND, px=settings.CACHE_STALE_WINDOW * 1000)
+    assert await get_cached_link_entry("code") == (LINK_NOT_FOUND, False)
+
+@pytest.mark.asyncio
+async def test_get_cached_link_none(fake_redis):
+    assert await get_cached_link("code") is None
+
+@pytest.mark.asyncio
+async def test_invalidate_links(fake_redis):
+    cache, stats = fake_redis
+    await set_cached_link("code", "http://example.com/", None)
+    await stats.zincrby("link_stats", 3, "code")
+    await stats.zincrby("link_stats", 1, "other")
+    async with cache.pubsub() as pubsub:
+        await pubsub.subscribe(LINK_INVALIDATION_CHANNEL)
+        await pubsub.get_message(timeout=1)
+        await invalidate_links("code")
+        message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+    assert message["data"] == b"code"
+    assert local_link_cache.get("code") is None
+    assert await stats.zrange("link_stats", 0, -1) == [b"other"]
+    assert await get_cached_link("code") == LINK_NOT_FOUND
+
+@pytest.mark.asyncio
+async def test_cache_missing_links(fake_redis):
+    cache, _ = fake_redis
+    await cache_missing_links("code")
+    assert await get_cached_link("code") == LINK_NOT_FOUND
+    assert 0 < await cache.ttl("code") <= settings.NEGATIVE_CACHE_EXPIRATION
+    assert local_link_cache.get("code") is None
+
+@pytest.mark.asyncio
+async def test_might_exist_without_filter(fake_redis):
+    assert await might_exist("code")
+
+@pytest.mark.asyncio
+async def test_register_links(fake_redis):
+    await code_filter.rebuild(fake_redis[1], aiter_batches([["other"]]))
+    await cache_missing_links("code")
+    assert not await might_exist("code")
+    await register_links("code")
+    assert await might_exist("code")
+    assert await get_cached_link("code") is None
+
+@pytest.mark.asyncio
+async def test_register_links_before_filter_rebuild(fake_redis):
+    await register_links("brandnew1")
+    assert await might_exist("oldcode123")
@@ -0,0 +1,46 @@
+import pytest
+
+from src.links.codes import (FeistelCodeGenerator, SqidsCodeGenerator, SqidsRangeCodeGenerator,
+                             make_code_generator)
+
+
+ALPHABET = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
+
+@pytest.mark.parametrize("strategy, generator_class", [
+    ("sqids_range", SqidsRangeCodeGenerator),
+    ("sqids", SqidsCodeGenerator),
+    ("feistel", FeistelCodeGenerator)
+])
+def test_make_code_generator(strategy, generator_class):
+    assert isinstance(make_code_generator(strategy), generator_class)
+
+def test_make_code_generator_unknown():
+    with pytest.raises(ValueError):
+        make_code_generator("unknown")
+
+def test_sqids_code_generator():
+    generator = SqidsCodeGenerator(ALPHABET, min_length=6)
+    codes = {generator.encode(link_id) for link_id in range(1, 1001)}
+    assert len(codes) == 1000
+    assert all(len(code) >= 6 for code in codes)
+
+def test_feistel_code_generator_is_permutation():
+    generator = FeistelCodeGenerator(ALPHABET, bits=12, key="key")
+    assert sorted(generator.permute(value) for value in range(2 ** 12)) == list(range(2 ** 12))
+
+def test_feistel_code_generator_codes():
+    generator = FeistelCodeGenerator(ALPHABET, bits=40, key="key")
+    codes = [generator.encode(link_id) for link_id in range(1, 1001)]
+    assert len(set(codes)) == 1000
+    assert {len(code) for code in codes} == {7}
+    assert set("".join(codes)) <= set(ALPHABET)
+    assert FeistelCodeGenerator(ALPHABET, bits=40, key="other").encode(1) != codes[0]
+
+@pytest.mark.parametrize("bits, link_id", [
+    (11, 1),
+    (12, 2 ** 12),
+    (12, -1)
+])
+def test_feistel_code_generator_invalid(bits, link_id):
+    with pytest.raises(ValueError):
+        FeistelCodeGenerator(ALPHABET, bits=bits, key="key").encode(link_id)
@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+
+from redis.exceptions import ConnectionError
+
+from tests.conftest import fake_redis
+
+from src.links import hits
+from src.links.hits import HitBuffer
+
+
+@pytest.mark.asyncio
+async def test_hit_buffer_flush(fake_redis):
+    _, stats = fake_redis
+    buffer = HitBuffer(max_hits=100, interval=60)
+    for short_code in ["code1", "code2", "code1"]:
+        buffer.add(short_code)
+    assert buffer.pending == 3
+    assert await buffer.flush() == 3
+    assert buffer.counts == {}
+    assert await stats.zrange("link_stats", 0, -1, withscores=True) == [(b"code2", 1.0), (b"code1", 2.0)]
+    assert await buffer.flush() == 0
+
+@pytest.mark.asyncio
+async def test_hit_buffer_flush_keeps_hits_on_error(fake_redis, monkeypatch):
+    _, stats = fake_redis
+    buffer = HitBuffer(max_hits=100, interval=60)
+    buffer.add("code1")
+
+    def broken_pipeline(*args, **kwargs):
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(hits.redis_stats, "pipeline", broken_pipeline)
+    assert await buffer.flush() == 0
+    buffer.add("code1")
+    assert buffer.counts == {"code1": 2}
+    assert buffer.pending == 2
+
+@pytest.mark.asyncio
+async def test_hit_buffer_run_cancelled_during_flush(fake_redis, monkeypatch):
+    _, stats = fake_redis
+    buffer = HitBuffer(max_hits=1, interval=60, track_events=True)
+    started = asyncio.Event()
+    pipeline = hits.redis_stats.pipeline
+
+    def hanging_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+
+        async def execute():
+            started.set()
+            await asyncio.sleep(60)
+
+        pipe.execute = execute
+        return pipe
+
+    monkeypatch.setattr(hits.redis_stats, "pipeline", hanging_pipeline)
+    task = asyncio.create_task(buffer.run())
+    await asyncio.sleep(0)
+    buffer.add("code1")
+    await asyncio.wait_for(started.wait(), 1)
+    buffer.add("code1")
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert buffer.counts == {"code1": 2}
+    assert buffer.pending == 2
+    assert len(buffer.events) == 2
+    monkeypatch.setattr(hits.redis_stats, "pipeline", pipeline)
+    assert await buffer.flush() == 2
+    assert await stats.zscore("link_stats", "code1") == 2.0
+
+@pytest.mark.asyncio
+async def test_hit_buffer_run_flushes_when_full(fake_redis):
+    _, stats = fake_redis
+    buffer = HitBuffer(max_hits=2, interval=60)
+    task = asyncio.create_task(buffer.run())
+    await asyncio.sleep(0)
+    buffer.add("code1")
+    buffer.add("code1")
+    for _ in range(100):
+        if await stats.zscore("link_stats", "code1"):
+            break
+        await asyncio.sleep(0.01)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert await stats.zscore("link_stats", "code1") == 2.0
+    assert buffer.pending == 0
+
+@pytest.mark.asyncio
+async def test_hit_buffer_flush_click_events(fake_redis):
+    _, stats = fake_redis
+    buffer = HitBuffer(max_hits=100, interval=60, track_events=True)
+    buffer.add("code1", "http://example.com/", "Mozilla/5.0")
+    buffer.add("code2")
+    assert await buffer.flush() == 2
+    assert buffer.events == []
+    events = await stats.xrange("click_events")
+    assert [fields[b"c"] for _, fields in events] == [b"code1", b"code2"]
+    assert events[0][1][b"r"] == b"http://example.com/"
@@ -0,0 +1,35 @@
+import pytest
+
+from tests.conftest import fake_redis
+
+from src.config import settings
+from src.links.pool import (CODE_POOL_KEY,
+                            generate_random_codes,
+                            get_code_pool_size,
+                            pop_pooled_code,
+                            push_pooled_codes)
+
+
+def test_generate_random_codes():
+    codes = generate_random_codes(1000)
+    assert 990 <= len(codes) <= 1000
+    assert {len(code) for code in codes} == {settings.CODE_POOL_CODE_LENGTH}
+    assert set("".join(codes)) <= set(settings.CODE_ALPHABET)
+
+@pytest.mark.asyncio
+async def test_pop_pooled_code_disabled(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "CODE_POOL_ENABLED", False)
+    await push_pooled_codes("code1")
+    assert await pop_pooled_code() is None
+    assert await get_code_pool_size() == 1
+
+@pytest.mark.asyncio
+async def test_pop_pooled_code(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "CODE_POOL_ENABLED", True)
+    await push_pooled_codes("code1", "code2")
+    assert await get_code_pool_size() == 2
+    assert await pop_pooled_code() == "code1"
+    assert await pop_pooled_code() == "code2"
+    assert await pop_pooled_code() is None
+    _, stats = fake_redis
+    assert not await stats.exists(CODE_POOL_KEY)
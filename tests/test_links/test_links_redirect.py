@@ -0,0 +1,136 @@
+import asyncio
+import pytest
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from tests.conftest import db_session, fake_redis
+
+from src.config import settings, timezone
+from src.links import redirect
+from src.links.cache import LINK_NOT_FOUND, code_filter, register_links, set_cached_link
+from src.links.hits import hit_buffer
+from src.links.models import Link
+from src.links.redirect import RedirectMiddleware, resolve_link, link_flight
+from src.links.router import router, redirect_to_original_link
+
+
+async def build_code_filter(redis, *codes: str) -> None:
+    async def batches():
+        yield list(codes)
+
+    await code_filter.rebuild(redis, batches())
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(router)
+    route = next(route for route in app.routes
+                 if getattr(route, "endpoint", None) is redirect_to_original_link)
+    app.add_middleware(RedirectMiddleware, route=route)
+    return app
+
+@pytest.fixture()
+def test_session_maker(db_session, monkeypatch):
+    @asynccontextmanager
+    async def session_maker():
+        yield db_session
+
+    monkeypatch.setattr(redirect, "read_session_maker", session_maker)
+    monkeypatch.setattr(redirect, "async_session_maker", session_maker)
+
+@pytest.mark.asyncio
+async def test_resolve_link_cached(fake_redis):
+    await set_cached_link("example_code", "http://example.com/", None)
+    assert await resolve_link("example_code") == "http://example.com/"
+
+@pytest.mark.asyncio
+async def test_resolve_link_filtered(fake_redis):
+    await build_code_filter(fake_redis[1], "other_code")
+    assert await resolve_link("example_code") is None
+
+@pytest.mark.asyncio
+async def test_resolve_link_from_database(fake_redis, db_session, test_session_maker):
+    cache, _ = fake_redis
+    db_session.add(Link(link="http://example.com/", code="example_code",
+                        expires_at=datetime.now(timezone) + timedelta(days=1)))
+    await db_session.commit()
+    assert await resolve_link("example_code") == "http://example.com/"
+    assert await cache.get("example_code") == b"http://example.com/"
+    assert await resolve_link("missing_code") is None
+    assert await cache.get("missing_code") == LINK_NOT_FOUND.encode()
+
+@pytest.mark.asyncio
+async def test_resolve_link_expired(fake_redis, db_session, test_session_maker):
+    cache, _ = fake_redis
+    db_session.add(Link(link="http://example.com/", code="example_code",
+                        expires_at=datetime.now(timezone) - timedelta(minutes=1)))
+    await db_session.commit()
+    assert await resolve_link("example_code") is None
+    assert await cache.get("example_code") == LINK_NOT_FOUND.encode()
+
+@pytest.mark.asyncio
+async def test_resolve_link_coalesces_misses(fake_redis, db_session, test_session_maker,
+                                             monkeypatch):
+    db_session.add(Link(link="http://example.com/", code="example_code"))
+    await db_session.commit()
+    await register_links("example_code")
+    selects = 0
+    select_by_code = redirect.select_by_code
+
+    async def counting_select(short_code, session):
+        nonlocal selects
+        selects += 1
+        await asyncio.sleep(0.01)
+        return await select_by_code(short_code, session)
+
+    monkeypatch.setattr(redirect, "select_by_code", counting_select)
+    results = await asyncio.gather(*(resolve_link("example_code") for _ in range(5)))
+    assert results == ["http://example.com/"] * 5
+    assert selects == 1
+
+@pytest.mark.asyncio
+async def test_resolve_link_waits_for_other_process(fake_redis, monkeypatch):
+    cache, stats = fake_redis
+    await register_links("example_code")
+    await stats.set("link_lock:example_code", 1)
+    monkeypatch.setattr(settings, "LINK_LOCK_TIMEOUT_MS", 1000)
+
+    async def load_elsewhere():
+        await asyncio.sleep(0.05)
+        await cache.set("example_code", "http://example.com/")
+
+    task = asyncio.create_task(load_elsewhere())
+    assert await resolve_link("example_code") == "http://example.com/"
+    await task
+
+@pytest.mark.asyncio
+async def test_resolve_link_refreshes_stale(fake_redis, db_session, test_session_maker):
+    cache, _ = fake_redis
+    db_session.add(Link(link="http://example.com/new/", code="example_code"))
+    await db_session.commit()
+    await cache.set("example_code", "http://example.com/old/",
+                    px=settings.CACHE_STALE_WINDOW * 1000)
+    assert await resolve_link("example_code") == "http://example.com/old/"
+    await asyncio.gather(*link_flight.calls.values())
+    assert await cache.get("example_code") == b"http://example.com/new/"
+    assert await cache.pttl("example_code") > settings.CACHE_STALE_WINDOW * 1000
+
+@pytest.mark.asyncio
+async def test_redirect_middleware(fake_redis, monkeypatch):
+    monkeypatch.setattr(hit_buffer, "counts", {})
+    monkeypatch.setattr(hit_buffer, "events", [])
+    await set_cached_link("example_code", "http://example.com/путь?q=a b", None)
+    await build_code_filter(fake_redis[1], "example_code")
+    async with AsyncClient(transport=ASGITransport(app=make_app()), base_url="http://test") as client:
+        response = await client.get("/links/example_code", headers={"referer": "http://ref/"})
+        assert response.status_code == 307
+        assert response.headers["location"] == "http://example.com/%D0%BF%D1%83%D1%82%D1%8C?q=a%20b"
+        assert response.content == b""
+        response = await client.get("/links/missing_code")
+        assert response.status_code == 404
+        assert response.json() == {"detail": "This link doesn't exist."}
+        response = await client.post("/links/example_code")
+        assert response.status_code == 405
+    assert hit_buffer.counts == {"example_code": 1}
@@ -0,0 +1,146 @@
+import json
+import pytest
+
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, status
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from tests.conftest import db_engine, db_session, fake_redis
+
+from src.config import settings
+from src.database import get_lazy_read_session, get_lazy_session
+from src.links.models import Link
+from src.links import router as links_router
+from src.links.router import router
+from src.users.service import get_current_active_user_soft
+
+
+EXPIRES_AT = "2100-01-01T00:00:00"
+
+def make_client(overrides: dict | None = None) -> AsyncClient:
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_current_active_user_soft] = lambda: None
+    app.dependency_overrides.update(overrides or {})
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+def make_url(number: int, **fields) -> dict:
+    return {"link": f"http://example.com/batch/{number}/", "expires_at": EXPIRES_AT, **fields}
+
+def parse_results(response) -> list[dict]:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+@pytest.fixture()
+def test_session_maker(db_session, monkeypatch):
+    @asynccontextmanager
+    async def session_maker():
+        yield db_session
+
+    monkeypatch.setattr(links_router, "async_session_maker", session_maker)
+
+@pytest.mark.asyncio
+async def test_shorten_batch_json(fake_redis, test_session_maker):
+    async with make_client() as client:
+        response = await client.post("/links/shorten/batch/",
+                                     json=[make_url(1), make_url(2), make_url(1)])
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    results = parse_results(response)
+    assert [result["index"] for result in results] == [0, 1, 2]
+    assert [result["status"] for result in results] == ["created", "created", "exists"]
+    assert results[0]["short_link"] == results[2]["short_link"]
+
+@pytest.mark.asyncio
+async def test_shorten_batch_ndjson(fake_redis, test_session_maker):
+    body = "\n".join(json.dumps(url) for url in [make_url(1), make_url(2)]) + "\n\n"
+    async with make_client() as client:
+        response = await client.post("/links/shorten/batch/", content=body,
+                                     headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 200
+    results = parse_results(response)
+    assert [result["status"] for result in results] == ["created", "created"]
+    assert results[1]["link"] == "http://example.com/batch/2/"
+
+@pytest.mark.asyncio
+async def test_shorten_batch_invalid_and_conflict(fake_redis, test_session_maker):
+    async with make_client() as client:
+        response = await client.post("/links/shorten/batch/", json=[
+            make_url(1, custom_alias="batch_alias"),
+            {"link": "http://example.com/batch/2/"},
+            make_url(3, custom_alias="batch_alias")
+        ])
+    results = parse_results(response)
+    assert [result["status"] for result in results] == ["created", "invalid", "conflict"]
+    assert results[0]["short_link"].endswith("/links/batch_alias")
+    assert results[1]["link"] is None
+    assert results[2]["detail"] == "This alias is already taken."
+
+@pytest.mark.asyncio
+async def test_shorten_batch_database_error(fake_redis, monkeypatch):
+    async def failing_generate_short_links(session, urls, owner):
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    @asynccontextmanager
+    async def session_maker():
+        yield None
+
+    monkeypatch.setattr(links_router, "async_session_maker", session_maker)
+    monkeypatch.setattr(links_router, "generate_short_links", failing_generate_short_links)
+    async with make_client() as client:
+        response = await client.post("/links/shorten/batch/", json=[make_url(1), {}])
+    results = parse_results(response)
+    assert [result["status"] for result in results] == ["error", "invalid"]
+    assert results[0]["short_link"] is None
+
+@pytest.mark.asyncio
+async def test_shorten_batch_not_array(fake_redis):
+    async with make_client() as client:
+        response = await client.post("/links/shorten/batch/", json={"link": "http://example.com/"})
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_shorten_batch_too_many_items(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_SHORTEN_MAX_ITEMS", 2)
+    body = "\n".join(json.dumps(make_url(number)) for number in range(3))
+    async with make_client() as client:
+        response = await client.post("/links/shorten/batch/",
+                                     json=[make_url(number) for number in range(3)])
+        assert response.status_code == 413
+        response = await client.post("/links/shorten/batch/", content=body,
+                                     headers={"content-type": "application/x-ndjson"})
+        assert response.status_code == 413
+
+@pytest.mark.asyncio
+async def test_shorten_batch_body_too_large(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "BULK_SHORTEN_MAX_BODY_SIZE", 100)
+
+    async def chunks():
+        for number in range(3):
+            yield (json.dumps(make_url(number)) + "\n").encode()
+
+    async with make_client() as client:
+        response = await client.post("/links/shorten/batch/",
+                                     json=[make_url(number) for number in range(3)])
+        assert response.status_code == 413
+        response = await client.post("/links/shorten/batch/", content=chunks(),
+                                     headers={"content-type": "application/x-ndjson"})
+        assert response.status_code == 413
+
+@pytest.mark.asyncio
+async def test_search_link_replica_lag(db_engine, db_session, monkeypatch):
+    db_session.add(Link(link="http://example.com/search/", code="search_code"))
+    await db_session.commit()
+    replica_session_maker = async_sessionmaker(db_engine)
+    monkeypatch.setattr(links_router, "read_session_maker", replica_session_maker)
+    async with replica_session_maker() as replica_session:
+        client = make_client({get_lazy_read_session: lambda: replica_session,
+                              get_lazy_session: lambda: db_session})
+        async with client:
+            response = await client.get("/links/search/",
+                                        params={"original_url": "http://example.com/search/"})
+            assert response.status_code == 200
+            assert response.json()["link"].endswith("/links/search_code")
+            response = await client.get("/links/search/",
+                                        params={"original_url": "http://example.com/missing/"})
+            assert response.status_code == 404
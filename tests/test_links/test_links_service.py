@@ -1,41 +1,39 @@
 import pytest
 
+from datetime import datetime, timedelta
+from fastapi import HTTPException, status
 from sqlalchemy import select
 
-from tests.conftest import db_session
+from tests.conftest import db_session, fake_redis
 from test_links.test_links_models import valid_link
 
-from src.config import settings
+from src.config import settings, timezone
 from src.users.models import User
 from src.users.schemas import UserData
 from src.links.models import Link
+from src.links import service
+from src.links.pool import push_pooled_codes, get_code_pool_size
 from src.links.service import (get_code, 
                                code_to_url,
                                select_by_link,
                                select_by_code,
-                               insert_link,
-                               update_link,
+                               increment_usage_counts,
                                delete_link,
                                generate_short_link,
+                               generate_short_links,
+                               select_codes_by_links,
+                               select_existing_codes,
                                get_link_exists_by_code,
                                get_link_exists_by_link,
-                               get_user_link)
+                               get_user_link,
+                               encode_link_cursor,
+                               decode_link_cursor,
+                               stream_links_by_owner)
 
 async def add_valid_link(session, link):
     session.add(link)
     await session.commit()
     
-def get_values(link: Link) -> dict:
-    return {
-        "owner": link.owner,
-        "link": link.link,
-        "code": link.code,
-        "created_at": link.created_at,
-        "updated_at": link.updated_at,
-        "usage_count": link.usage_count,
-        "expires_at": link.expires_at
-    }
-    
 async def select_valid_link_or_none(session, link):
     query = select(Link).where(Link.link == link.link)
     res = await session.execute(query)
@@ -71,32 +69,14 @@ async def test_select_by_code(db_session, valid_link):
     assert valid_link.link == res.link
 
 @pytest.mark.asyncio
-async def test_insert_link(db_session, valid_link):
-    link = await select_valid_link_or_none(db_session, valid_link)
-    assert link is None
-    values = get_values(valid_link)
-    await insert_link(db_session, values)
-    link = await select_valid_link_or_none(db_session, valid_link)
-    assert link.link == valid_link.link
-
-@pytest.mark.asyncio
-async def test_insert_link_raise_exception(db_session):
-    with pytest.raises(Exception):
-        await insert_link(db_session, Link())
-
-@pytest.mark.asyncio
-async def test_update_link(db_session, valid_link):
+async def test_increment_usage_counts(db_session, valid_link):
     await add_valid_link(db_session, valid_link)
+    updated = await increment_usage_counts(db_session, {valid_link.code: 3, "missing_code": 1})
+    assert updated == 1
     link = await select_valid_link_or_none(db_session, valid_link)
-    await update_link(db_session, link.id, {"code": "new_code"})
-    link = await select_valid_link_or_none(db_session, valid_link)
-    assert link.code == "new_code"
+    await db_session.refresh(link)
+    assert link.usage_count == 3
 
-@pytest.mark.asyncio
-async def test_update_link_raise_exception(db_session):
-    with pytest.raises(Exception):
-        await update_link(db_session, 0, {})
-        
 @pytest.mark.asyncio
 async def test_delete_link(db_session, valid_link):
     await add_valid_link(db_session, valid_link)
@@ -124,6 +104,48 @@ async def test_generate_short_link_code(db_session, valid_link):
     assert link.link == valid_link.link
     assert link.code == code
     
+@pytest.mark.asyncio
+async def test_generate_short_link_pooled_code(db_session, valid_link, fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "CODE_POOL_ENABLED", True)
+    await push_pooled_codes("pooled01")
+    code = await generate_short_link(
+        session=db_session,
+        link=valid_link.link,
+        expires_at=valid_link.expires_at
+    )
+    assert code == "pooled01"
+    assert await get_code_pool_size() == 0
+    link = await select_valid_link_or_none(db_session, valid_link)
+    assert link.code == "pooled01"
+
+@pytest.mark.asyncio
+async def test_generate_short_link_pooled_code_taken(db_session, valid_link, fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "CODE_POOL_ENABLED", True)
+    await add_valid_link(db_session, valid_link)
+    await push_pooled_codes(valid_link.code)
+    code = await generate_short_link(
+        session=db_session,
+        link="http://example.com/other/",
+        expires_at=valid_link.expires_at
+    )
+    assert code != valid_link.code
+    link = await select_by_code(code, db_session)
+    assert link.link == "http://example.com/other/"
+
+@pytest.mark.asyncio
+async def test_generate_short_link_sequence_code_taken(db_session, valid_link, monkeypatch):
+    await add_valid_link(db_session, valid_link)
+    codes = iter([valid_link.code])
+    monkeypatch.setattr(service, "get_code", lambda link_id: next(codes, get_code(link_id)))
+    code = await generate_short_link(
+        session=db_session,
+        link="http://example.com/other/",
+        expires_at=valid_link.expires_at
+    )
+    assert code != valid_link.code
+    link = await select_by_code(code, db_session)
+    assert link.link == "http://example.com/other/"
+
 @pytest.mark.asyncio
 async def test_generate_short_link_custom_alias(db_session, valid_link):
     link = await select_valid_link_or_none(db_session, valid_link)
@@ -150,6 +172,70 @@ async def test_generate_short_link_raise_exception(db_session, valid_link):
             custom_alias=valid_link.code
         )
 
+@pytest.mark.asyncio
+async def test_generate_short_link_existing_link(db_session, valid_link):
+    await add_valid_link(db_session, valid_link)
+    with pytest.raises(HTTPException) as exc_info:
+        await generate_short_link(
+            session=db_session,
+            link=valid_link.link,
+            expires_at=valid_link.expires_at
+        )
+    assert exc_info.value.status_code == status.HTTP_208_ALREADY_REPORTED
+
+@pytest.mark.asyncio
+async def test_generate_short_link_alias_taken(db_session, valid_link):
+    await add_valid_link(db_session, valid_link)
+    with pytest.raises(HTTPException) as exc_info:
+        await generate_short_link(
+            session=db_session,
+            link="http://example.com/other/",
+            expires_at=valid_link.expires_at,
+            custom_alias=valid_link.code
+        )
+    assert exc_info.value.status_code == status.HTTP_409_CONFLICT
+
+@pytest.mark.asyncio
+async def test_select_codes_by_links(db_session, valid_link):
+    await add_valid_link(db_session, valid_link)
+    codes = await select_codes_by_links([valid_link.link, "http://example.com/none/"], db_session)
+    assert codes == {valid_link.link: valid_link.code}
+
+@pytest.mark.asyncio
+async def test_select_existing_codes(db_session, valid_link):
+    await add_valid_link(db_session, valid_link)
+    assert await select_existing_codes([valid_link.code, "missing_code"], db_session) == {valid_link.code}
+
+@pytest.mark.asyncio
+async def test_generate_short_links(db_session, valid_link):
+    await add_valid_link(db_session, valid_link)
+    urls = [
+        {"link": "http://example.com/1/", "expires_at": valid_link.expires_at},
+        {"link": valid_link.link, "expires_at": valid_link.expires_at},
+        {"link": "http://example.com/2/", "expires_at": valid_link.expires_at,
+         "custom_alias": valid_link.code},
+        {"link": "http://example.com/1/", "expires_at": valid_link.expires_at},
+    ]
+    results = await generate_short_links(db_session, urls)
+    assert [result_status for result_status, _ in results] == ["created", "exists", "conflict", "exists"]
+    assert results[1][1] == valid_link.code
+    assert results[0][1] == results[3][1]
+    link = await select_by_code(results[0][1], db_session)
+    assert link.link == "http://example.com/1/"
+
+@pytest.mark.asyncio
+async def test_generate_short_links_sequence_code_taken(db_session, valid_link, monkeypatch):
+    await add_valid_link(db_session, valid_link)
+    codes = iter([valid_link.code])
+    monkeypatch.setattr(service, "get_code", lambda link_id: next(codes, get_code(link_id)))
+    urls = [{"link": f"http://example.com/{number}/", "expires_at": valid_link.expires_at}
+            for number in (1, 2)]
+    results = await generate_short_links(db_session, urls)
+    assert [result_status for result_status, _ in results] == ["created", "created"]
+    assert valid_link.code not in [code for _, code in results]
+    link = await select_by_code(results[0][1], db_session)
+    assert link.link == "http://example.com/1/"
+
 @pytest.mark.asyncio
 async def test_get_link_exists_by_code(db_session, valid_link):
     await add_valid_link(db_session, valid_link)
@@ -228,3 +314,27 @@ async def test_get_user_link_raise_exception(db_session, valid_link):
     )
     with pytest.raises(Exception):
         await get_user_link(db_session, fake_user_data, user_link.code)
+
+@pytest.mark.asyncio
+async def test_stream_links_by_owner(db_session):
+    db_session.add(User(username='test_user', hashed_password='test_password'))
+    await db_session.commit()
+    created_at = datetime.now(timezone)
+    db_session.add_all([Link(owner='test_user',
+                             link=f"http://example.com/{number}/",
+                             code=f"example_code_{number}",
+                             created_at=created_at + timedelta(seconds=number // 2))
+                        for number in range(5)])
+    await db_session.commit()
+    links = await stream_links_by_owner(db_session, 'test_user', limit=3)
+    page = [link async for link in links]
+    assert [link.code for link in page] == [f"example_code_{number}" for number in range(3)]
+    after = decode_link_cursor(encode_link_cursor(page[-1]))
+    assert after == (page[-1].created_at, page[-1].id)
+    links = await stream_links_by_owner(db_session, 'test_user', after)
+    assert [link.code async for link in links] == ["example_code_3", "example_code_4"]
+
+def test_decode_link_cursor_raise_exception():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_link_cursor("not a cursor")
+    assert exc_info.value.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
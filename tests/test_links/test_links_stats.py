@@ -0,0 +1,93 @@
+import asyncio
+import pytest
+import pytest_asyncio
+
+from contextlib import asynccontextmanager
+from datetime import datetime
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from tests.conftest import db_engine, db_session, fake_redis
+
+from src.config import timezone
+from src.links import redirect, stats
+from src.links.cache import get_cached_link_data, invalidate_links
+from src.links.hits import hit_buffer
+from src.links.models import Link
+from src.links.stats import get_link_data
+
+
+@pytest.fixture()
+def test_session_maker(db_session, monkeypatch):
+    @asynccontextmanager
+    async def session_maker():
+        yield db_session
+
+    monkeypatch.setattr(redirect, "read_session_maker", session_maker)
+    monkeypatch.setattr(redirect, "async_session_maker", session_maker)
+
+@pytest_asyncio.fixture
+async def stats_link(db_session):
+    now = datetime.now(timezone)
+    link = Link(link="http://example.com/", code="example_code", created_at=now,
+                updated_at=now, usage_count=10)
+    db_session.add(link)
+    await db_session.commit()
+    return link
+
+@pytest.mark.asyncio
+async def test_get_link_data_merges_pending_hits(fake_redis, test_session_maker, stats_link,
+                                                 monkeypatch):
+    _, redis_stats = fake_redis
+    monkeypatch.setattr(hit_buffer, "counts", {"example_code": 1})
+    await redis_stats.zincrby("link_stats", 2, "example_code")
+    await redis_stats.zincrby("link_stats:flushing", 3, "example_code")
+    data = await get_link_data("example_code")
+    assert data.link == "http://example.com/"
+    assert data.usage_count == 16
+    cached, pending = await get_cached_link_data("example_code")
+    assert '"usage_count":10' in cached
+    assert pending == 5
+    await redis_stats.zincrby("link_stats", 1, "example_code")
+    assert (await get_link_data("example_code")).usage_count == 17
+
+@pytest.mark.asyncio
+async def test_get_link_data_coalesces_misses(fake_redis, test_session_maker, stats_link,
+                                              monkeypatch):
+    loads = 0
+    load_link_data = stats.load_link_data
+
+    async def counting_load(short_code):
+        nonlocal loads
+        loads += 1
+        await asyncio.sleep(0.01)
+        return await load_link_data(short_code)
+
+    monkeypatch.setattr(stats, "load_link_data", counting_load)
+    results = await asyncio.gather(*(get_link_data("example_code") for _ in range(5)))
+    assert loads == 1
+    assert {data.usage_count for data in results} == {10}
+
+@pytest.mark.asyncio
+async def test_get_link_data_invalidated(fake_redis, test_session_maker, stats_link):
+    await get_link_data("example_code")
+    await invalidate_links("example_code")
+    assert (await get_cached_link_data("example_code"))[0] is None
+
+@pytest.mark.asyncio
+async def test_get_link_data_not_found(fake_redis, test_session_maker):
+    with pytest.raises(HTTPException):
+        await get_link_data("missing_code")
+
+@pytest.mark.asyncio
+async def test_get_link_data_replica_lag(fake_redis, db_engine, db_session, stats_link,
+                                         monkeypatch):
+    @asynccontextmanager
+    async def primary_session_maker():
+        yield db_session
+
+    # Сессия на отдельном соединении не видит незакоммиченную транзакцию
+    # теста, как отстающая реплика.
+    monkeypatch.setattr(redirect, "read_session_maker", async_sessionmaker(db_engine))
+    monkeypatch.setattr(redirect, "async_session_maker", primary_session_maker)
+    assert (await get_link_data("example_code")).link == "http://example.com/"
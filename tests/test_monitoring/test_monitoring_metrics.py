@@ -0,0 +1,52 @@
+import pytest
+
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+from prometheus_client import REGISTRY
+
+from src.monitoring.metrics import (DB_QUERY_DURATION, MetricsMiddleware, metrics_endpoint,
+                                    timed)
+
+
+def sample(name: str, labels: dict) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+@pytest.mark.asyncio
+async def test_timed():
+    @timed(DB_QUERY_DURATION)
+    async def timed_function(value):
+        if value is None:
+            raise ValueError
+        return value
+
+    labels = {"function": "timed_function"}
+    assert await timed_function(1) == 1
+    with pytest.raises(ValueError):
+        await timed_function(None)
+    assert sample("db_query_duration_seconds_count", labels) == 2
+
+@pytest.mark.asyncio
+async def test_metrics_middleware():
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.add_api_route("/metrics", metrics_endpoint)
+
+    @app.get("/items/{item_id}")
+    async def read_item(item_id: int):
+        if item_id < 0:
+            raise HTTPException(status_code=404)
+        return {"item_id": item_id}
+
+    route_labels = {"method": "GET", "route": "/items/{item_id}"}
+    unmatched_labels = {"method": "GET", "route": "unmatched"}
+    route_before = sample("http_request_duration_seconds_count", route_labels)
+    unmatched_before = sample("http_request_duration_seconds_count", unmatched_labels)
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/items/1")).status_code == 200
+        assert (await client.get("/items/-1")).status_code == 404
+        assert (await client.get("/missing")).status_code == 404
+        response = await client.get("/metrics")
+    assert response.status_code == 200
+    assert 'route="/items/{item_id}"' in response.text
+    assert sample("http_request_duration_seconds_count", route_labels) == route_before + 2
+    assert sample("http_request_duration_seconds_count", unmatched_labels) == unmatched_before + 1
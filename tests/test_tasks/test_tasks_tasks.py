@@ -0,0 +1,137 @@
+import pytest
+
+from datetime import datetime, timedelta
+from sqlalchemy import delete, select
+
+from tests.conftest import db_session, fake_redis
+
+from src.config import settings, timezone
+from src.archive.models import ArchivedLink
+from src.links.models import Link
+from src.analytics.models import ClickEvent
+from src.analytics.stream import CLICK_STREAM_KEY, make_click_event
+from src.links.pool import get_code_pool_size, push_pooled_codes
+from src.tasks import tasks
+from src.tasks.tasks import (archive_expired_links, clean_up_expired_links, refill_code_pool,
+                             consume_click_events, update_stats)
+
+
+def make_link(number: int, expires_at: datetime) -> Link:
+    return Link(
+        link=f"http://example.com/{number}/",
+        code=f"example_code_{number}",
+        created_at=datetime.now(timezone),
+        updated_at=datetime.now(timezone),
+        usage_count=number,
+        expires_at=expires_at
+    )
+
+@pytest.mark.asyncio
+async def test_archive_expired_links(db_session):
+    now = datetime.now(timezone)
+    db_session.add_all([make_link(1, now - timedelta(days=1)),
+                        make_link(2, now - timedelta(days=1)),
+                        make_link(3, now + timedelta(days=1))])
+    await db_session.commit()
+    codes = await archive_expired_links(db_session, now)
+    assert {"example_code_1", "example_code_2"} <= set(codes)
+    assert "example_code_3" not in codes
+    links = await db_session.scalars(select(Link.code).where(Link.code.like("example_code_%")))
+    assert links.all() == ["example_code_3"]
+    archived = await db_session.scalars(select(ArchivedLink).where(ArchivedLink.code == "example_code_2"))
+    archived_link = archived.one()
+    assert archived_link.usage_count == 2
+    assert archived_link.deleted_at == now
+    assert await archive_expired_links(db_session, now) == []
+
+@pytest.mark.asyncio
+async def test_refill_code_pool(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "CODE_POOL_ENABLED", True)
+    monkeypatch.setattr(settings, "CODE_POOL_SIZE", 100)
+    await push_pooled_codes("code1")
+    result = await refill_code_pool()
+    assert result == {'added codes': 99}
+    assert await get_code_pool_size() == 100
+    assert await refill_code_pool() == {'added codes': 0}
+
+@pytest.mark.asyncio
+async def test_refill_code_pool_disabled(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "CODE_POOL_ENABLED", False)
+    assert await refill_code_pool() == {'message': 'Code pool is disabled.'}
+    assert await get_code_pool_size() == 0
+
+@pytest.mark.asyncio
+async def test_consume_click_events(db_session, fake_redis, monkeypatch):
+    _, stats = fake_redis
+
+    async def get_test_session():
+        yield db_session
+
+    monkeypatch.setattr(tasks, "get_async_session", get_test_session)
+    monkeypatch.setattr(tasks, "CLICK_EVENTS_BATCH_SIZE", 2)
+    for _ in range(3):
+        await stats.xadd(CLICK_STREAM_KEY, make_click_event("example_code", None, None))
+    assert await consume_click_events() == {'click events': 3}
+    events = await db_session.scalars(select(ClickEvent).where(ClickEvent.code == "example_code"))
+    assert len(events.all()) == 3
+    assert (await stats.xpending(CLICK_STREAM_KEY, "click_events_consumers"))["pending"] == 0
+    assert await consume_click_events() == {'click events': 0}
+
+@pytest.fixture()
+def test_session(db_session, monkeypatch):
+    async def get_test_session():
+        yield db_session
+
+    monkeypatch.setattr(tasks, "get_async_session", get_test_session)
+
+@pytest.mark.asyncio
+async def test_update_stats(db_session, fake_redis, test_session, monkeypatch):
+    _, stats = fake_redis
+    monkeypatch.setattr(tasks, "STATS_BATCH_SIZE", 2)
+    now = datetime.now(timezone)
+    db_session.add_all([make_link(number, now + timedelta(days=1)) for number in (1, 2, 3)])
+    await db_session.commit()
+    await stats.zadd("link_stats:flushing", {"example_code_1": 5})
+    await stats.zadd("link_stats", {"example_code_2": 2, "example_code_3": 1})
+    await stats.set("link_data:example_code_2", "{}")
+    assert await update_stats() == {'updated links': 1}
+    assert await stats.zcard("link_stats") == 2
+    assert await update_stats() == {'updated links': 2}
+    links = await db_session.scalars(select(Link).where(Link.code.like("example_code_%"))
+                                     .order_by(Link.code))
+    assert [link.usage_count for link in links] == [6, 4, 4]
+    assert not await stats.exists("link_stats", "link_stats:flushing", "link_stats:lock",
+                                  "link_data:example_code_2")
+    assert await update_stats() == {'message': 'No stats to update.'}
+
+@pytest.mark.asyncio
+async def test_update_stats_locked(db_session, fake_redis, test_session):
+    _, stats = fake_redis
+    db_session.add(make_link(1, datetime.now(timezone) + timedelta(days=1)))
+    await db_session.commit()
+    await stats.zadd("link_stats:flushing", {"example_code_1": 7})
+    await stats.set("link_stats:lock", "other_run")
+    assert await update_stats() == {'message': 'Stats update is already running.'}
+    assert await stats.zscore("link_stats:flushing", "example_code_1") == 7
+    assert await stats.get("link_stats:lock") == b"other_run"
+
+@pytest.mark.asyncio
+async def test_clean_up_expired_links(db_session, fake_redis, test_session, monkeypatch):
+    invalidated = []
+
+    async def record_invalidated(*codes):
+        invalidated.append(set(codes))
+
+    monkeypatch.setattr(tasks, "ARCHIVE_BATCH_SIZE", 2)
+    monkeypatch.setattr(tasks, "invalidate_links", record_invalidated)
+    await db_session.execute(delete(Link).where(Link.expires_at < datetime.now(timezone)))
+    now = datetime.now(timezone)
+    db_session.add_all([make_link(number, now - timedelta(days=1)) for number in (1, 2, 3)]
+                       + [make_link(4, now + timedelta(days=1))])
+    await db_session.commit()
+    assert await clean_up_expired_links() == {'archived links': 3}
+    assert [len(codes) for codes in invalidated] == [2, 1]
+    assert set.union(*invalidated) == {"example_code_1", "example_code_2", "example_code_3"}
+    links = await db_session.scalars(select(Link.code).where(Link.code.like("example_code_%")))
+    assert links.all() == ["example_code_4"]
+    assert await clean_up_expired_links() == {'message': 'No expired links to clean up.'}
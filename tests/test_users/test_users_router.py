@@ -0,0 +1,83 @@
+import json
+import pytest
+import pytest_asyncio
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from tests.conftest import db_session
+
+from src.config import timezone
+from src.database import get_lazy_read_session
+from src.links.models import Link
+from src.users import router as users_router
+from src.users.models import User
+from src.users.router import router
+from src.users.schemas import UserData
+from src.users.service import get_current_active_user
+
+
+@pytest.fixture()
+def client(db_session):
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_lazy_read_session] = lambda: db_session
+    app.dependency_overrides[get_current_active_user] = lambda: UserData(username='test_user',
+                                                                         disabled=False)
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+@pytest_asyncio.fixture
+async def user_links(db_session):
+    db_session.add(User(username='test_user', hashed_password='test_password'))
+    await db_session.commit()
+    created_at = datetime.now(timezone)
+    db_session.add_all([Link(owner='test_user',
+                             link=f"http://example.com/{number}/",
+                             code=f"example_code_{number}",
+                             created_at=created_at + timedelta(seconds=number // 2),
+                             updated_at=created_at)
+                        for number in range(5)])
+    await db_session.commit()
+
+@pytest.mark.asyncio
+async def test_read_users_me_links_pages(client, user_links):
+    async with client:
+        response = await client.get("/user/me/links", params={"limit": 2})
+        assert response.status_code == 200
+        pages = [response.json()]
+        while pages[-1]["next_cursor"] is not None:
+            response = await client.get("/user/me/links",
+                                        params={"limit": 2, "cursor": pages[-1]["next_cursor"]})
+            pages.append(response.json())
+    assert [len(page["links"]) for page in pages] == [2, 2, 1]
+    codes = [link["code"] for page in pages for link in page["links"]]
+    assert codes == [f"example_code_{number}" for number in range(5)]
+
+@pytest.mark.asyncio
+async def test_read_users_me_links_last_page(client, user_links):
+    async with client:
+        response = await client.get("/user/me/links", params={"limit": 5})
+    assert len(response.json()["links"]) == 5
+    assert response.json()["next_cursor"] is None
+
+@pytest.mark.asyncio
+async def test_read_users_me_links_bad_cursor(client):
+    async with client:
+        response = await client.get("/user/me/links", params={"cursor": "not a cursor"})
+    assert response.status_code == 422
+
+@pytest.mark.asyncio
+async def test_read_users_me_links_ndjson(client, user_links, db_session, monkeypatch):
+    @asynccontextmanager
+    async def session_maker():
+        yield db_session
+
+    monkeypatch.setattr(users_router, "read_session_maker", session_maker)
+    async with client:
+        response = await client.get("/user/me/links", params={"limit": 1},
+                                    headers={"accept": "application/x-ndjson"})
+    assert response.headers["content-type"] == "application/x-ndjson"
+    codes = [json.loads(line)["code"] for line in response.text.splitlines()]
+    assert codes == [f"example_code_{number}" for number in range(5)]
@@ -1,16 +1,21 @@
+import asyncio
 import pytest
 import pytest_asyncio
 
 from sqlalchemy import select
 from datetime import timedelta
 from jwt.exceptions import InvalidTokenError
+from fastapi import HTTPException
 
 from tests.conftest import db_session
 from test_users.test_users_models import valid_user
 
 from src.users.models import User
+from src.users import service
 from src.users.service import (verify_password,
                                get_password_hash,
+                               verify_password_async,
+                               get_password_hash_async,
                                get_user,
                                authenticate_user,
                                create_access_token,
@@ -18,6 +23,7 @@ from src.users.service import (verify_password,
                                get_current_active_user,
                                get_current_active_user_soft,
                                insert_user)
+from src.users.cache import local_user_cache
 
 
 async def add_user(session, user):
@@ -34,6 +40,27 @@ def test_get_password_hash():
 def test_verify_password(plain_password, hashed_password, expected):
     assert verify_password(plain_password, hashed_password) == expected
 
+@pytest.mark.asyncio
+async def test_get_password_hash_async():
+    hashed_password = await get_password_hash_async("password")
+    assert verify_password("password", hashed_password)
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("plain_password, expected", [
+    ("password", True),
+    ("wrong_password", False)
+])
+async def test_verify_password_async(plain_password, expected):
+    hashed_password = get_password_hash("password")
+    assert await verify_password_async(plain_password, hashed_password) == expected
+
+@pytest.mark.asyncio
+async def test_verify_password_async_overload(monkeypatch):
+    monkeypatch.setattr(service, "password_jobs", asyncio.Semaphore(0))
+    with pytest.raises(HTTPException) as exc_info:
+        await verify_password_async("password", get_password_hash("password"))
+    assert exc_info.value.status_code == 503
+
 @pytest.mark.asyncio
 async def test_get_user(db_session, valid_user):
     await add_user(db_session, valid_user)
@@ -83,10 +110,20 @@ def test_create_access_token(valid_user, expires_delta):
     assert isinstance(token, str)
 
 @pytest.mark.asyncio
-async def test_get_current_user_none_user(valid_user):
+async def test_get_current_user_none_user(db_session, valid_user):
     token = create_access_token(data={"sub": valid_user.username})
     with pytest.raises(Exception):
-        await get_current_user(token)
+        await get_current_user(token, db_session)
+
+@pytest.mark.asyncio
+async def test_get_current_user_cached(db_session, valid_user):
+    local_user_cache.clear()
+    await add_user(db_session, valid_user)
+    token = create_access_token(data={"sub": valid_user.username})
+    user = await get_current_user(token, db_session)
+    assert user.username == valid_user.username
+    assert local_user_cache.get(valid_user.username) == user
+    local_user_cache.clear()
 
 @pytest.mark.asyncio
 async def test_insert_user(db_session, valid_user):